@@ -6,6 +6,8 @@ Key Features:
     - Utilizes the NiaARM algorithm for mining association rules.
     - Applies Differential Evolution for rule optimization.
     - Supports analysis of sensitive variables and computes average statistics for each rule.
+    - Rounds the rule statistics vectorized, and returns the rules as a list of records or in a compact columnar layout.
+    - Scores every pair of a sensitive variable and a column by the best rule linking them, for the stability mode.
 '''
 
 
@@ -14,19 +16,30 @@ from niaarm import Dataset, get_rules
 from niapy.algorithms.basic import DifferentialEvolution
 from niapy.task import Task, OptimizationType
 import pandas as pd
+import numpy as np
+
+# The algorithms are imported as a package by the tests and from the algorithms directory by api.py
+try:
+    from algorithms.result_matrix import round_values, check_layout
+except ImportError:
+    from result_matrix import round_values, check_layout
+
+# Metrics reported for every rule besides its fitness
+RULE_METRICS = ["support", "confidence", "lift"]
+# Number of decimal places the rule fitness is rounded to
+FITNESS_DECIMALS = 5
+# Number of decimal places the rule metrics are rounded to
+METRIC_DECIMALS = 6
 
 '''
-Computes association rule mining (ARM) using the NiaARM algorithm and Differential Evolution optimization.
+Mines association rules with the NiaARM algorithm and Differential Evolution optimization.
 Parameters:
-    sensitive_variables: list of variables to analyze for sensitive relationships.
     df: a dataframe containing the dataset to be analyzed.
-    target_var: the target variable for building the prediction model.
-    random_seed: the random seed for computation (default is 0 for reproducibility).
+    seed: the random seed of the optimization, or -1 for an unseeded run.
 Returns:
-    A dictionary where the keys are sensitive variables, and the values contain statistics for the association rules found.
+    The list of the association rules found, sorted by fitness.
 '''
-def compute_arm(sensitive_variables, df, seed):
-    
+def mine_rules(df, seed):
     # Input data as a DataSet
     data = Dataset(df)
 
@@ -45,12 +58,65 @@ def compute_arm(sensitive_variables, df, seed):
 
     # Sort the association rules
     problem.rules.sort()
+    return problem.rules
+
+'''
+Scores every pair of a sensitive variable and a column by the best rule that has one of them in its antecedent and
+the other in its consequent.
+Parameters:
+    rules: association rules, as returned by mine_rules.
+    sensitive_variables: the row labels of the scores.
+    columns: the column labels of the scores.
+Returns:
+    A dictionary mapping every metric of RULE_METRICS to a (k, N) array of the largest value of the metric over the
+    rules linking each pair, NaN for pairs that no rule links.
+'''
+def rule_scores(rules, sensitive_variables, columns):
+    rows = {var: i for i, var in enumerate(sensitive_variables)}
+    cols = {col: j for j, col in enumerate(columns)}
+    scores = {metric: np.full((len(sensitive_variables), len(columns)), np.nan) for metric in RULE_METRICS}
+    for rule in rules:
+        antecedent = {item.name for item in rule.antecedent}
+        consequent = {item.name for item in rule.consequent}
+        # Both directions link a pair, a variable is never linked with itself
+        pairs = {(a, c) for a in antecedent for c in consequent} | {(c, a) for a in antecedent for c in consequent}
+        for var, col in pairs:
+            if var in rows and col in cols and var != col:
+                for metric in RULE_METRICS:
+                    scores[metric][rows[var], cols[col]] = np.fmax(scores[metric][rows[var], cols[col]], getattr(rule, metric))
+    return scores
+
+'''
+Computes association rule mining (ARM) using the NiaARM algorithm and Differential Evolution optimization.
+Parameters:
+    sensitive_variables: list of variables to analyze for sensitive relationships.
+    df: a dataframe containing the dataset to be analyzed.
+    target_var: the target variable for building the prediction model.
+    random_seed: the random seed for computation (default is 0 for reproducibility).
+    layout: 'nested' (default) for a list of one dictionary per rule, or 'columnar' for a dictionary of one list per
+        field, with None for missing values.
+Returns:
+    A dictionary where the keys are sensitive variables, and the values contain statistics for the association rules found.
+'''
+def compute_arm(sensitive_variables, df, seed, layout='nested'):
+    check_layout(layout)
+    
+    # Association rules sorted by fitness
+    rules = mine_rules(df, seed)
+
+    # Fitness and metrics of all rules, rounded at once
+    scores = np.array([[rule.fitness] + [getattr(rule, metric) for metric in RULE_METRICS] for rule in rules], dtype=float)
+    scores = scores.reshape(len(rules), len(RULE_METRICS) + 1)
+    missing = None if layout == 'columnar' else np.nan
 
-    rules = []
-    for rule in problem.rules:
-        row = {"antecedent": [f"{a.name}({round(a.min_val,3)},{round(a.max_val,3)})" for a in rule.antecedent], "consequent": [f"{c.name}({round(c.min_val,3)},{round(c.max_val,3)})" for c in rule.consequent], "fitness": round(rule.fitness,5)}
-        for metric in ["support", "confidence", "lift"]:
-            row[metric] = round(getattr(rule, metric),6)
-        rules.append(row)
+    table = {
+        "antecedent": [[f"{a.name}({round(a.min_val,3)},{round(a.max_val,3)})" for a in rule.antecedent] for rule in rules],
+        "consequent": [[f"{c.name}({round(c.min_val,3)},{round(c.max_val,3)})" for c in rule.consequent] for rule in rules],
+        "fitness": round_values(scores[:, 0], FITNESS_DECIMALS, missing)
+    }
+    for position, metric in enumerate(RULE_METRICS, start=1):
+        table[metric] = round_values(scores[:, position], METRIC_DECIMALS, missing)
 
-    return rules
+    if layout == 'columnar':
+        return table
+    return [dict(zip(table, row)) for row in zip(*table.values())]
@@ -0,0 +1,177 @@
+'''
+assoc.py
+This program implements categorical-aware association analysis between sensitive variables and other variables in a dataset.
+
+Key Features:
+    - Uses Cramér's V between two categorical variables and the correlation ratio (eta) between a categorical and a
+      numeric variable, so text columns such as occupation or country can be analyzed as proxies.
+    - Builds all contingency tables and group sums with a single np.bincount per sensitive variable, vectorized
+      across every column.
+    - Treats dictionary-encoded columns and numeric columns with few distinct values as categorical. Pairs of two
+      numeric columns use Cramér's V over quantile bins.
+    - Formats association values to three decimal places and handles NaN values, vectorized through ResultMatrix.
+'''
+
+
+import pandas as pd
+import numpy as np
+
+# The algorithms are imported as a package by the tests and from the algorithms directory by api.py
+try:
+    from algorithms.result_matrix import ResultMatrix, check_layout
+except ImportError:
+    from result_matrix import ResultMatrix, check_layout
+
+# Numeric columns with at most this many distinct values are treated as categorical
+CATEGORICAL_MAX_LEVELS = 10
+# Number of quantile bins numeric columns are split into for numeric vs numeric pairs
+NUMERIC_BINS = 10
+# Number of decimal places the association values are rounded to
+ASSOC_DECIMALS = 3
+
+'''
+Encodes a column as integer codes 0..levels-1, with -1 for missing values.
+Parameters:
+    values: a 1D float array.
+    bins: when given, the values are split into this many quantile bins instead of one code per distinct value.
+Returns:
+    A tuple (codes, levels).
+'''
+def encode_column(values, bins=None):
+    valid = np.isfinite(values)
+    codes = np.full(len(values), -1, dtype=np.int64)
+    if not valid.any():
+        return codes, 0
+    if bins is None:
+        levels, codes[valid] = np.unique(values[valid], return_inverse=True)
+        return codes, len(levels)
+    # Quantile bins from the ranks, so ties always land in the same bin
+    ranks = pd.Series(values[valid]).rank(method='min').to_numpy()
+    binned = np.floor((ranks - 1) * bins / valid.sum()).astype(np.int64)
+    levels, codes[valid] = np.unique(binned, return_inverse=True)
+    return codes, len(levels)
+
+'''
+Computes Cramér's V for many pairs of categorical variables at once.
+Parameters:
+    first: a (rows, m) int array of codes, -1 for missing values.
+    second: a (rows, m) int array of codes, -1 for missing values.
+    first_levels: an upper bound on the number of levels in first.
+    second_levels: an upper bound on the number of levels in second.
+Returns:
+    An array of m values, NaN where a variable has a single level.
+'''
+def cramers_v(first, second, first_levels, second_levels):
+    pairs = first.shape[1]
+    valid = (first >= 0) & (second >= 0)
+
+    # One contingency table per pair, all filled by a single bincount
+    keys = (np.arange(pairs)[None, :] * first_levels + first) * second_levels + second
+    tables = np.bincount(keys[valid], minlength=pairs * first_levels * second_levels)
+    tables = tables.reshape(pairs, first_levels, second_levels).astype(float)
+
+    totals = tables.sum(axis=(1, 2))
+    row_sums = tables.sum(axis=2)
+    column_sums = tables.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = row_sums[:, :, None] * column_sums[:, None, :] / totals[:, None, None]
+        chi_squared = np.where(expected > 0, (tables - expected) ** 2 / expected, 0).sum(axis=(1, 2))
+        dof = np.minimum((row_sums > 0).sum(axis=1), (column_sums > 0).sum(axis=1)) - 1
+        values = np.sqrt(chi_squared / totals / dof)
+    return np.where((dof > 0) & (totals > 0), np.minimum(values, 1), np.nan)
+
+'''
+Computes the correlation ratio (eta) of numeric values grouped by a categorical variable, for many pairs at once.
+Parameters:
+    groups: a (rows, m) int array of group codes, -1 for missing values.
+    values: a (rows, m) float array of values, NaN for missing values.
+    levels: an upper bound on the number of levels in groups.
+Returns:
+    An array of m values, NaN where the values are constant.
+'''
+def correlation_ratio(groups, values, levels):
+    pairs = groups.shape[1]
+    valid = (groups >= 0) & np.isfinite(values)
+
+    # Group counts and sums per pair, all filled by single bincounts
+    keys = (np.arange(pairs)[None, :] * levels + groups)[valid]
+    weights = values[valid]
+    counts = np.bincount(keys, minlength=pairs * levels).reshape(pairs, levels)
+    sums = np.bincount(keys, weights=weights, minlength=pairs * levels).reshape(pairs, levels)
+
+    # Totals per pair
+    pair_index = np.broadcast_to(np.arange(pairs)[None, :], valid.shape)[valid]
+    totals = np.bincount(pair_index, minlength=pairs)
+    total_sums = sums.sum(axis=1)
+    centered = weights - (total_sums / np.maximum(totals, 1))[pair_index]
+    total_squares = np.bincount(pair_index, weights=centered ** 2, minlength=pairs)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        between = np.where(counts > 0, sums ** 2 / counts, 0).sum(axis=1) - total_sums ** 2 / totals
+        values = np.sqrt(np.clip(between / total_squares, 0, 1))
+    return np.where(total_squares > 0, values, np.nan)
+
+'''
+Computes association between sensitive variables and other variables in the dataset, choosing the measure from the
+types of both variables.
+Parameters:
+    sensitive_variables: list of variables to analyze for redundancy.
+    data: a dataframe containing the dataset to be analyzed, with categorical columns as integer codes.
+    categorical_columns: optional list of columns that hold dictionary-encoded categories.
+    layout: 'nested' (default) or 'columnar', see ResultMatrix.
+Returns:
+    A dictionary where the keys are sensitive variables and the values are dictionaries of association values with respect to other variables.
+'''
+def compute_assoc(sensitive_variables, data, categorical_columns=None, layout='nested'):
+
+    # Check if sensitive variables and data are provided
+    if(sensitive_variables is None):
+        raise ValueError("Sensitive Variables needed for Categorical Association")
+    if(data is None):
+        raise ValueError("Data needed for Categorical Association")
+    check_layout(layout)
+
+    # Input data as a DataFrame
+    df = pd.DataFrame(data)
+
+    # Check if all sensitive variables exist in the data columns
+    missing_vars = [var for var in sensitive_variables if var not in df.columns]
+    if missing_vars:
+        raise ValueError(f"Sensitive variable(s) {missing_vars} not found in the data columns for Categorical Association")
+
+    matrix = df.to_numpy(dtype=float, na_value=np.nan)
+    columns = list(df.columns)
+    categorical_columns = set(categorical_columns or [])
+
+    # Codes of every column, and quantile bins of the numeric ones
+    codes = np.empty(matrix.shape, dtype=np.int64)
+    binned = np.empty(matrix.shape, dtype=np.int64)
+    levels = np.zeros(len(columns), dtype=np.int64)
+    bin_levels = np.zeros(len(columns), dtype=np.int64)
+    for j, col in enumerate(columns):
+        codes[:, j], levels[j] = encode_column(matrix[:, j])
+        binned[:, j], bin_levels[j] = encode_column(matrix[:, j], NUMERIC_BINS)
+    categorical = np.array([col in categorical_columns or levels[j] <= CATEGORICAL_MAX_LEVELS for j, col in enumerate(columns)])
+    numeric = ~categorical
+    max_levels = max(int(levels[categorical].max(initial=1)), 1)
+    max_bins = max(int(bin_levels.max(initial=1)), 1)
+
+    result = np.full((len(sensitive_variables), len(columns)), np.nan)
+    for row, sens in enumerate(sensitive_variables):
+        s = columns.index(sens)
+        values = result[row]
+        if categorical[s]:
+            # Cramér's V against the categorical columns, eta of the numeric columns grouped by the sensitive variable
+            s_codes = np.repeat(codes[:, [s]], categorical.sum(), axis=1)
+            values[categorical] = cramers_v(s_codes, codes[:, categorical], max(int(levels[s]), 1), max_levels)
+            s_codes = np.repeat(codes[:, [s]], numeric.sum(), axis=1)
+            values[numeric] = correlation_ratio(s_codes, matrix[:, numeric], max(int(levels[s]), 1))
+        else:
+            # Eta of the sensitive variable grouped by the categorical columns, binned Cramér's V against the numeric columns
+            s_values = np.repeat(matrix[:, [s]], categorical.sum(), axis=1)
+            values[categorical] = correlation_ratio(codes[:, categorical], s_values, max_levels)
+            s_binned = np.repeat(binned[:, [s]], numeric.sum(), axis=1)
+            values[numeric] = cramers_v(s_binned, binned[:, numeric], max(int(bin_levels[s]), 1), max_bins)
+
+    # Format the association values to 3 decimal places and handle NaN values
+    return ResultMatrix(result, sensitive_variables, columns, ASSOC_DECIMALS).to_layout(layout)
@@ -6,27 +6,601 @@ Key Features:
     - Supports three different correlation methods: Pearson, Spearman, and Kendall.
     - Formats correlation values to three decimal places and handles NaN values.
     - Computes correlation values for the sensitive variables with respect to all other variables in the dataset.
+    - Computes only the k x N block of sensitive-vs-all correlations instead of the full N x N matrix,
+      using pairwise-complete observations for missing values and ranking every column only once.
+    - Computes Kendall tau-b with Knight's O(n log n) merge sort algorithm, compiled with Numba when it is installed.
+    - Answers Pearson queries from precomputed sufficient statistics (see corr_stream.py) without rescanning rows.
+    - Restricts the analysis to a subset of the columns when requested.
+    - Approximates correlations on a random sample that grows until every Fisher-z confidence interval is
+      narrower than a requested width.
+    - Optionally computes p-values for the whole block at once (t approximation for Pearson and Spearman, normal
+      approximation for Kendall) and adjusts them with the Benjamini-Hochberg procedure.
+    - Rounds and serializes the result blocks vectorized through ResultMatrix, as nested dictionaries or in a
+      compact columnar layout.
+    - Splits very wide datasets into column tiles that a process pool computes in parallel over a shared-memory
+      copy of the data matrix.
+
+Accuracy:
+    The block engine follows the same definitions as DataFrame.corr (pairwise-complete observations,
+    average ranks for ties, re-ranking of pairs with missing values for Spearman, tau-b for Kendall).
+    Before rounding, values agree with DataFrame.corr to within CORR_TOLERANCE; the only differences
+    come from floating point summation order.
 '''
 
 
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
 import pandas as pd
 import numpy as np
+from scipy.stats import kendalltau, rankdata, norm, t
+
+# Numba is optional, without it Kendall falls back to scipy
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# The algorithms are imported as a package by the tests and from the algorithms directory by api.py
+try:
+    from algorithms.result_matrix import ResultMatrix, check_layout
+except ImportError:
+    from result_matrix import ResultMatrix, check_layout
+try:
+    from util.resource_governor import job_cpus, worker_context
+except ImportError:
+    from resource_governor import job_cpus, worker_context
+
+# Correlation methods to be used
+CORR_METHODS = ['pearson', 'spearman', 'kendall']
+# Number of decimal places the correlation values are rounded to
+CORR_DECIMALS = 3
+# Maximum absolute difference from DataFrame.corr before rounding
+CORR_TOLERANCE = 1e-12
+# Number of rows of the first sample in approximate mode
+APPROX_INITIAL_ROWS = 1000
+# Factor the sample grows by in approximate mode
+APPROX_GROWTH = 2
+# Number of columns from which compute_corr uses the tiled process-parallel engine
+PARALLEL_MIN_COLUMNS = 1000
+# Number of columns per tile of the tiled engine
+TILE_COLUMNS = 250
+# Default number of worker processes of the tiled engine
+PARALLEL_WORKERS = os.cpu_count() or 1
+# Logger of the fallbacks from the tiled engine to the serial one
+logger = logging.getLogger(__name__)
+# Variance factor and degrees of freedom lost of the Fisher-z transformed coefficients (Fieller, Hartley and Pearson, 1957)
+FISHER_VARIANCE = {'pearson': (1.0, 3), 'spearman': (1.06, 3), 'kendall': (0.437, 4)}
+
+'''
+Converts a dataframe into a float matrix, the same way DataFrame.corr does.
+Parameters:
+    df: a dataframe containing the dataset to be analyzed.
+Returns:
+    A 2D float array with one column per dataframe column. Non-numeric data raises a ValueError.
+'''
+def to_float_matrix(df):
+    return df.to_numpy(dtype=float, na_value=np.nan)
+
+'''
+Ranks every column of a matrix, assigning average ranks to ties and keeping missing values missing.
+Parameters:
+    matrix: a 2D float array.
+Returns:
+    A 2D float array of the same shape holding the column ranks.
+'''
+def rank_columns(matrix):
+    return pd.DataFrame(matrix).rank(method='average').to_numpy(dtype=float)
+
+'''
+Ranks every column of a matrix with dense ranks, which is cheaper than average ranks and enough when only
+the order and ties of the values matter.
+Parameters:
+    matrix: a 2D float array.
+Returns:
+    A 2D float array of the same shape holding the dense column ranks, with missing values kept missing.
+'''
+def dense_rank_columns(matrix):
+    ranks = np.full(matrix.shape, np.nan)
+    for j in range(matrix.shape[1]):
+        valid = np.isfinite(matrix[:, j])
+        ranks[valid, j] = np.unique(matrix[valid, j], return_inverse=True)[1] + 1
+    return ranks
+
+'''
+Computes the Pearson correlation of every column of x against every column of y over pairwise-complete observations.
+Parameters:
+    x: a 2D float array of shape (rows, k), usually the sensitive columns.
+    y: a 2D float array of shape (rows, N), usually all columns.
+Returns:
+    A tuple (correlations, counts) of (k, N) arrays, where counts holds the number of pairwise-complete observations.
+'''
+def pearson_block(x, y):
+    valid_x = np.isfinite(x)
+    valid_y = np.isfinite(y)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Fast path when there are no missing values: center once and use a single matrix product
+        if valid_x.all() and valid_y.all():
+            x_centered = x - x.mean(axis=0)
+            y_centered = y - y.mean(axis=0)
+            covariance = x_centered.T @ y_centered
+            divisor = np.sqrt(np.outer((x_centered ** 2).sum(axis=0), (y_centered ** 2).sum(axis=0)))
+            counts = np.full(covariance.shape, len(x), dtype=float)
+            return np.where(divisor != 0, covariance / divisor, np.nan), counts
+
+        # Otherwise each sensitive column is masked against all columns at once
+        y_zeroed = np.where(valid_y, y, 0.0)
+        y_mask = valid_y.astype(float)
+        correlations = np.empty((x.shape[1], y.shape[1]))
+        counts = np.empty((x.shape[1], y.shape[1]))
+        for i in range(x.shape[1]):
+            x_valid = valid_x[:, i]
+            x_zeroed = np.where(x_valid, x[:, i], 0.0)
+            mask = y_mask * x_valid[:, None]
+            count = mask.sum(axis=0)
+            mean_x = (x_zeroed @ mask) / count
+            mean_y = (y_zeroed * mask).sum(axis=0) / count
+            dx = (x_zeroed[:, None] - mean_x) * mask
+            dy = (y_zeroed - mean_y) * mask
+            divisor = np.sqrt((dx ** 2).sum(axis=0) * (dy ** 2).sum(axis=0))
+            correlations[i] = np.where(divisor != 0, (dx * dy).sum(axis=0) / divisor, np.nan)
+            counts[i] = count
+    return correlations, counts
+
+'''
+Computes the Spearman correlation of every column of x against every column of y.
+Parameters:
+    x: a 2D float array of shape (rows, k).
+    y: a 2D float array of shape (rows, N).
+    x_ranks: the column ranks of x, as returned by rank_columns.
+    y_ranks: the column ranks of y, as returned by rank_columns.
+Returns:
+    A tuple (correlations, counts) of (k, N) arrays.
+'''
+def spearman_block(x, y, x_ranks, y_ranks):
+    correlations, counts = pearson_block(x_ranks, y_ranks)
+
+    # Pairs whose shared rows differ from either column's own non-missing rows are re-ranked on the shared rows
+    valid_x = np.isfinite(x)
+    valid_y = np.isfinite(y)
+    if not (valid_x.all() and valid_y.all()):
+        stale = (counts != valid_x.sum(axis=0)[:, None]) | (counts != valid_y.sum(axis=0)[None, :])
+        for i, j in zip(*np.nonzero(stale & (counts > 0))):
+            shared = valid_x[:, i] & valid_y[:, j]
+            pair_ranks = np.column_stack([rankdata(x[shared, i]), rankdata(y[shared, j])])
+            correlations[i, j] = pearson_block(pair_ranks[:, :1], pair_ranks[:, 1:])[0][0, 0]
+    return correlations, counts
+
+'''
+Counts the number of swaps a merge sort needs to order the values, which is the number of discordant pairs.
+Parameters:
+    values: a 1D int64 array.
+Returns:
+    A tuple (swaps, sorted values).
+'''
+def _merge_sort_swaps(values):
+    n = len(values)
+    source = values.copy()
+    target = np.empty_like(source)
+    swaps = 0
+    width = 1
+    # Bottom-up merge sort, counting how many elements each right-hand element jumps over
+    while width < n:
+        for low in range(0, n, 2 * width):
+            middle = min(low + width, n)
+            high = min(low + 2 * width, n)
+            i = low
+            j = middle
+            k = low
+            while i < middle and j < high:
+                if source[j] < source[i]:
+                    target[k] = source[j]
+                    swaps += middle - i
+                    j += 1
+                else:
+                    target[k] = source[i]
+                    i += 1
+                k += 1
+            while i < middle:
+                target[k] = source[i]
+                i += 1
+                k += 1
+            while j < high:
+                target[k] = source[j]
+                j += 1
+                k += 1
+        source, target = target, source
+        width *= 2
+    return swaps, source
+
+'''
+Counts the tied pairs in runs of equal values of a sorted array.
+Parameters:
+    values: a sorted 1D int64 array.
+Returns:
+    The number of tied pairs.
+'''
+def _tied_pairs(values):
+    ties = 0
+    run = 1
+    for i in range(1, len(values)):
+        if values[i] == values[i - 1]:
+            run += 1
+        else:
+            ties += run * (run - 1) // 2
+            run = 1
+    return ties + run * (run - 1) // 2
+
+'''
+Stably orders positions by small non-negative integer codes with a counting sort, in O(n + max code).
+Parameters:
+    codes: a 1D int64 array of non-negative codes.
+    positions: a 1D int64 array of positions into codes, in their current order.
+Returns:
+    The positions reordered by their codes, keeping the current order within equal codes.
+'''
+def _counting_sort(codes, positions):
+    counts = np.zeros(codes.max() + 2, dtype=np.int64)
+    for position in positions:
+        counts[codes[position] + 1] += 1
+    for code in range(1, len(counts)):
+        counts[code] += counts[code - 1]
+    ordered = np.empty_like(positions)
+    for position in positions:
+        ordered[counts[codes[position]]] = position
+        counts[codes[position]] += 1
+    return ordered
+
+'''
+Computes Kendall tau-b with Knight's algorithm from integer codes that preserve the order and ties of two variables.
+Parameters:
+    x_codes: a 1D array of non-negative int64 codes.
+    y_codes: a 1D array of non-negative int64 codes of the same length.
+Returns:
+    The tau-b coefficient, or NaN when either variable is constant.
+'''
+def _kendall_tau_b(x_codes, y_codes):
+    n = len(x_codes)
+    if n < 2:
+        return np.nan
+
+    # Order the pairs by x and then by y with two stable counting sorts
+    order = _counting_sort(x_codes, _counting_sort(y_codes, np.arange(n)))
+    x_sorted = x_codes[order]
+    y_sorted = y_codes[order]
+
+    # Pairs tied in x, and pairs tied in both x and y
+    x_ties = 0
+    joint_ties = 0
+    x_run = 1
+    joint_run = 1
+    for i in range(1, n):
+        if x_sorted[i] == x_sorted[i - 1]:
+            x_run += 1
+            if y_sorted[i] == y_sorted[i - 1]:
+                joint_run += 1
+            else:
+                joint_ties += joint_run * (joint_run - 1) // 2
+                joint_run = 1
+        else:
+            x_ties += x_run * (x_run - 1) // 2
+            joint_ties += joint_run * (joint_run - 1) // 2
+            x_run = 1
+            joint_run = 1
+    x_ties += x_run * (x_run - 1) // 2
+    joint_ties += joint_run * (joint_run - 1) // 2
+
+    # Discordant pairs are the swaps needed to sort y, after which the ties in y can be counted
+    swaps, y_ordered = _merge_sort_swaps(y_sorted)
+    y_ties = _tied_pairs(y_ordered)
+
+    total = n * (n - 1) // 2
+    denominator = np.sqrt(float(total - x_ties) * float(total - y_ties))
+    if denominator == 0:
+        return np.nan
+    return float(total - x_ties - y_ties + joint_ties - 2 * swaps) / denominator
+
+# Compile the Kendall kernels when Numba is available
+if njit is not None:
+    _merge_sort_swaps = njit(_merge_sort_swaps)
+    _tied_pairs = njit(_tied_pairs)
+    _counting_sort = njit(_counting_sort)
+    _kendall_tau_b = njit(_kendall_tau_b)
+
+'''
+Computes the Kendall tau-b correlation of every column of x against every column of y.
+Only the order of the values matters, so the column ranks (computed once) are turned into integer codes and
+reused for every pair, and each pair costs O(n log n).
+Parameters:
+    x: a 2D float array of shape (rows, k).
+    y: a 2D float array of shape (rows, N).
+    same_column: a boolean (k, N) array marking pairs that are the same dataset column.
+    x_ranks: optional column ranks of x, as returned by rank_columns or dense_rank_columns.
+    y_ranks: optional column ranks of y, as returned by rank_columns or dense_rank_columns.
+Returns:
+    A tuple (correlations, counts) of (k, N) arrays.
+'''
+def kendall_block(x, y, same_column, x_ranks=None, y_ranks=None):
+    valid_x = np.isfinite(x)
+    valid_y = np.isfinite(y)
+    correlations = np.empty((x.shape[1], y.shape[1]))
+    counts = np.empty((x.shape[1], y.shape[1]))
+
+    # Average ranks are multiples of one half, so doubling them gives exact integer codes
+    if njit is not None:
+        x_ranks = dense_rank_columns(x) if x_ranks is None else x_ranks
+        y_ranks = dense_rank_columns(y) if y_ranks is None else y_ranks
+        x_codes = np.where(valid_x, 2 * x_ranks, 0).astype(np.int64)
+        y_codes = np.where(valid_y, 2 * y_ranks, 0).astype(np.int64)
+
+    for i in range(x.shape[1]):
+        for j in range(y.shape[1]):
+            shared = valid_x[:, i] & valid_y[:, j]
+            counts[i, j] = shared.sum()
+            if counts[i, j] < 1:
+                correlations[i, j] = np.nan
+            elif same_column[i, j]:
+                # A column always has a Kendall correlation of 1 with itself
+                correlations[i, j] = 1.0
+            elif njit is not None:
+                if shared.all():
+                    correlations[i, j] = _kendall_tau_b(x_codes[:, i], y_codes[:, j])
+                else:
+                    correlations[i, j] = _kendall_tau_b(x_codes[shared, i], y_codes[shared, j])
+            else:
+                correlations[i, j] = kendalltau(x[shared, i], y[shared, j])[0]
+    return correlations, counts
+
+'''
+Computes the k x N block of correlations between the sensitive variables and all columns of a dataframe.
+Parameters:
+    df: a dataframe containing the dataset to be analyzed.
+    sensitive_variables: list of variables to correlate with every column.
+    method: one of 'pearson', 'spearman' or 'kendall'.
+    matrix: optional float matrix of df, to avoid converting it again.
+    ranks: optional column ranks of matrix, to avoid ranking it again for Spearman and Kendall.
+Returns:
+    A tuple (correlations, counts) of (k, N) arrays in the order of sensitive_variables and df.columns.
+'''
+def corr_block(df, sensitive_variables, method, matrix=None, ranks=None):
+    if method not in CORR_METHODS:
+        raise ValueError(f"method must be one of {CORR_METHODS}, '{method}' was supplied")
+
+    matrix = to_float_matrix(df) if matrix is None else matrix
+    positions = [df.columns.get_loc(var) for var in sensitive_variables]
+
+    if method == 'pearson':
+        return pearson_block(matrix[:, positions], matrix)
+    if method == 'spearman':
+        ranks = rank_columns(matrix) if ranks is None else ranks
+        return spearman_block(matrix[:, positions], matrix, ranks[:, positions], ranks)
+    same_column = np.arange(matrix.shape[1])[None, :] == np.array(positions)[:, None]
+    if ranks is None and njit is not None:
+        ranks = dense_rank_columns(matrix)
+    if ranks is None:
+        return kendall_block(matrix[:, positions], matrix, same_column)
+    return kendall_block(matrix[:, positions], matrix, same_column, ranks[:, positions], ranks)
+
+'''
+Copies a matrix into a new shared memory block in column-major order, so that column tiles are contiguous.
+Parameters:
+    matrix: a 2D float array.
+Returns:
+    The SharedMemory object, which the caller closes and unlinks.
+'''
+def share_matrix(matrix):
+    memory = shared_memory.SharedMemory(create=True, size=max(matrix.nbytes, 1))
+    np.ndarray(matrix.shape, dtype=float, buffer=memory.buf, order='F')[:] = matrix
+    return memory
+
+'''
+Computes the correlation blocks of one column tile in a worker process, reading the data from shared memory.
+Parameters:
+    matrix_name: the name of the shared memory block holding the data matrix.
+    shape: the shape of the data matrix.
+    sensitive_name: the name of the shared memory block holding the sensitive columns, followed by their
+        average ranks and their dense ranks.
+    positions: the positions of the sensitive variables in the data matrix.
+    start: the first column of the tile.
+    stop: the column after the last column of the tile.
+    methods: the correlation methods to compute.
+Returns:
+    A tuple (start, blocks) where blocks maps each method to the (correlations, counts) of the tile.
+'''
+def _corr_tile(matrix_name, shape, sensitive_name, positions, start, stop, methods):
+    matrix_memory = shared_memory.SharedMemory(name=matrix_name)
+    sensitive_memory = shared_memory.SharedMemory(name=sensitive_name)
+    try:
+        k = len(positions)
+        matrix = np.ndarray(shape, dtype=float, buffer=matrix_memory.buf, order='F')
+        sensitive = np.ndarray((shape[0], 3 * k), dtype=float, buffer=sensitive_memory.buf, order='F')
+        x = sensitive[:, :k]
+        y = matrix[:, start:stop]
+
+        # The columns of the tile are ranked here, so ranking is spread over the workers as well
+        blocks = {}
+        if 'pearson' in methods:
+            blocks['pearson'] = pearson_block(x, y)
+        if 'spearman' in methods:
+            blocks['spearman'] = spearman_block(x, y, sensitive[:, k:2 * k], rank_columns(y))
+        if 'kendall' in methods:
+            same_column = np.arange(start, stop)[None, :] == np.array(positions)[:, None]
+            if njit is None:
+                blocks['kendall'] = kendall_block(x, y, same_column)
+            else:
+                blocks['kendall'] = kendall_block(x, y, same_column, sensitive[:, 2 * k:], dense_rank_columns(y))
+
+        # Views of the shared buffers have to be released before the buffers are closed
+        del matrix, sensitive, x, y
+        return start, blocks
+    finally:
+        matrix_memory.close()
+        sensitive_memory.close()
+
+'''
+Computes the k x N blocks of correlations of several methods by splitting the columns into tiles that a process pool
+computes in parallel. The data matrix is placed in shared memory once instead of being copied to every worker, and
+only the rows of the sensitive variables are assembled.
+Parameters:
+    df: a dataframe containing the dataset to be analyzed.
+    sensitive_variables: list of variables to correlate with every column.
+    methods: the correlation methods to compute.
+    workers: the number of worker processes. Defaults to the CPUs granted by the resource governor, or PARALLEL_WORKERS.
+    tile_columns: the number of columns per tile.
+Returns:
+    A dictionary mapping each method to a tuple (correlations, counts) of (k, N) arrays, as returned by corr_block.
+'''
+def corr_blocks_tiled(df, sensitive_variables, methods=CORR_METHODS, workers=None, tile_columns=TILE_COLUMNS):
+    for method in methods:
+        if method not in CORR_METHODS:
+            raise ValueError(f"method must be one of {CORR_METHODS}, '{method}' was supplied")
+
+    matrix = to_float_matrix(df)
+    positions = [df.columns.get_loc(var) for var in sensitive_variables]
+
+    # The sensitive columns are sent with both kinds of ranks, so every worker reuses them
+    x = matrix[:, positions]
+    sensitive = np.hstack([x, rank_columns(x), dense_rank_columns(x)])
+
+    shape = (len(positions), matrix.shape[1])
+    results = {method: (np.empty(shape), np.empty(shape)) for method in methods}
+
+    matrix_memory = share_matrix(matrix)
+    sensitive_memory = share_matrix(sensitive)
+    try:
+        with ProcessPoolExecutor(max_workers=workers or job_cpus(PARALLEL_WORKERS), mp_context=worker_context()) as pool:
+            tasks = [pool.submit(_corr_tile, matrix_memory.name, matrix.shape, sensitive_memory.name, positions,
+                                 start, min(start + tile_columns, matrix.shape[1]), list(methods))
+                     for start in range(0, matrix.shape[1], tile_columns)]
+
+            # Assemble the tiles into the rows of the sensitive variables
+            for task in tasks:
+                start, blocks = task.result()
+                for method, (block, counts) in blocks.items():
+                    results[method][0][:, start:start + block.shape[1]] = block
+                    results[method][1][:, start:start + block.shape[1]] = counts
+    finally:
+        matrix_memory.close()
+        matrix_memory.unlink()
+        sensitive_memory.close()
+        sensitive_memory.unlink()
+    return results
+
+'''
+Formats a block of correlations, rounding values and handling NaN values in one vectorized step.
+Parameters:
+    block: a (k, N) array of correlations.
+    sensitive_variables: the row labels of the block.
+    columns: the column labels of the block.
+    decimals: the number of decimal places to round to, or None to keep full precision.
+    layout: 'nested' or 'columnar', see ResultMatrix.
+Returns:
+    In the nested layout, a dictionary where the keys are sensitive variables and the values are dictionaries of
+    correlation values. In the columnar layout, a dictionary with the 'rows', 'columns' and 'values' of the block.
+'''
+def format_block(block, sensitive_variables, columns, decimals=CORR_DECIMALS, layout='nested'):
+    return ResultMatrix(block, sensitive_variables, columns, decimals).to_layout(layout)
+
+'''
+Computes the tie terms of every column that enter the variance of Kendall's statistic.
+Parameters:
+    matrix: a 2D float array.
+Returns:
+    A (3, N) array holding, per column, the sums of t(t-1)/2, t(t-1)(t-2) and t(t-1)(2t+5) over groups of t tied values.
+'''
+def kendall_tie_terms(matrix):
+    terms = np.zeros((3, matrix.shape[1]))
+    for j in range(matrix.shape[1]):
+        column = matrix[:, j]
+        ties = np.unique(column[np.isfinite(column)], return_counts=True)[1].astype(float)
+        terms[0, j] = (ties * (ties - 1) / 2).sum()
+        terms[1, j] = (ties * (ties - 1) * (ties - 2)).sum()
+        terms[2, j] = (ties * (ties - 1) * (2 * ties + 5)).sum()
+    return terms
+
+'''
+Computes two-sided p-values for a whole block of correlation coefficients at once.
+Pearson and Spearman use the t distribution with n - 2 degrees of freedom, Kendall uses the normal approximation
+of tau under independence, corrected for ties when the tie terms are given.
+Parameters:
+    block: a (k, N) array of correlations.
+    counts: a (k, N) array of the number of observations behind each correlation.
+    method: one of 'pearson', 'spearman' or 'kendall'.
+    ties: optional tuple (row_terms, column_terms) from kendall_tie_terms for the rows and columns of the block.
+        The terms describe whole columns, so they are exact for pairs without missing values.
+Returns:
+    A (k, N) array of p-values, NaN where the coefficient is undefined or there are too few observations.
+'''
+def corr_p_values(block, counts, method, ties=None):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if method == 'kendall' and ties is None:
+            statistic = 3 * block * np.sqrt(counts * (counts - 1)) / np.sqrt(2 * (2 * counts + 5))
+            p_values = 2 * norm.sf(np.abs(statistic))
+        elif method == 'kendall':
+            row_terms, column_terms = ties[0][:, :, None], ties[1][:, None, :]
+            pairs = counts * (counts - 1)
+            # Concordant minus discordant pairs, recovered from tau-b
+            difference = block * np.sqrt((pairs / 2 - row_terms[0]) * (pairs / 2 - column_terms[0]))
+            variance = ((pairs * (2 * counts + 5) - row_terms[2] - column_terms[2]) / 18
+                        + 2 * row_terms[0] * column_terms[0] / pairs
+                        + row_terms[1] * column_terms[1] / (9 * pairs * (counts - 2)))
+            p_values = 2 * norm.sf(np.abs(difference) / np.sqrt(variance))
+        else:
+            freedom = counts - 2
+            statistic = block * np.sqrt(freedom / np.maximum(1 - block ** 2, 0))
+            p_values = 2 * t.sf(np.abs(statistic), np.maximum(freedom, 1))
+    return np.where(np.isfinite(block) & (counts > 2), p_values, np.nan)
+
+'''
+Adjusts p-values for multiple comparisons with the Benjamini-Hochberg procedure, treating every defined p-value
+of the array as one test.
+Parameters:
+    p_values: an array of p-values, where NaN marks pairs that are not tested.
+Returns:
+    An array of the same shape holding the adjusted p-values.
+'''
+def benjamini_hochberg(p_values):
+    adjusted = np.full(p_values.shape, np.nan)
+    tested = np.isfinite(p_values)
+    values = p_values[tested]
+    if values.size == 0:
+        return adjusted
+
+    # Scale the sorted p-values by m / rank, then enforce monotonicity from the largest down
+    order = np.argsort(values)
+    scaled = values[order] * values.size / np.arange(1, values.size + 1)
+    scaled = np.minimum.accumulate(scaled[::-1])[::-1]
+    corrected = np.empty_like(values)
+    corrected[order] = np.minimum(scaled, 1)
+    adjusted[tested] = corrected
+    return adjusted
 
 '''
 Computes correlation between sensitive variables and other variables in the dataset using the Correlation Analysis algorithm.
 Parameters:
     sensitive_variables: list of variables to analyze for redundancy.
     data: a dataframe containing the dataset to be analyzed.
+    columns: optional list of columns to correlate the sensitive variables with. Defaults to all columns.
+    statistics: optional PearsonAccumulator over all columns of data. When given, Pearson correlations are read from it
+        instead of being computed from the rows.
+    significance: when True, the results also hold 'p_values' and Benjamini-Hochberg 'p_adjusted' values per method.
+        A variable is not tested against itself.
+    layout: 'nested' (default) or 'columnar'. The columnar layout gives every method its 'rows', 'columns' and
+        'values' lists instead of nested dictionaries.
 Returns:
     A dictionary where the keys are sensitive variables and the values are dictionaries of correlation values with respect to other variables.
 '''
-def compute_corr(sensitive_variables, data):
+def compute_corr(sensitive_variables, data, columns=None, statistics=None, significance=False, layout='nested'):
     
     # Check if sensitive variables and data are provided
     if(sensitive_variables is None):
         raise ValueError("Sensitive Variables needed for Correlation Analysis")
     if(data is None):
         raise ValueError("Data needed for Correlation Analysis")
+    check_layout(layout)
     
     # Input data as a DataFrame
     df = pd.DataFrame(data)
@@ -35,24 +609,164 @@ def compute_corr(sensitive_variables, data):
     missing_vars = [var for var in sensitive_variables if var not in df.columns]
     if missing_vars:
         raise ValueError(f"Sensitive variable(s) {missing_vars} not found in the data columns for Correlation Analysis")
+
+    # Restrict the data to the requested columns and the sensitive variables
+    if columns is not None:
+        missing_cols = [col for col in columns if col not in df.columns]
+        if missing_cols:
+            raise ValueError(f"Column(s) {missing_cols} not found in the data columns for Correlation Analysis")
+        df = df[[col for col in df.columns if col in columns or col in sensitive_variables]]
     
     # Correlation results for each method
     results = {}
-    # Correlation methods to be used
-    methods = ['pearson', 'spearman', 'kendall']
+    p_values = {}
+    p_adjusted = {}
+    # Float matrix and column ranks, shared by all methods
+    matrix = None
+    ranks = None
+    # Pairs of a sensitive variable with itself, which are not tested for significance
+    same_column = np.array([[col == sens for col in df.columns] for sens in sensitive_variables], dtype=bool)
+
+    # Very wide datasets are computed in parallel column tiles. Without shared memory or worker processes they fall
+    # back to the serial engine, any other failure is an error
+    tiled = {}
+    if len(df.columns) >= PARALLEL_MIN_COLUMNS:
+        try:
+            tiled = corr_blocks_tiled(df, sensitive_variables, [method for method in CORR_METHODS if method != 'pearson' or statistics is None])
+        except (OSError, BrokenProcessPool) as e:
+            logger.warning("Tiled correlation engine unavailable, falling back to the serial engine: %s", e)
+            tiled = {}
     
-    # Iterate over each correlation method and compute the correlation matrix
-    for method in methods:
+    # Iterate over each correlation method and compute the sensitive rows of the correlation matrix
+    for method in CORR_METHODS:
         try:
-            # Compute the correlation matrix using the specified method
-            correlation_matrix = df.corr(method=method)
-            # Extract and store correlations for the specified sensitive variables
-            results[method] = correlation_matrix[sensitive_variables].to_dict()
+            if method == 'pearson' and statistics is not None:
+                block, counts = statistics.correlation(sensitive_variables, df.columns)
+            elif method in tiled:
+                block, counts = tiled[method]
+            else:
+                if matrix is None:
+                    matrix = to_float_matrix(df)
+                if method != 'pearson' and ranks is None:
+                    ranks = rank_columns(matrix)
+                block, counts = corr_block(df, sensitive_variables, method, matrix=matrix, ranks=ranks)
             
             # Format the correlation values to 3 decimal places and handle NaN values
-            for item in results[method]:
-                results[method] = {sens: {col: "NaN" if np.isnan(float(val2)) else round(float(val2), 3) for col, val2 in val.items()} for sens, val in results[method].items()}
+            results[method] = format_block(block, sensitive_variables, df.columns, layout=layout)
+
+            # P-values of the whole block, reusing the coefficients and observation counts
+            if significance:
+                ties = None
+                if method == 'kendall':
+                    if matrix is None:
+                        matrix = to_float_matrix(df)
+                    terms = kendall_tie_terms(matrix)
+                    ties = (terms[:, [df.columns.get_loc(var) for var in sensitive_variables]], terms)
+                p_block = np.where(same_column, np.nan, corr_p_values(block, counts, method, ties))
+                p_values[method] = format_block(p_block, sensitive_variables, df.columns, decimals=None, layout=layout)
+                p_adjusted[method] = format_block(benjamini_hochberg(p_block), sensitive_variables, df.columns, decimals=None, layout=layout)
         except Exception as e:
             results[method] = str(e)
+            if significance:
+                p_values[method] = p_adjusted[method] = str(e)
+
+    if significance:
+        results['p_values'] = p_values
+        results['p_adjusted'] = p_adjusted
     
     return results
+
+'''
+Computes Fisher-z confidence intervals for a block of correlation coefficients.
+Parameters:
+    block: a (k, N) array of correlations.
+    counts: a (k, N) array of the number of observations behind each correlation.
+    method: one of 'pearson', 'spearman' or 'kendall'.
+    confidence: the confidence level of the intervals.
+Returns:
+    A tuple (lower, upper) of (k, N) arrays. Pairs with too few observations get the interval [-1, 1].
+'''
+def fisher_interval(block, counts, method, confidence):
+    factor, lost = FISHER_VARIANCE[method]
+    critical = norm.ppf((1 + confidence) / 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        half_width = critical * np.sqrt(factor / (counts - lost))
+        z = np.arctanh(np.clip(block, -1, 1))
+        lower = np.where(counts > lost, np.tanh(z - half_width), -1.0)
+        upper = np.where(counts > lost, np.tanh(z + half_width), 1.0)
+    return lower, upper
+
+'''
+Approximates correlation between sensitive variables and other variables on a random sample of the rows.
+The sample starts at APPROX_INITIAL_ROWS rows and grows by APPROX_GROWTH until the confidence interval of every
+sensitive-vs-column pair is at most epsilon wide, or until it holds every row. Each larger sample contains the previous one.
+Parameters:
+    sensitive_variables: list of variables to analyze for redundancy.
+    data: a dataframe containing the dataset to be analyzed.
+    epsilon: the largest accepted width of a confidence interval.
+    confidence: the confidence level of the intervals.
+    seed: the random seed for sampling.
+    layout: 'nested' (default) or 'columnar'.
+Returns:
+    A tuple (results, sample_size). In the nested layout results has the layout of compute_corr, but every value is a
+    dictionary with the 'estimate', 'lower' and 'upper' bounds of the correlation. In the columnar layout every method
+    holds one columnar block per bound instead. sample_size is the number of rows used.
+'''
+def compute_corr_approx(sensitive_variables, data, epsilon=0.05, confidence=0.95, seed=0, layout='nested'):
+
+    # Check if sensitive variables and data are provided
+    if(sensitive_variables is None):
+        raise ValueError("Sensitive Variables needed for Correlation Analysis")
+    if(data is None):
+        raise ValueError("Data needed for Correlation Analysis")
+    if epsilon <= 0 or not 0 < confidence < 1:
+        raise ValueError("Epsilon must be positive and confidence must be between 0 and 1 for Correlation Analysis")
+    check_layout(layout)
+
+    # Input data as a DataFrame
+    df = pd.DataFrame(data)
+
+    # Check if all sensitive variables exist in the data columns
+    missing_vars = [var for var in sensitive_variables if var not in df.columns]
+    if missing_vars:
+        raise ValueError(f"Sensitive variable(s) {missing_vars} not found in the data columns for Correlation Analysis")
+
+    # A single random order of the rows, so every sample is a prefix of it
+    order = np.random.default_rng(None if seed < 0 else seed).permutation(len(df))
+    sample_size = min(APPROX_INITIAL_ROWS, len(df))
+
+    while True:
+        sample = df.iloc[order[:sample_size]]
+        matrix = to_float_matrix(sample)
+        ranks = rank_columns(matrix)
+
+        # Estimates and intervals of every method on the current sample
+        intervals = {}
+        widest = 0.0
+        for method in CORR_METHODS:
+            block, counts = corr_block(sample, sensitive_variables, method, matrix=matrix, ranks=ranks)
+            lower, upper = fisher_interval(block, counts, method, confidence)
+            intervals[method] = (block, lower, upper)
+            widths = (upper - lower)[np.isfinite(block)]
+            if widths.size:
+                widest = max(widest, widths.max())
+
+        # Stop once every interval is narrow enough or the sample holds every row
+        if widest <= epsilon or sample_size == len(df):
+            break
+        sample_size = min(sample_size * APPROX_GROWTH, len(df))
+
+    # Format the estimates and bounds to 3 decimal places and handle NaN values
+    results = {}
+    for method, (block, lower, upper) in intervals.items():
+        if layout == 'columnar':
+            results[method] = {name: format_block(bound, sensitive_variables, df.columns, layout=layout)
+                               for name, bound in zip(['estimate', 'lower', 'upper'], [block, lower, upper])}
+            continue
+        estimates = format_block(block, sensitive_variables, df.columns)
+        lower_bounds = format_block(lower, sensitive_variables, df.columns)
+        upper_bounds = format_block(upper, sensitive_variables, df.columns)
+        results[method] = {sens: {col: {'estimate': estimates[sens][col], 'lower': lower_bounds[sens][col], 'upper': upper_bounds[sens][col]}
+                                  for col in df.columns} for sens in sensitive_variables}
+
+    return results, sample_size
@@ -0,0 +1,199 @@
+'''
+corr_stream.py
+This program implements out-of-core Pearson correlation analysis for datasets that do not fit in memory.
+
+Key Features:
+    - Reads the dataset in chunks and accumulates sufficient statistics (counts, sums, sums of squares and
+      cross-products) over pairwise-complete observations, so memory is bounded by the chunk size.
+    - Accumulators can be merged, so chunks can be processed in any order and in separate processes.
+    - Sums are kept relative to a per-column shift taken from the first chunk, which keeps them close to
+      centered and avoids the cancellation of raw moment sums.
+'''
+
+
+import pandas as pd
+import numpy as np
+
+# The algorithms are imported as a package by the tests and from the algorithms directory by api.py
+try:
+    from algorithms.result_matrix import ResultMatrix, check_layout
+except ImportError:
+    from result_matrix import ResultMatrix, check_layout
+
+# Default number of rows read per chunk
+CHUNK_ROWS = 100000
+# Number of decimal places the correlation values are rounded to
+CORR_DECIMALS = 3
+
+'''
+Accumulates the sufficient statistics for Pearson correlations between a set of row variables and a set of columns.
+Parameters:
+    columns: the columns of the dataset.
+    sensitive_variables: the row variables of the correlation block. Defaults to all columns, giving the full matrix.
+'''
+class PearsonAccumulator:
+
+    def __init__(self, columns, sensitive_variables=None):
+        self.columns = list(columns)
+        self.rows = self.columns if sensitive_variables is None else list(sensitive_variables)
+
+        # Positions of the labels, for constant-time lookups
+        self.column_index = {col: position for position, col in enumerate(self.columns)}
+
+        missing_vars = [var for var in self.rows if var not in self.column_index]
+        if missing_vars:
+            raise ValueError(f"Sensitive variable(s) {missing_vars} not found in the data columns for Correlation Analysis")
+
+        self.row_index = {var: position for position, var in enumerate(self.rows)}
+        self.row_positions = [self.column_index[var] for var in self.rows]
+        shape = (len(self.rows), len(self.columns))
+
+        # Per-column values subtracted before accumulating, set by the first chunk
+        self.shift = None
+        # Number of pairwise-complete observations
+        self.count = np.zeros(shape)
+        # Sums of the row variable and of the column over pairwise-complete observations
+        self.sum_x = np.zeros(shape)
+        self.sum_y = np.zeros(shape)
+        # Sums of squares and cross-products over pairwise-complete observations
+        self.sum_xx = np.zeros(shape)
+        self.sum_yy = np.zeros(shape)
+        self.sum_xy = np.zeros(shape)
+
+    '''
+    Adds a chunk of rows to the statistics.
+    Parameters:
+        chunk: a dataframe holding at least the accumulator's columns.
+    Returns:
+        The accumulator, so calls can be chained.
+    '''
+    def update(self, chunk):
+        matrix = pd.DataFrame(chunk)[self.columns].to_numpy(dtype=float, na_value=np.nan)
+        valid = np.isfinite(matrix)
+
+        if self.shift is None:
+            # Column means of the first chunk, or zero for columns without any value yet
+            with np.errstate(invalid='ignore', divide='ignore'):
+                shift = np.where(valid, matrix, 0.0).sum(axis=0) / valid.sum(axis=0)
+            self.shift = np.where(np.isfinite(shift), shift, 0.0)
+
+        shifted = np.where(valid, matrix - self.shift, 0.0)
+        row_shifted = shifted[:, self.row_positions]
+
+        # Without missing values only the cross-products need a matrix product, the rest are column sums
+        if valid.all():
+            sums = shifted.sum(axis=0)
+            squares = (shifted ** 2).sum(axis=0)
+            self.count += len(matrix)
+            self.sum_x += sums[self.row_positions][:, None]
+            self.sum_y += sums[None, :]
+            self.sum_xx += squares[self.row_positions][:, None]
+            self.sum_yy += squares[None, :]
+            self.sum_xy += row_shifted.T @ shifted
+            return self
+
+        mask = valid.astype(float)
+        row_mask = mask[:, self.row_positions]
+
+        # Every statistic is a masked matrix product, so a chunk costs O(rows * k * N)
+        self.count += row_mask.T @ mask
+        self.sum_x += row_shifted.T @ mask
+        self.sum_y += row_mask.T @ shifted
+        self.sum_xx += (row_shifted ** 2).T @ mask
+        self.sum_yy += row_mask.T @ (shifted ** 2)
+        self.sum_xy += row_shifted.T @ shifted
+        return self
+
+    '''
+    Adds the statistics of another accumulator over the same columns, for example one filled by another process.
+    Parameters:
+        other: a PearsonAccumulator with the same columns and row variables.
+    Returns:
+        The accumulator, so calls can be chained.
+    '''
+    def merge(self, other):
+        if other.columns != self.columns or other.rows != self.rows:
+            raise ValueError("Only accumulators over the same columns and sensitive variables can be merged")
+        if other.shift is None:
+            return self
+        if self.shift is None:
+            self.shift = other.shift.copy()
+
+        # Move the other statistics onto this accumulator's shift before adding them
+        delta_y = (other.shift - self.shift)[None, :]
+        delta_x = (other.shift - self.shift)[self.row_positions][:, None]
+        count = other.count
+        self.count += count
+        self.sum_xx += other.sum_xx + 2 * delta_x * other.sum_x + count * delta_x ** 2
+        self.sum_yy += other.sum_yy + 2 * delta_y * other.sum_y + count * delta_y ** 2
+        self.sum_xy += other.sum_xy + delta_y * other.sum_x + delta_x * other.sum_y + count * delta_x * delta_y
+        self.sum_x += other.sum_x + count * delta_x
+        self.sum_y += other.sum_y + count * delta_y
+        return self
+
+    '''
+    Computes Pearson correlations from the accumulated statistics, without touching any rows.
+    Parameters:
+        sensitive_variables: the row variables to return. Defaults to all row variables.
+        columns: the columns to return. Defaults to all columns.
+    Returns:
+        A tuple (correlations, counts) of arrays of shape (len(sensitive_variables), len(columns)).
+    '''
+    def correlation(self, sensitive_variables=None, columns=None):
+        sensitive_variables = self.rows if sensitive_variables is None else list(sensitive_variables)
+        columns = self.columns if columns is None else list(columns)
+
+        missing_vars = [var for var in sensitive_variables if var not in self.row_index]
+        if missing_vars:
+            raise ValueError(f"Sensitive variable(s) {missing_vars} not found in the data columns for Correlation Analysis")
+        missing_cols = [col for col in columns if col not in self.column_index]
+        if missing_cols:
+            raise ValueError(f"Column(s) {missing_cols} not found in the data columns for Correlation Analysis")
+
+        rows = [self.row_index[var] for var in sensitive_variables]
+        cols = [self.column_index[col] for col in columns]
+        index = np.ix_(rows, cols)
+        count = self.count[index]
+        sum_x = self.sum_x[index]
+        sum_y = self.sum_y[index]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = self.sum_xy[index] - sum_x * sum_y / count
+            variance_x = np.maximum(self.sum_xx[index] - sum_x ** 2 / count, 0)
+            variance_y = np.maximum(self.sum_yy[index] - sum_y ** 2 / count, 0)
+            divisor = np.sqrt(variance_x * variance_y)
+            correlations = np.where(divisor > 0, covariance / divisor, np.nan)
+        return np.clip(correlations, -1, 1), count
+
+'''
+Computes Pearson correlation between sensitive variables and all other variables, reading the dataset one chunk at a time.
+Parameters:
+    sensitive_variables: list of variables to analyze for redundancy.
+    chunks: an iterable of dataframes with the same columns, for example from pd.read_csv(..., chunksize=CHUNK_ROWS).
+    layout: 'nested' (default) or 'columnar', see ResultMatrix.
+Returns:
+    A dictionary with a 'pearson' key, holding a dictionary where the keys are sensitive variables and the values are
+    dictionaries of correlation values with respect to other variables.
+'''
+def compute_corr_chunked(sensitive_variables, chunks, layout='nested'):
+
+    # Check if sensitive variables and data are provided
+    if(sensitive_variables is None):
+        raise ValueError("Sensitive Variables needed for Correlation Analysis")
+    if(chunks is None):
+        raise ValueError("Data needed for Correlation Analysis")
+    check_layout(layout)
+
+    # The accumulator is created from the columns of the first chunk
+    accumulator = None
+    for chunk in chunks:
+        if accumulator is None:
+            accumulator = PearsonAccumulator(chunk.columns, sensitive_variables)
+        accumulator.update(chunk)
+
+    if accumulator is None:
+        raise ValueError("Data needed for Correlation Analysis")
+
+    # Format the correlation values to 3 decimal places and handle NaN values
+    correlations, _ = accumulator.correlation()
+    return {'pearson': ResultMatrix(correlations, accumulator.rows, accumulator.columns, CORR_DECIMALS).to_layout(layout)}
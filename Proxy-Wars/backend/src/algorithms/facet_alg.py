@@ -1,23 +1,72 @@
 '''
 facet_alg.py
 This program implements the FACET algorithm to compute redundancy between sensitive variables and other variables 
-in a dataset using a Random Forest model. The process involves building predictive models to evaluate how much 
+in a dataset using a Random Forest model (or a cheaper surrogate learner). The process involves building predictive models to evaluate how much 
 information in other variables overlaps with the sensitive variables.
 
 Key functionalities:
-- Defines a configurable Random Forest regressor pipeline with hyperparameter tuning.
-- Utilizes cross-validation with repeated K-fold to optimize the model parameters using GridSearchCV.
+- Defines a configurable Random Forest regressor pipeline with hyperparameter tuning, with shallow Extra Trees and
+  histogram-based gradient boosting as cheaper alternatives. Shallower trees also make the SHAP interaction values
+  behind the redundancy matrix cheaper to compute.
+- Utilizes cross-validation with repeated K-fold to optimize the model parameters using GridSearchCV, or with
+  successive halving (HalvingGridSearchCV), which scores every candidate on a small subset of the rows first and only
+  keeps the best third of the candidates for each larger subset.
 - Computes a redundancy matrix that quantifies the redundancy between sensitive variables and other features.
+- Keeps the fitted selector, inspector and full redundancy matrix of the most recent datasets, so changing only the
+  sensitive variables re-slices the matrix instead of refitting.
+- Optionally trains on all rows but computes the SHAP values for a stratified subsample of the rows only, of a fixed
+  size or grown until the redundancy is stable. The error of the redundancy values is estimated by bootstrapping the
+  explained rows, which reweights their SHAP values instead of recomputing them.
+- Optionally computes the redundancy of the pairs involving the sensitive variables only, straight from the SHAP
+  interaction values, so that the projection behind the redundancy costs k x N instead of N x N feature pairs.
+- Optionally approximates the redundancy by FACET's association, which only needs plain SHAP vectors instead of the
+  far more expensive SHAP interaction values. Association is the share of a feature's SHAP vector explained by the
+  other feature's, which FACET describes as an upper bound of redundancy as it also counts their synergy.
+- Optionally returns FACET's synergy and association matrices as well, computed from the same inspector fit as the
+  redundancy matrix.
+- Sweeps the redundancy over copies of the dataset with one column left out each, fitting the copies in parallel
+  worker processes that split the CPUs of the job between them.
+- Computes the redundancy for several target variables in one batch, fitting the targets in the same worker processes.
+- Predicts the wall time and peak memory of a run from a cost model calibrated on past runs, and plans cheaper runs
+  (fewer cross-validation repeats, fewer hyperparameter candidates, fewer explained or training rows) that meet a
+  latency budget.
+- Memoizes the winning hyperparameters per dataset and target, so that later runs on samples or subsets of the same
+  dataset fit only the memoized best candidate, or it and its neighbouring values, instead of searching the whole grid.
+- Converts the features to one contiguous array of the dtype the learner fits on once per job, and hands it to the
+  joblib workers of the model selection and the inspector as a memory map of a single shared copy instead of pickling
+  a copy for every cross-validation fit.
+- Formats the redundancy values vectorized through ResultMatrix, as nested dictionaries or in a compact columnar layout.
 '''
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
+from joblib import parallel_config
 from sklearndf.pipeline import RegressorPipelineDF
-from sklearndf.regression import RandomForestRegressorDF
-from sklearn.model_selection import RepeatedKFold, GridSearchCV
+from sklearndf.regression import RandomForestRegressorDF, ExtraTreesRegressorDF, HistGradientBoostingRegressorDF
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401, enables HalvingGridSearchCV
+from sklearn.model_selection import RepeatedKFold, GridSearchCV, HalvingGridSearchCV
 from facet.data import Sample
 from facet.selection import LearnerSelector, ParameterSpace
 from facet.inspection import LearnerInspector
 
+# The algorithms are imported as a package by the tests and from the algorithms directory by api.py
+try:
+    from algorithms.result_matrix import ResultMatrix, check_layout
+    from algorithms.facet_cost import CostModel, selection_fits, selection_work, inspector_work, peak_memory
+except ImportError:
+    from result_matrix import ResultMatrix, check_layout
+    from facet_cost import CostModel, selection_fits, selection_work, inspector_work, peak_memory
+try:
+    from util.result_cache import fingerprint_dataframe
+    from util.resource_governor import job_cpus, granted_cpus, worker_context
+except ImportError:
+    from result_cache import fingerprint_dataframe
+    from resource_governor import job_cpus, granted_cpus, worker_context
+
 # Configurable variables
 # Number of estimators for Random Forest
 REGRESSOR_ESTIMATOR_COUNT = 50
@@ -25,26 +74,827 @@ REGRESSOR_ESTIMATOR_COUNT = 50
 KFOLD_SPLITS = 3
 # Number of times cross-validation is repeated
 KFOLD_REPEATS = 5
-# Number of parallel jobs for the learner selector
+# Number of parallel jobs for the learner selector, unless the resource governor grants fewer CPUs
 LEARNER_SELECTOR_JOBS = -1
+# Number of parallel jobs for the inspector, unless the resource governor grants fewer CPUs
+INSPECTOR_JOBS = -3
 # Minimum samples required at leaf node
 REGRESSOR_MIN_SAMPLES_LEAF = [11, 15]
 # Maximum depth of trees in the Random Forest
 REGRESSOR_MAX_DEPTH = [5, 6]
 # Seed for reproducibility
 RANDOM_STATE = 0
+# Number of decimal places the redundancy percentages are rounded to
+REDUNDANCY_DECIMALS = 5
+# Hyperparameter search strategies: exhaustive grid search or successive halving over rows
+SEARCH_STRATEGIES = ['grid', 'halving']
+# Factor by which successive halving divides the candidates and multiplies the rows in each round
+HALVING_FACTOR = 3
+# Fewest rows for successive halving, which needs two rows per fold in its first round and at least two rounds
+HALVING_MIN_ROWS = 2 * KFOLD_SPLITS * KFOLD_REPEATS * HALVING_FACTOR
+# Minimum samples at a leaf node as fractions of the rows, used by successive halving so that leaves scale with its subsets
+HALVING_MIN_SAMPLES_LEAF = [.05, .06, .07]
+# Surrogate learners whose redundancy FACET can compute
+LEARNERS = ['random_forest', 'extra_trees', 'hist_gradient_boosting']
+# Maximum depths of the shallow Extra Trees
+EXTRA_TREES_MAX_DEPTH = [4, 6, 8]
+# Maximum depths of the histogram-based gradient boosting trees
+BOOSTING_MAX_DEPTH = [3, 4, 6]
+# Learning rates of histogram-based gradient boosting
+BOOSTING_LEARNING_RATE = [.05, .1, .2]
+# Number of boosting iterations
+BOOSTING_ITERATIONS = 100
+# First number of rows explained by the adaptive subsample, doubled until the redundancy error is within tolerance
+EXPLAIN_MIN_ROWS = 500
+# Largest mean bootstrap error, in percentage points, of the redundancy values of the adaptive subsample
+EXPLAIN_TOLERANCE = 1.0
+# Number of target quantile strata the explained rows are drawn from
+EXPLAIN_STRATA = 10
+# Number of bootstrap resamples of the explained rows
+BOOTSTRAP_RESAMPLES = 30
+# Redundancy modes: exact redundancy from SHAP interaction values, or association from plain SHAP vectors
+REDUNDANCY_MODES = ['exact', 'approximate']
+# Feature pairs whose redundancy is computed: all of them, or only those involving the sensitive variables
+REDUNDANCY_PAIRS = ['all', 'sensitive']
+# Matrices FACET can return from one inspector fit. Synergy needs SHAP interaction values, so not the approximate mode
+MATRICES = ['redundancy', 'synergy', 'association']
+# Number of worker processes of a column sweep outside of a governed job
+SWEEP_WORKERS = 1
+# Label of the sweep row with no column left out
+SWEEP_BASELINE = 'none'
+# Numbers of cross-validation repeats and of candidate values per hyperparameter a latency plan tries, in order
+PLAN_REPEATS = [3, 1]
+PLAN_CANDIDATES = [2, 1]
+# Smallest number of rows a latency plan trains on
+PLAN_MIN_ROWS = EXPLAIN_MIN_ROWS
+# Dtype the features are converted to for every learner, the dtype its trees are fitted on anyway
+FEATURE_DTYPES = {'random_forest': np.float32, 'extra_trees': np.float32, 'hist_gradient_boosting': np.float64}
+# Arrays of at least this many bytes are handed to the joblib workers as memory maps instead of pickled copies
+SHARED_MEMORY_MIN_BYTES = 64 * 1024
+# Modes of the hyperparameter memo: fit the memoized best candidate only, or search it and its neighbouring values
+MEMO_MODES = ['best', 'neighbours']
+# Number of neighbouring values on each side of a memoized best value that are searched in 'neighbours' mode
+MEMO_NEIGHBOURS = 1
+# Number of times cross-validation is repeated for a single memoized candidate, whose score decides nothing
+MEMO_REPEATS = 1
+# Number of datasets and targets whose best hyperparameters are memoized
+MEMO_ENTRIES = 64
+# Number of fitted FACET models kept for reuse
+FACET_MODEL_CACHE_ENTRIES = 4
+
+# Fitted FACET models by dataset fingerprint, target, seed and fit options, the most recently used last
+fitted_models = OrderedDict()
+fitted_models_lock = threading.Lock()
+# The dataframe last fingerprinted and its fingerprint
+fingerprinted = (None, None)
+# Predicts the wall time of the FACET phases, rescaled by every fit
+cost_model = CostModel()
+# Positions of the best hyperparameter values in their grids by dataset, target and grid, the most recently used last
+hyperparameter_memo = OrderedDict()
+hyperparameter_memo_lock = threading.Lock()
 
 '''
-Function to compute redundancy between sensitive variables and other variables in the dataset using the FACET algorithm.
+Picks the hyperparameter grid of the Random Forest from the number of rows.
+Parameters:
+    rows: the number of rows of the dataset.
+    fractional_leaves: whether the minimum samples per leaf are given as fractions of the rows instead of counts.
+Returns:
+    A tuple (min_samples_leaf, max_depth) of lists of candidate values.
+'''
+def facet_grid(rows, fractional_leaves=False):
+    min_samples_leaf = [round(rows * .05),round(rows * .06),round(rows * .07) ]
+    if fractional_leaves:
+        min_samples_leaf = HALVING_MIN_SAMPLES_LEAF
+    maxDepth = []
+    if (rows < 1000):
+        maxDepth = [5, 10, 15]
+    elif (rows < 10000):
+        maxDepth = [20, 25, 30]
+    else:
+        maxDepth = [50,60,70]
+    return min_samples_leaf, maxDepth
+
+'''
+Defines the regressor pipeline of a surrogate learner and its hyperparameter grid.
+Parameters:
+    learner: one of LEARNERS.
+    rows: the number of rows of the dataset.
+    random_seed: the random seed of the learner.
+    fractional_leaves: whether the minimum samples per leaf are given as fractions of the rows instead of counts.
+Returns:
+    A tuple (pipeline, grid) where grid maps regressor parameters to lists of candidate values.
+'''
+def facet_learner(learner, rows, random_seed=RANDOM_STATE, fractional_leaves=False):
+    if learner not in LEARNERS:
+        raise ValueError(f"learner must be one of {LEARNERS}, '{learner}' was supplied for FACET")
+    min_samples_leaf, maxDepth = facet_grid(rows, fractional_leaves)
+
+    # Deep Random Forest, the reference learner
+    if learner == 'random_forest':
+        regressor = RandomForestRegressorDF(n_estimators=REGRESSOR_ESTIMATOR_COUNT, random_state=random_seed)
+        grid = {'min_samples_leaf': min_samples_leaf, 'max_depth': maxDepth}
+    # Shallow Extra Trees, which draw split thresholds at random instead of searching for them
+    elif learner == 'extra_trees':
+        regressor = ExtraTreesRegressorDF(n_estimators=REGRESSOR_ESTIMATOR_COUNT, random_state=random_seed)
+        grid = {'min_samples_leaf': min_samples_leaf, 'max_depth': EXTRA_TREES_MAX_DEPTH}
+    # Histogram-based gradient boosting, whose split search is linear in the number of bins instead of rows
+    else:
+        regressor = HistGradientBoostingRegressorDF(max_iter=BOOSTING_ITERATIONS, random_state=random_seed)
+        grid = {'max_depth': BOOSTING_MAX_DEPTH, 'learning_rate': BOOSTING_LEARNING_RATE}
+
+    return RegressorPipelineDF(regressor=regressor), grid
+
+'''
+Keeps the middle candidate values of every hyperparameter of a grid.
+Parameters:
+    grid: a dictionary mapping hyperparameters to lists of candidate values.
+    candidates: the number of values kept per hyperparameter, or None to keep them all.
+Returns:
+    The smaller grid.
+'''
+def shrink_grid(grid, candidates=None):
+    if candidates is None:
+        return grid
+    shrunk = {}
+    for name, values in grid.items():
+        start = max((len(values) - candidates) // 2, 0)
+        shrunk[name] = values[start:start + max(candidates, 1)]
+    return shrunk
+
+'''
+Keeps the values of every hyperparameter of a grid at some positions.
+Parameters:
+    grid: a dictionary mapping hyperparameters to lists of candidate values.
+    positions: a dictionary mapping every hyperparameter to the positions of the values kept, or None to keep them all.
+Returns:
+    The smaller grid.
+'''
+def narrow_grid(grid, positions=None):
+    if positions is None:
+        return grid
+    return {name: [values[position] for position in positions[name]] for name, values in grid.items()}
+
+'''
+Looks up the memoized best hyperparameters of a dataset and target.
+Parameters:
+    key: a tuple (dataset, target, learner, fractional leaves), see fitted_facet.
+    grid: the hyperparameter grid of the analyzed sample.
+    memo_mode: one of MEMO_MODES.
+Returns:
+    None when nothing is memoized, or a dictionary mapping every hyperparameter to the positions of the values to
+    search: the best one, and in 'neighbours' mode the MEMO_NEIGHBOURS values on both sides of it.
+'''
+def recall_hyperparameters(key, grid, memo_mode='best'):
+    with hyperparameter_memo_lock:
+        best = hyperparameter_memo.get(key)
+        if best is None:
+            return None
+        hyperparameter_memo.move_to_end(key)
+    neighbours = MEMO_NEIGHBOURS if memo_mode == 'neighbours' else 0
+    return {name: list(range(max(best[name] - neighbours, 0), min(best[name] + neighbours + 1, len(values))))
+            for name, values in grid.items()}
+
+'''
+Memoizes the best hyperparameters of a search, as the positions of their values in the grid. Positions carry over to
+samples of other sizes, whose grids scale with the rows.
+Parameters:
+    key: a tuple (dataset, target, learner, fractional leaves), see fitted_facet.
+    grid: the hyperparameter grid of the analyzed sample.
+    selector: the fitted LearnerSelector.
+'''
+def memoize_hyperparameters(key, grid, selector):
+    params = selector.best_estimator_.regressor.get_params()
+    best = {name: values.index(params[name]) for name, values in grid.items()}
+    with hyperparameter_memo_lock:
+        hyperparameter_memo[key] = best
+        hyperparameter_memo.move_to_end(key)
+        while len(hyperparameter_memo) > MEMO_ENTRIES:
+            hyperparameter_memo.popitem(last=False)
+
+'''
+Counts the work of both phases of a FACET run, see facet_cost.
+Parameters:
+    rows: the number of rows.
+    columns: the number of features, without the target.
+    search: the hyperparameter search strategy, see fit_facet.
+    learner: the surrogate learner, see fit_facet.
+    explain_rows: the rows the SHAP values are computed for, see fit_facet. 'auto' is counted as EXPLAIN_MIN_ROWS.
+    mode: the redundancy mode, see fit_facet.
+    repeats: the number of times cross-validation is repeated.
+    candidates: the number of candidate values of every hyperparameter, see shrink_grid.
+Returns:
+    A tuple (fitted models, selection work, inspector work, explained rows).
+'''
+def facet_work(rows, columns, search='grid', learner='random_forest', explain_rows=None, mode='exact', repeats=KFOLD_REPEATS, candidates=None):
+    halving = search == 'halving' and rows >= HALVING_MIN_ROWS
+    grid = shrink_grid(facet_learner(learner, rows, fractional_leaves=halving)[1], candidates)
+    grid_size = int(np.prod([len(values) for values in grid.values()]))
+
+    # The trees of the middle candidate stand for all of them
+    max_depth = grid['max_depth'][len(grid['max_depth']) // 2]
+    if learner == 'hist_gradient_boosting':
+        estimators = BOOSTING_ITERATIONS
+        leaves = min(2 ** max_depth, 31)
+    else:
+        estimators = REGRESSOR_ESTIMATOR_COUNT
+        min_leaf = grid['min_samples_leaf'][len(grid['min_samples_leaf']) // 2]
+        min_leaf = min_leaf * rows if min_leaf < 1 else min_leaf
+        leaves = max(min(2 ** max_depth, rows / max(min_leaf, 1)), 1)
+    depth = min(max_depth, np.log2(leaves) + 1)
+
+    if explain_rows is None:
+        explained = rows
+    else:
+        explained = min(rows, EXPLAIN_MIN_ROWS if explain_rows == 'auto' else explain_rows)
+    train_rows = rows * (KFOLD_SPLITS - 1) / KFOLD_SPLITS
+    halving_factor = HALVING_FACTOR if halving else None
+    fits = selection_fits(grid_size, KFOLD_SPLITS * repeats, halving_factor)
+    selection = selection_work(train_rows, columns, grid_size, KFOLD_SPLITS * repeats, estimators, depth, halving_factor)
+    inspection = inspector_work(explained, columns, estimators, leaves, depth, interactions=mode == 'exact')
+    return fits, selection, inspection, explained
+
+'''
+Predicts the wall time and peak memory of a FACET run before it runs, with the cost model calibrated on past runs.
+Parameters:
+    rows: the number of rows.
+    columns: the number of features, without the target.
+    search, learner, explain_rows, pairs, mode, repeats, candidates: the FACET options, see compute_facet.
+Returns:
+    A dictionary with the predicted 'seconds' of the run, the 'selection_seconds' and 'inspector_seconds' of its
+    phases, and the peak 'memory_bytes'.
+'''
+def estimate_facet(rows, columns, search='grid', learner='random_forest', explain_rows=None, pairs='all', mode='exact', repeats=KFOLD_REPEATS, candidates=None):
+    fits, selection, inspection, explained = facet_work(rows, columns, search, learner, explain_rows, mode, repeats, candidates)
+    selection_seconds = float(cost_model.seconds('selection', learner, fits, selection))
+    inspector_seconds = float(cost_model.seconds('inspector', learner, 1, inspection))
+    workers = job_cpus(os.cpu_count() or 1)
+    return {'seconds': selection_seconds + inspector_seconds, 'selection_seconds': selection_seconds,
+            'inspector_seconds': inspector_seconds,
+            'memory_bytes': peak_memory(rows, columns, explained, workers, interactions=mode == 'exact')}
+
+'''
+Plans a FACET run that meets a latency budget. The cheapest changes are made first: fewer cross-validation repeats,
+then fewer hyperparameter candidates, then halving the explained rows down to EXPLAIN_MIN_ROWS, and last halving the
+training rows down to PLAN_MIN_ROWS.
+Parameters:
+    rows: the number of rows.
+    columns: the number of features, without the target.
+    budget: the latency budget in seconds.
+    search, learner, explain_rows, pairs, mode: the FACET options, see compute_facet.
+Returns:
+    A dictionary with the planned number of 'rows' to train on and the 'explain_rows', 'repeats' and 'candidates'
+    options of compute_facet, the 'estimate' of the planned run (see estimate_facet), and whether it is
+    'within_budget'. When even the smallest run is over the budget, that run is planned.
+'''
+def plan_facet(rows, columns, budget, search='grid', learner='random_forest', explain_rows=None, pairs='all', mode='exact'):
+    plan = {'rows': rows, 'explain_rows': explain_rows, 'repeats': KFOLD_REPEATS, 'candidates': None}
+
+    def estimate():
+        return estimate_facet(plan['rows'], columns, search, learner, plan['explain_rows'], pairs, mode, plan['repeats'], plan['candidates'])
+
+    def changes():
+        for repeats in PLAN_REPEATS:
+            yield 'repeats', repeats
+        for candidates in PLAN_CANDIDATES:
+            yield 'candidates', candidates
+        explained = facet_work(plan['rows'], columns, search, learner, plan['explain_rows'], mode)[3]
+        while explained // 2 >= EXPLAIN_MIN_ROWS:
+            explained //= 2
+            yield 'explain_rows', explained
+        while plan['rows'] // 2 >= PLAN_MIN_ROWS:
+            yield 'rows', plan['rows'] // 2
+
+    predicted = estimate()
+    for name, value in changes():
+        if predicted['seconds'] <= budget:
+            break
+        plan[name] = value
+        # Fewer training rows cannot explain more rows than they hold
+        if name == 'rows' and isinstance(plan['explain_rows'], int):
+            plan['explain_rows'] = min(plan['explain_rows'], value)
+        predicted = estimate()
+    return dict(plan, estimate=predicted, within_budget=predicted['seconds'] <= budget)
+
+'''
+Checks the number of rows explained by the SHAP values.
+Parameters:
+    explain_rows: None to explain every row, a number of rows of at least 2, or 'auto'.
+Returns:
+    explain_rows. Any other value raises a ValueError.
+'''
+def check_explain_rows(explain_rows):
+    if explain_rows is None or explain_rows == 'auto':
+        return explain_rows
+    if isinstance(explain_rows, bool) or not isinstance(explain_rows, (int, np.integer)) or explain_rows < 2:
+        raise ValueError(f"explain_rows must be None, 'auto' or a number of at least 2 rows, '{explain_rows}' was supplied for FACET")
+    return explain_rows
+
+'''
+Orders the rows of a dataset so that every prefix of the order is a stratified random subsample. The rows are split
+into EXPLAIN_STRATA quantile strata of the target, and the rows of each stratum are spread evenly over the order.
+Parameters:
+    target: the values of the target variable.
+    random_seed: the random seed of the order.
+Returns:
+    An array of row positions.
+'''
+def stratified_order(target, random_seed=RANDOM_STATE):
+    rng = np.random.default_rng(random_seed)
+
+    # Ranks break ties, so that the strata have equal sizes for categorical targets too
+    ranks = pd.Series(np.asarray(target, dtype=float)).rank(method='first').fillna(1).to_numpy()
+    strata = np.floor((ranks - 1) * EXPLAIN_STRATA / len(ranks))
+
+    # Evenly spaced keys in [0, 1), shuffled within each stratum, so that sorting the keys interleaves the strata
+    keys = np.empty(len(ranks))
+    for stratum in np.unique(strata):
+        positions = np.flatnonzero(strata == stratum)
+        keys[rng.permutation(positions)] = (np.arange(len(positions)) + rng.random()) / len(positions)
+    return np.argsort(keys, kind='stable')
+
+'''
+Fits the inspector that computes the SHAP values of a model.
+Parameters:
+    model: the fitted pipeline of the surrogate learner.
+    sample: the Sample of the rows to explain.
+    project: whether to also project the SHAP values onto the redundancy (or association) matrix of every feature
+        pair. Otherwise only the SHAP values are computed, for shap_redundancy.
+    interactions: whether to compute SHAP interaction values, or plain SHAP vectors only.
+Returns:
+    The LearnerInspector.
+'''
+def fit_inspector(model, sample, project=True, interactions=True):
+    inspector = LearnerInspector(model=model, shap_interaction=interactions, n_jobs=job_cpus(INSPECTOR_JOBS))
+    if project:
+        return inspector.fit(sample)
+    inspector.shap_calculator.fit(inspector.preprocess_features(sample.features))
+    return inspector
+
+'''
+Parameters:
+    inspector: a LearnerInspector fitted by fit_inspector.
+Returns:
+    A tuple (values, features) of the SHAP interaction values as an array of shape (rows, features, features), or of
+    the SHAP vectors as an array of shape (rows, features) when the inspector has no interaction values, and the features.
+'''
+def inspector_shap_values(inspector):
+    calculator = inspector.shap_calculator
+    features = calculator.feature_index_
+    if not inspector.shap_interaction:
+        return calculator.shap_values.to_numpy(dtype=float), features
+    values = calculator.shap_interaction_values.to_numpy(dtype=float)
+    return values.reshape(-1, len(features), len(features)), features
+
+'''
+Computes the synergy and redundancy of every feature with some columns from SHAP interaction values, the same way
+FACET computes its synergy and redundancy matrices, but only for the pairs involving the columns. Every row and column
+of FACET's projection that the pairs do not need is skipped, so the cost is rows x features x columns instead of
+rows x features x features.
+Parameters:
+    interactions: the SHAP interaction values, an array of shape (rows, features, features).
+    columns: the positions of the columns, usually the sensitive variables.
+    weight: optional weights of the rows.
+Returns:
+    A tuple (synergy, redundancy) of arrays of shape (features, len(columns)) of the unilateral synergy and redundancy
+    of every feature with every column, between 0 and 1, NaN for a feature with itself.
+'''
+def interaction_synergy_redundancy(interactions, columns, weight=None):
+    columns = np.asarray(columns, dtype=int)
+    weight = np.ones(len(interactions)) if weight is None else np.asarray(weight, dtype=float)
+    total = weight.sum()
+    p_ij = interactions[:, :, columns]
+
+    # SHAP vectors p[i] and main effects p[i, i], with shape (rows, features)
+    p_i = interactions.sum(axis=2)
+    p_ii = np.diagonal(interactions, axis1=1, axis2=2)
+    weighted_p_i = p_i * weight[:, None]
+    weighted_p_ii = p_ii * weight[:, None]
+
+    # Covariances of the SHAP vectors and of the main effects (FACET treats all vectors as centered)
+    cov_p_i_p_j = weighted_p_i.T @ p_i[:, columns] / total
+    var_p_i = np.einsum('ri,ri->i', weighted_p_i, p_i) / total
+    cov_p_ii_p_jj = weighted_p_ii.T @ p_ii[:, columns] / total
+    var_p_ii = np.einsum('ri,ri->i', weighted_p_ii, p_ii) / total
+
+    # Orthogonalize the interaction vectors p[i, j] against both main effects
+    cov_p_ii_p_ij = np.einsum('ri,rij->ij', weighted_p_ii, p_ij) / total
+    cov_p_jj_p_ij = np.einsum('rj,rij->ij', weighted_p_ii[:, columns], p_ij) / total
+    var_i, var_j = var_p_ii[:, None], var_p_ii[columns][None, :]
+    denominator = cov_p_ii_p_jj ** 2 - var_i * var_j
+    adjust_i = divide(cov_p_ii_p_jj * cov_p_jj_p_ij - cov_p_ii_p_ij * var_j, denominator, denominator < 0)
+    adjust_j = divide(cov_p_ii_p_jj * cov_p_ii_p_ij - cov_p_jj_p_ij * var_i, denominator, denominator < 0)
+    p_ij = p_ij - adjust_i[None] * p_ii[:, :, None] - adjust_j[None] * p_ii[:, None, columns]
+
+    # Covariances of the orthogonalized interaction vectors with themselves and with both SHAP vectors
+    var_p_ij = np.einsum('r,rij,rij->ij', weight, p_ij, p_ij) / total
+    cov_p_i_p_ij = np.einsum('ri,rij->ij', weighted_p_i, p_ij) / total
+    cov_p_j_p_ij = np.einsum('rj,rij->ij', weighted_p_i[:, columns], p_ij) / total
+    projection_i = divide(cov_p_i_p_ij, var_p_ij, var_p_ij > 0)
+    projection_j = divide(cov_p_j_p_ij, var_p_ij, var_p_ij > 0)
+
+    # Synergy, and the redundancy of what synergy leaves unexplained
+    var_p_i_j = np.broadcast_to(var_p_i[:, None], var_p_ij.shape)
+    synergy = divide(cov_p_i_p_ij, var_p_i_j, var_p_i_j > 0) * projection_i
+    nominator = (cov_p_i_p_j - projection_i * cov_p_j_p_ij) ** 2
+    denominator = (var_p_i[:, None] - projection_i * cov_p_i_p_ij) * (var_p_i[columns][None, :] - projection_j * cov_p_j_p_ij)
+    redundancy = divide(nominator, denominator, denominator > 0) * (1 - synergy)
+
+    # Synergy and redundancy of a feature with itself are undefined
+    synergy[columns, np.arange(len(columns))] = np.nan
+    redundancy[columns, np.arange(len(columns))] = np.nan
+    return synergy, redundancy
+
+'''
+Computes the redundancy of every feature with some columns from SHAP interaction values, see
+interaction_synergy_redundancy.
+Parameters:
+    interactions: the SHAP interaction values, an array of shape (rows, features, features).
+    columns: the positions of the columns, usually the sensitive variables.
+    weight: optional weights of the rows.
+Returns:
+    An array of shape (features, len(columns)) of the unilateral redundancy of every feature with every column,
+    between 0 and 1, NaN for a feature with itself.
+'''
+def interaction_redundancy(interactions, columns, weight=None):
+    return interaction_synergy_redundancy(interactions, columns, weight)[1]
+
+'''
+Computes the association of every feature with some columns from plain SHAP vectors, the same way FACET computes its
+association matrix: the coefficient of determination between the SHAP vectors of both features.
+Parameters:
+    shap_values: the SHAP vectors, an array of shape (rows, features).
+    columns: the positions of the columns, usually the sensitive variables.
+    weight: optional weights of the rows.
+Returns:
+    An array of shape (features, len(columns)) of the association of every feature with every column, between 0 and 1,
+    NaN for a feature with itself.
+'''
+def vector_association(shap_values, columns, weight=None):
+    columns = np.asarray(columns, dtype=int)
+    weight = np.ones(len(shap_values)) if weight is None else np.asarray(weight, dtype=float)
+    total = weight.sum()
+
+    # Covariances of the SHAP vectors (FACET treats all vectors as centered)
+    weighted = shap_values * weight[:, None]
+    cov_p_i_p_j = weighted.T @ shap_values[:, columns] / total
+    var_p_i = np.einsum('ri,ri->i', weighted, shap_values) / total
+    var_i = np.broadcast_to(var_p_i[:, None], cov_p_i_p_j.shape)
+    var_j = np.broadcast_to(var_p_i[columns][None, :], cov_p_i_p_j.shape)
+    association = divide(cov_p_i_p_j, var_i, var_i > 0) * divide(cov_p_i_p_j, var_j, var_j > 0)
+
+    # Association of a feature with itself is undefined
+    association[columns, np.arange(len(columns))] = np.nan
+    return association
+
+'''
+Computes the redundancy of every feature with some columns from the SHAP values of an inspector: the exact
+redundancy from SHAP interaction values, or the association from plain SHAP vectors.
 Parameters:
+    shap_values: the SHAP values from inspector_shap_values.
+    columns: the positions of the columns, usually the sensitive variables.
+    weight: optional weights of the rows.
+Returns:
+    An array of shape (features, len(columns)), see interaction_redundancy and vector_association.
+'''
+def shap_redundancy(shap_values, columns, weight=None):
+    if shap_values.ndim == 3:
+        return interaction_redundancy(shap_values, columns, weight)
+    return vector_association(shap_values, columns, weight)
+
+'''
+Divides arrays, with zeros where the condition does not hold.
+Parameters:
+    nominator: an array.
+    denominator: an array of the same shape.
+    where: a boolean array of the same shape.
+Returns:
+    The quotients.
+'''
+def divide(nominator, denominator, where):
+    return np.divide(nominator, denominator, out=np.zeros(np.shape(nominator)), where=where)
+
+'''
+Computes the redundancy of every feature with the sensitive variables, see shap_redundancy.
+Parameters:
+    inspector: a LearnerInspector fitted by fit_inspector.
     sensitive_variables: list of variables to analyze for redundancy.
+Returns:
+    A dataframe of the redundancy values, with features as rows and sensitive variables as columns.
+'''
+def sensitive_redundancy(inspector, sensitive_variables):
+    return sensitive_matrix(inspector, sensitive_variables, 'redundancy')
+
+'''
+Computes a FACET matrix of every feature with the sensitive variables from the SHAP values kept by an inspector.
+Parameters:
+    inspector: a LearnerInspector fitted by fit_inspector.
+    sensitive_variables: list of variables to analyze.
+    metric: one of MATRICES.
+Returns:
+    A dataframe of the values, with features as rows and sensitive variables as columns.
+'''
+def sensitive_matrix(inspector, sensitive_variables, metric='redundancy'):
+    shap_values, features = inspector_shap_values(inspector)
+    columns = features.get_indexer(sensitive_variables)
+    if metric == 'redundancy':
+        values = shap_redundancy(shap_values, columns)
+    elif metric == 'synergy':
+        values = interaction_synergy_redundancy(shap_values, columns)[0]
+    else:
+        # The SHAP vectors are the sums of the interaction values
+        vectors = shap_values.sum(axis=2) if shap_values.ndim == 3 else shap_values
+        values = vector_association(vectors, columns)
+    return pd.DataFrame(values, index=features, columns=sensitive_variables)
+
+'''
+Estimates how much the redundancy values would move with other explained rows, by bootstrapping the explained rows.
+Every resample reweights the SHAP values the inspector already computed, so none are recomputed.
+Parameters:
+    inspector: a LearnerInspector fitted by fit_inspector.
+    resamples: the number of bootstrap resamples.
+    random_seed: the random seed of the resamples.
+    columns: the columns of the redundancy matrix to estimate the error of. Defaults to all features.
+Returns:
+    A dataframe of the bootstrap standard errors of the redundancy values, with features as rows and the columns as columns.
+'''
+def redundancy_error(inspector, resamples=BOOTSTRAP_RESAMPLES, random_seed=RANDOM_STATE, columns=None):
+    rng = np.random.default_rng(random_seed)
+    shap_values, features = inspector_shap_values(inspector)
+    columns = features if columns is None else columns
+    positions = features.get_indexer(columns)
+    rows = len(shap_values)
+
+    estimates = []
+    for _ in range(resamples):
+        # Drawing rows with replacement is the same as weighting every row by the number of times it is drawn
+        weight = rng.multinomial(rows, np.full(rows, 1 / rows))
+        estimates.append(shap_redundancy(shap_values, positions, weight))
+
+    return pd.DataFrame(np.std(estimates, axis=0, ddof=1), index=features, columns=columns)
+
+'''
+Fits the FACET inspector to a stratified subsample of the rows, the model being trained on all of them.
+Parameters:
+    model: the fitted pipeline of the best surrogate learner.
+    data: a dataframe containing the dataset to be analyzed.
+    target_var: the target variable of the model.
+    explain_rows: the number of rows to explain, or 'auto' to start from EXPLAIN_MIN_ROWS rows and double them until
+        the mean bootstrap error of the redundancy values is at most EXPLAIN_TOLERANCE percentage points.
+    random_seed: the random seed of the subsample.
+    project: whether the inspector projects the redundancy matrix of every feature pair, see fit_inspector.
+    interactions: whether the inspector computes SHAP interaction values, see fit_inspector.
+Returns:
+    The fitted LearnerInspector.
+'''
+def explain_subsample(model, data, target_var, explain_rows, random_seed=RANDOM_STATE, project=True, interactions=True):
+    order = stratified_order(data[target_var], random_seed)
+    rows = EXPLAIN_MIN_ROWS if explain_rows == 'auto' else explain_rows
+
+    while True:
+        rows = min(rows, len(data))
+        # A fresh index, so that the bootstrap weights line up with the rows of the SHAP values
+        subsample = data.iloc[order[:rows]].reset_index(drop=True)
+        inspector = fit_inspector(model, Sample(observations=subsample, target_name=target_var), project, interactions)
+        if explain_rows != 'auto' or rows == len(data):
+            return inspector
+
+        # Stop once the redundancy values are stable enough, otherwise explain twice as many rows
+        error = redundancy_error(inspector, random_seed=random_seed).to_numpy() * 100
+        if np.nanmean(error) <= EXPLAIN_TOLERANCE:
+            return inspector
+        rows *= 2
+
+'''
+Converts the features of a dataset to one contiguous array of the dtype the learner fits on, so that the conversion
+happens once per job instead of in every cross-validation fit, and so that the features are a single array the joblib
+workers can share, see shared_workers.
+Parameters:
+    data: a dataframe containing the dataset to be analyzed.
+    target_var: the target variable, which keeps its dtype.
+    learner: the surrogate learner, one of LEARNERS.
+Returns:
+    A dataframe with the same index and the features followed by the target variable.
+'''
+def shared_features(data, target_var, learner):
+    features = [col for col in data.columns if col != target_var]
+    matrix = np.ascontiguousarray(data[features].to_numpy(dtype=FEATURE_DTYPES[learner]))
+    shared = pd.DataFrame(matrix, index=data.index, columns=features)
+    shared[target_var] = data[target_var]
+    return shared
+
+'''
+Makes the joblib workers started in the context share the arrays of their inputs: arrays of at least
+SHARED_MEMORY_MIN_BYTES are dumped once per parallel call into a temporary folder, in shared memory (/dev/shm) where
+available, and every worker memory maps the same file read-only instead of unpickling its own copy.
+Returns:
+    A context manager.
+'''
+def shared_workers():
+    return parallel_config(max_nbytes=SHARED_MEMORY_MIN_BYTES, mmap_mode='r')
+
+'''
+Selects the best surrogate learner for the target with cross-validation and fits the FACET inspector to it.
+Parameters:
     data: a dataframe containing the dataset to be analyzed.
     target_var: the target variable for building the prediction model.
-    random_seed: the random seed for computation (default is 0 for reproducibility).
+    random_seed: the random seed for computation.
+    search: the hyperparameter search strategy, one of SEARCH_STRATEGIES. Successive halving falls back to the
+        exhaustive grid on datasets with fewer than HALVING_MIN_ROWS rows.
+    learner: the surrogate learner, one of LEARNERS.
+    explain_rows: None to compute the SHAP values of every row, or the size of the stratified subsample of rows they
+        are computed for, see explain_subsample.
+    pairs: one of REDUNDANCY_PAIRS. With 'sensitive' the inspector only computes the SHAP values, and the redundancy
+        is computed by sensitive_redundancy.
+    mode: one of REDUNDANCY_MODES. With 'approximate' the inspector computes plain SHAP vectors instead of SHAP
+        interaction values.
+    repeats: the number of times cross-validation is repeated.
+    candidates: None to search the whole hyperparameter grid, or the number of middle values of every
+        hyperparameter that are kept, see shrink_grid.
+    positions: None to search the whole hyperparameter grid, or the positions of the values of every hyperparameter
+        that are kept, see narrow_grid. Applied before candidates.
+Returns:
+    A tuple (selector, inspector) of the fitted LearnerSelector and LearnerInspector. The wall times of both phases
+    refine the cost model.
+'''
+def fit_facet(data, target_var, random_seed=RANDOM_STATE, search='grid', learner='random_forest', explain_rows=None, pairs='all', mode='exact', repeats=KFOLD_REPEATS, candidates=None, positions=None):
+    if search not in SEARCH_STRATEGIES:
+        raise ValueError(f"search must be one of {SEARCH_STRATEGIES}, '{search}' was supplied for FACET")
+    check_explain_rows(explain_rows)
+    if pairs not in REDUNDANCY_PAIRS:
+        raise ValueError(f"pairs must be one of {REDUNDANCY_PAIRS}, '{pairs}' was supplied for FACET")
+    if mode not in REDUNDANCY_MODES:
+        raise ValueError(f"mode must be one of {REDUNDANCY_MODES}, '{mode}' was supplied for FACET")
+    halving = search == 'halving' and len(data) >= HALVING_MIN_ROWS
+
+    # Define a pipeline for the surrogate learner
+    learner_reg, grid = facet_learner(learner, len(data), random_seed, fractional_leaves=halving)
+    grid = shrink_grid(narrow_grid(grid, positions), candidates)
+
+    # Convert the features once for all fits and workers, and create a sample from the data
+    data = shared_features(data, target_var, learner)
+    data_sample = Sample(observations=data, target_name=target_var)
+    
+    # Define the parameter space for hyperparameter tuning
+    learner_ps = ParameterSpace(learner_reg)
+    for name, values in grid.items():
+        setattr(learner_ps.regressor, name, values)
+
+    # Configure cross-validation
+    rkf_cv = RepeatedKFold(n_splits=KFOLD_SPLITS, n_repeats=repeats, random_state=random_seed)
+
+    # Select the best model using GridSearchCV, or successive halving, over the defined parameter space
+    searcher_params = {}
+    if halving:
+        searcher_params = dict(factor=HALVING_FACTOR, random_state=random_seed)
+    start_time = time.time()
+    with shared_workers():
+        selector = LearnerSelector(
+            searcher_type=HalvingGridSearchCV if halving else GridSearchCV,
+            parameter_space=learner_ps,
+            cv=rkf_cv,
+            n_jobs=job_cpus(LEARNER_SELECTOR_JOBS),
+            scoring="r2",
+            **searcher_params
+        ).fit(data_sample)
+
+    selection_time = time.time() - start_time
+
+    # Fit the inspector that computes the SHAP values of the best model (time-consuming)
+    start_time = time.time()
+    with shared_workers():
+        if explain_rows is None:
+            inspector = fit_inspector(selector.best_estimator_, data_sample, project=pairs == 'all', interactions=mode == 'exact')
+        else:
+            inspector = explain_subsample(selector.best_estimator_, data, target_var, explain_rows, random_seed, project=pairs == 'all', interactions=mode == 'exact')
+    inspector_time = time.time() - start_time
+
+    # Calibrate the cost model on the observed wall times
+    explained = len(inspector.shap_calculator.shap_values)
+    if positions is not None:
+        candidates = max(len(values) for values in grid.values())
+    fits, selection, inspection, _ = facet_work(len(data), len(data.columns) - 1, search, learner, explained, mode, repeats, candidates)
+    cost_model.observe('selection', learner, fits, selection, selection_time)
+    cost_model.observe('inspector', learner, 1, inspection, inspector_time)
+    return selector, inspector
+
+'''
+Fits FACET to a dataset, or reuses the fit of an earlier call with the same rows, target, seed and options.
+The redundancy matrix only depends on those, so it is computed for every feature pair once and sliced by the callers.
+Parameters:
+    data: the dataframe passed by the caller. Its fingerprint is kept while the same dataframe is passed again.
+    df: the dataframe to fit, with the content of data.
+    target_var: the target variable for building the prediction model.
+    random_seed: the random seed for computation.
+    search: the hyperparameter search strategy, see fit_facet.
+    learner: the surrogate learner, see fit_facet.
+    explain_rows: the rows the SHAP values are computed for, see fit_facet.
+    pairs: the feature pairs whose redundancy is computed, see fit_facet.
+    mode: the redundancy mode, see fit_facet.
+    repeats: the number of times cross-validation is repeated, see fit_facet.
+    candidates: the number of candidate values of every hyperparameter, see fit_facet.
+    memo: None, or the key of the dataset under which the best hyperparameters are memoized for its samples and
+        subsets. A memoized dataset and target only fits the best candidate, or searches around it, see
+        recall_hyperparameters, and every search updates the memo.
+    memo_mode: one of MEMO_MODES.
+Returns:
+    A dictionary with the fitted 'selector' and 'inspector', the full 'redundancy' matrix as a dataframe, the number
+    of 'explained_rows', the 'redundancy_error' dataframe of bootstrap standard errors when only a subsample of
+    the rows is explained (None otherwise), and whether the search was narrowed by 'memoized' hyperparameters.
+    With pairs 'sensitive' the redundancy and its error depend on the sensitive variables, so both are None and left
+    to the callers.
+'''
+def fitted_facet(data, df, target_var, random_seed=RANDOM_STATE, search='grid', learner='random_forest', explain_rows=None, pairs='all', mode='exact', repeats=KFOLD_REPEATS, candidates=None, memo=None, memo_mode='best'):
+    global fingerprinted
+
+    # The fingerprint is kept until another dataframe is passed. The global is read once, so that a concurrent job on
+    # another dataframe cannot swap the fingerprint between the check and the key
+    fingerprint = fingerprinted
+    if fingerprint[0] is not data:
+        fingerprint = (data, fingerprint_dataframe(df))
+        fingerprinted = fingerprint
+    key = (fingerprint[1], target_var, random_seed, search, learner, explain_rows, pairs, mode, repeats, candidates, memo, memo_mode)
+
+    with fitted_models_lock:
+        if key in fitted_models:
+            fitted_models.move_to_end(key)
+            return fitted_models[key]
+
+    # Narrow the search to the memoized hyperparameters of the dataset, a single candidate needs no repeated folds.
+    # The grids of the exhaustive and the successive halving search differ, so they are memoized apart
+    positions = None
+    if memo is not None:
+        halving = search == 'halving' and len(df) >= HALVING_MIN_ROWS
+        memo_key = (memo, target_var, learner, halving)
+        grid = facet_learner(learner, len(df), fractional_leaves=halving)[1]
+        positions = recall_hyperparameters(memo_key, grid, memo_mode)
+        if positions is not None and all(len(kept) == 1 for kept in positions.values()):
+            repeats = min(repeats, MEMO_REPEATS)
+
+    # Select the model and fit the inspector
+    selector, inspector = fit_facet(df, target_var, random_seed, search, learner, explain_rows, pairs, mode, repeats, candidates, positions)
+    if memo is not None:
+        memoize_hyperparameters(memo_key, grid, selector)
+    model = {'selector': selector, 'inspector': inspector, 'redundancy': None,
+             'explained_rows': len(inspector.shap_calculator.shap_values), 'redundancy_error': None,
+             'memoized': positions is not None}
+
+    if pairs == 'all':
+        # Compute the feature redundancy matrix from model (time-consuming), or the association matrix approximating it
+        if mode == 'exact':
+            model['redundancy'] = inspector.feature_redundancy_matrix().to_frame()
+        else:
+            model['redundancy'] = inspector.feature_association_matrix().to_frame()
+
+        # Estimate the error of the redundancy values computed from a subsample of the rows
+        if explain_rows is not None:
+            model['redundancy_error'] = redundancy_error(inspector, random_seed=random_seed)
+
+    # Keep the most recently used models only, as the inspectors hold their SHAP values
+    with fitted_models_lock:
+        fitted_models[key] = model
+        while len(fitted_models) > FACET_MODEL_CACHE_ENTRIES:
+            fitted_models.popitem(last=False)
+    return model
+
+'''
+Returns a matrix of every feature pair of a fitted model, computing the synergy and association matrices from its
+inspector the first time they are asked for. In approximate mode the redundancy matrix already is the association.
+Parameters:
+    model: a fitted model with pairs 'all', see fitted_facet.
+    metric: one of MATRICES.
+Returns:
+    The matrix as a dataframe.
+'''
+def model_matrix(model, metric):
+    if metric == 'redundancy' or (metric == 'association' and not model['inspector'].shap_interaction):
+        return model['redundancy']
+    if model.get(metric) is None:
+        if metric == 'synergy':
+            model[metric] = model['inspector'].feature_synergy_matrix().to_frame()
+        else:
+            model[metric] = model['inspector'].feature_association_matrix().to_frame()
+    return model[metric]
+
+'''
+Checks the inputs of FACET and fits it, or reuses an earlier fit, see fitted_facet.
+Parameters:
+    sensitive_variables: list of variables to analyze for redundancy.
+    data: a dataframe containing the dataset to be analyzed.
+    target_var: the target variable for building the prediction model.
+    random_seed: the random seed for computation.
+    search: the hyperparameter search strategy, see fit_facet.
+    learner: the surrogate learner, see fit_facet.
+    explain_rows: the rows the SHAP values are computed for, see fit_facet.
+    pairs: the feature pairs whose redundancy is computed, see fit_facet.
+    mode: the redundancy mode, see fit_facet.
+    repeats: the number of times cross-validation is repeated, see fit_facet.
+    candidates: the number of candidate values of every hyperparameter, see fit_facet.
+    memo: the key of the dataset whose best hyperparameters are memoized, see fitted_facet.
+    memo_mode: one of MEMO_MODES, see fitted_facet.
 Returns:
-    A dictionary where the keys are sensitive variables and the values are dictionaries of redundancy values with respect to other variables.
+    The fitted model, see fitted_facet.
 '''
-def compute_facet(sensitive_variables, data, target_var, random_seed=RANDOM_STATE):
+def facet_model(sensitive_variables, data, target_var, random_seed=RANDOM_STATE, search='grid', learner='random_forest', explain_rows=None, pairs='all', mode='exact', repeats=KFOLD_REPEATS, candidates=None, memo=None, memo_mode='best'):
 
     random_seed = 0 if random_seed < 0 else random_seed
 
@@ -65,55 +915,245 @@ def compute_facet(sensitive_variables, data, target_var, random_seed=RANDOM_STAT
         raise ValueError("Target Variable(s) needed for FACET")
     if target_var not in df.columns:
         raise ValueError(f"Target variable(s) {target_var} not found in the data columns for FACET")
+    check_explain_rows(explain_rows)
+    if pairs not in REDUNDANCY_PAIRS:
+        raise ValueError(f"pairs must be one of {REDUNDANCY_PAIRS}, '{pairs}' was supplied for FACET")
+    if mode not in REDUNDANCY_MODES:
+        raise ValueError(f"mode must be one of {REDUNDANCY_MODES}, '{mode}' was supplied for FACET")
+    if memo_mode not in MEMO_MODES:
+        raise ValueError(f"memo_mode must be one of {MEMO_MODES}, '{memo_mode}' was supplied for FACET")
 
-    # Create a sample from the data
-    data_sample = Sample(observations=data, target_name=target_var)
+    # Fit the model and compute the full redundancy matrix, unless only the sensitive variables changed
+    return fitted_facet(data, df, target_var, random_seed, search, learner, explain_rows, pairs, mode, repeats, candidates, memo, memo_mode)
 
+'''
+Function to compute redundancy between sensitive variables and other variables in the dataset using the FACET algorithm.
+Parameters:
+    sensitive_variables: list of variables to analyze for redundancy.
+    data: a dataframe containing the dataset to be analyzed.
+    target_var: the target variable for building the prediction model.
+    random_seed: the random seed for computation (default is 0 for reproducibility).
+    layout: 'nested' (default) or 'columnar', see ResultMatrix.
+    search: the hyperparameter search strategy, 'grid' (default) or 'halving', see fit_facet.
+    learner: the surrogate learner, 'random_forest' (default), 'extra_trees' or 'hist_gradient_boosting'.
+    explain_rows: None (default) to compute the SHAP values of every row, a number of rows to compute them for a
+        stratified subsample of the rows only, or 'auto' to grow the subsample until the redundancy is stable.
+    pairs: 'all' (default) to compute the redundancy matrix of every feature pair, or 'sensitive' to compute the
+        redundancy of the pairs involving the sensitive variables only. Both give the same values, but with 'sensitive'
+        the variables are listed in the order of the dataset instead of being clustered.
+    mode: 'exact' (default) for the redundancy from SHAP interaction values, or 'approximate' for FACET's association
+        from plain SHAP vectors, which is much cheaper to compute and mostly at or slightly above the redundancy.
+    metric: the matrix to return, 'redundancy' (default), 'synergy' or 'association'. Every matrix is computed from
+        the same fit, so asking for another matrix of the same data does not refit FACET. Synergy needs SHAP
+        interaction values and is not available in approximate mode.
+    repeats: the number of times cross-validation is repeated (default KFOLD_REPEATS).
+    candidates: None (default) to search the whole hyperparameter grid, or the number of middle values of every
+        hyperparameter that are searched, as picked by plan_facet to meet a latency budget.
+    memo: None (default), or a key of the dataset shared by its samples and subsets, such as a fingerprint of the
+        uploaded dataset. The best hyperparameters are then memoized per dataset and target, and later runs on any
+        sample of the dataset skip or narrow the hyperparameter search, see compute_facet_selection.
+    memo_mode: 'best' (default) to fit only the memoized best candidate, or 'neighbours' to also search the
+        neighbouring values of every hyperparameter.
+Returns:
+    A dictionary where the keys are sensitive variables and the values are dictionaries of redundancy (or synergy, or
+    association) values with respect to other variables.
+'''
+def compute_facet(sensitive_variables, data, target_var, random_seed=RANDOM_STATE, layout='nested', search='grid', learner='random_forest', explain_rows=None, pairs='all', mode='exact', metric='redundancy', repeats=KFOLD_REPEATS, candidates=None, memo=None, memo_mode='best'):
+    check_layout(layout)
+    matrix_df = facet_matrix(sensitive_variables, data, target_var, random_seed, search, learner, explain_rows, pairs, mode, metric, repeats, candidates, memo, memo_mode)
 
-    # Define a pipeline for the Random Forest regressor
-    rnd_forest_reg = RegressorPipelineDF(
-        regressor=RandomForestRegressorDF(n_estimators=REGRESSOR_ESTIMATOR_COUNT, random_state=random_seed)
-    )
-    
-    min_samples_leaf = [round(len(df) * .05),round(len(df) * .06),round(len(df) * .07) ]
-    maxDepth = []
-    if (len(df) < 1000):
-        maxDepth = [5, 10, 15]
-    elif (len(df) < 10000):
-        maxDepth = [20, 25, 30]
+    # Extract the values for sensitive variables as percentages and format them to 5 decimal places, handling NaN values
+    values = matrix_df.to_numpy(dtype=float).T * 100
+    return ResultMatrix(values, sensitive_variables, matrix_df.index, REDUNDANCY_DECIMALS).to_layout(layout)
+
+'''
+Computes a FACET matrix of every feature with the sensitive variables. Takes the same parameters as compute_facet,
+without the layout.
+Returns:
+    A dataframe of the values between 0 and 1, with features as rows and sensitive variables as columns.
+'''
+def facet_matrix(sensitive_variables, data, target_var, random_seed=RANDOM_STATE, search='grid', learner='random_forest', explain_rows=None, pairs='all', mode='exact', metric='redundancy', repeats=KFOLD_REPEATS, candidates=None, memo=None, memo_mode='best'):
+    if metric not in MATRICES:
+        raise ValueError(f"metric must be one of {MATRICES}, '{metric}' was supplied for FACET")
+    if metric == 'synergy' and mode == 'approximate':
+        raise ValueError("Synergy needs SHAP interaction values, which the approximate mode of FACET does not compute")
+    model = facet_model(sensitive_variables, data, target_var, random_seed, search, learner, explain_rows, pairs, mode, repeats, candidates, memo, memo_mode)
+
+    # The matrices of the sensitive pairs are recomputed from the kept SHAP values, as they depend on the sensitive variables
+    if pairs == 'sensitive':
+        return sensitive_matrix(model['inspector'], sensitive_variables, metric)
+    return model_matrix(model, metric)[sensitive_variables]
+
+'''
+Computes the redundancy matrix of a copy of the dataset with one column left out, in a worker process of a sweep or
+of a batch of targets.
+Parameters:
+    sensitive_variables: list of variables to analyze for redundancy.
+    data: a dataframe containing the dataset to be analyzed.
+    target_var: the target variable for building the prediction model.
+    drop_column: the column to leave out, or None for the whole dataset.
+    random_seed: the random seed for computation.
+    cpus: the CPUs of the worker.
+    options: the FACET options, see compute_facet.
+Returns:
+    A dataframe of the redundancy values, see facet_matrix.
+'''
+def sweep_matrix(sensitive_variables, data, target_var, drop_column, random_seed, cpus, options):
+    df = data if drop_column is None else data.drop(columns=[drop_column])
+    with granted_cpus(cpus):
+        return facet_matrix(sensitive_variables, df, target_var, random_seed, **options)
+
+'''
+Runs FACET fits in parallel worker processes, which split the CPUs of the current resource governor job between them.
+Parameters:
+    sensitive_variables: list of variables to analyze for redundancy.
+    data: a dataframe containing the dataset to be analyzed.
+    fits: a list of (target variable, column to leave out or None) tuples, one per fit.
+    random_seed: the random seed for computation, shared by every fit.
+    workers: the number of worker processes. Defaults to the CPUs granted by the resource governor, or SWEEP_WORKERS.
+    options: the FACET options, see compute_facet.
+Returns:
+    The list of the redundancy matrices of the fits, see facet_matrix.
+'''
+def parallel_matrices(sensitive_variables, data, fits, random_seed, workers, options):
+    # The CPUs of the job are split between the workers, every fit getting an equal share
+    cpus = job_cpus(SWEEP_WORKERS)
+    workers = min(workers or cpus, len(fits))
+    fit_cpus = max(cpus // workers, 1)
+    tasks = [(sensitive_variables, data, target_var, drop, random_seed, fit_cpus, options) for target_var, drop in fits]
+    if workers <= 1:
+        return [sweep_matrix(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=worker_context()) as pool:
+        return list(pool.map(sweep_matrix, *zip(*tasks)))
+
+'''
+Computes how the redundancy with the sensitive variables changes when each of some columns is left out of the dataset.
+FACET is fitted on the whole dataset and on one copy per left out column. The fits run in parallel worker processes,
+which split the CPUs of the current resource governor job between them.
+Parameters:
+    sensitive_variables: list of variables to analyze for redundancy.
+    data: a dataframe containing the dataset to be analyzed.
+    target_var: the target variable for building the prediction model.
+    drop_columns: the columns to leave out one at a time. They cannot be sensitive variables or the target variable.
+    random_seed: the random seed for computation, shared by every fit.
+    layout: 'nested' (default) or 'columnar', see ResultMatrix.
+    workers: the number of worker processes. Defaults to the CPUs granted by the resource governor, or SWEEP_WORKERS.
+    options: the FACET options search, learner, explain_rows, pairs and mode, see compute_facet.
+Returns:
+    A dictionary with, for every sensitive variable, the 'redundancy' of every variable with it and its 'change' from
+    the whole dataset, as tables with the left out column as rows (SWEEP_BASELINE for the whole dataset) and the
+    variables as columns. A left out column has NaN values in its own row.
+'''
+def compute_facet_sweep(sensitive_variables, data, target_var, drop_columns, random_seed=RANDOM_STATE, layout='nested', workers=None, **options):
+    check_layout(layout)
+    if(sensitive_variables is None):
+        raise ValueError("Sensitive Variables needed for FACET")
+    if(data is None):
+        raise ValueError("Data needed for FACET")
+    if not drop_columns:
+        raise ValueError("Columns to leave out needed for the FACET sweep")
+    df = pd.DataFrame(data)
+    missing_cols = [col for col in drop_columns if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Column(s) {missing_cols} not found in the data columns for FACET")
+    kept_cols = [col for col in drop_columns if col in sensitive_variables or col == target_var]
+    if kept_cols:
+        raise ValueError(f"Column(s) {kept_cols} are sensitive or target variables and cannot be left out for FACET")
+
+    drops = [None] + list(dict.fromkeys(drop_columns))
+    matrices = parallel_matrices(sensitive_variables, df, [(target_var, drop) for drop in drops], random_seed, workers, options)
+
+    # One table per sensitive variable, with the variables in the order of the dataset
+    features = [col for col in df.columns if col != target_var]
+    labels = [SWEEP_BASELINE] + [str(drop) for drop in drops[1:]]
+    results = {}
+    for var in sensitive_variables:
+        redundancy = np.array([matrix[var].reindex(features).to_numpy(dtype=float) for matrix in matrices]) * 100
+        results[var] = {
+            'redundancy': ResultMatrix(redundancy, labels, features, REDUNDANCY_DECIMALS).to_layout(layout),
+            'change': ResultMatrix(redundancy - redundancy[0], labels, features, REDUNDANCY_DECIMALS).to_layout(layout),
+        }
+    return results
+
+'''
+Computes the redundancy with the sensitive variables for several target variables, such as candidate targets of the
+same dataset. The dataset is checked once and the targets are fitted in parallel worker processes, which split the
+CPUs of the current resource governor job between them.
+Parameters:
+    sensitive_variables: list of variables to analyze for redundancy.
+    data: a dataframe containing the dataset to be analyzed.
+    target_vars: the target variables. They cannot be sensitive variables.
+    random_seed: the random seed for computation, shared by every fit.
+    layout: 'nested' (default) or 'columnar', see ResultMatrix.
+    workers: the number of worker processes. Defaults to the CPUs granted by the resource governor, or SWEEP_WORKERS.
+    options: the FACET options, see compute_facet.
+Returns:
+    A dictionary where the keys are target variables and the values are their redundancy results, see compute_facet.
+'''
+def compute_facet_batch(sensitive_variables, data, target_vars, random_seed=RANDOM_STATE, layout='nested', workers=None, **options):
+    check_layout(layout)
+    if(sensitive_variables is None):
+        raise ValueError("Sensitive Variables needed for FACET")
+    if(data is None):
+        raise ValueError("Data needed for FACET")
+    if not target_vars:
+        raise ValueError("Target Variable(s) needed for FACET")
+    df = pd.DataFrame(data)
+    missing_vars = [var for var in sensitive_variables if var not in df.columns]
+    if missing_vars:
+        raise ValueError(f"Sensitive variable(s) {missing_vars} not found in the data columns for FACET")
+    missing_targets = [target for target in target_vars if target not in df.columns]
+    if missing_targets:
+        raise ValueError(f"Target variable(s) {missing_targets} not found in the data columns for FACET")
+    sensitive_targets = [target for target in target_vars if target in sensitive_variables]
+    if sensitive_targets:
+        raise ValueError(f"Target variable(s) {sensitive_targets} are sensitive variables for FACET")
+
+    targets = list(dict.fromkeys(target_vars))
+    matrices = parallel_matrices(sensitive_variables, df, [(target, None) for target in targets], random_seed, workers, options)
+
+    # Extract the values for sensitive variables as percentages, as in compute_facet
+    results = {}
+    for target, matrix in zip(targets, matrices):
+        values = matrix.to_numpy(dtype=float).T * 100
+        results[target] = ResultMatrix(values, sensitive_variables, matrix.index, REDUNDANCY_DECIMALS).to_layout(layout)
+    return results
+
+'''
+Reports the bootstrap error of the redundancy values of compute_facet when only a subsample of the rows is explained.
+Takes the same parameters as compute_facet, and reuses its fit.
+Returns:
+    A dictionary with the number of 'explained_rows' and the 'redundancy_error', the bootstrap standard errors of the
+    redundancy percentages in the same layout as the redundancy values, or None when every row is explained.
+'''
+def compute_facet_error(sensitive_variables, data, target_var, random_seed=RANDOM_STATE, layout='nested', search='grid', learner='random_forest', explain_rows=None, pairs='all', mode='exact', repeats=KFOLD_REPEATS, candidates=None, memo=None, memo_mode='best'):
+    check_layout(layout)
+    model = facet_model(sensitive_variables, data, target_var, random_seed, search, learner, explain_rows, pairs, mode, repeats, candidates, memo, memo_mode)
+    if explain_rows is None:
+        return {'explained_rows': model['explained_rows'], 'redundancy_error': None}
+
+    # Same rows and columns as the redundancy values
+    if pairs == 'sensitive':
+        random_seed = 0 if random_seed < 0 else random_seed
+        error_df = redundancy_error(model['inspector'], random_seed=random_seed, columns=sensitive_variables)
     else:
-        maxDepth = [50,60,70]
-    
-    # Define the parameter space for hyperparameter tuning
-    rnd_forest_ps = ParameterSpace(rnd_forest_reg)
-    rnd_forest_ps.regressor.min_samples_leaf = min_samples_leaf
-    rnd_forest_ps.regressor.max_depth = maxDepth
+        error_df = model['redundancy_error'].loc[model['redundancy'].index, sensitive_variables]
+    error = error_df.to_numpy(dtype=float).T * 100
+    return {'explained_rows': model['explained_rows'],
+            'redundancy_error': ResultMatrix(error, sensitive_variables, error_df.index, REDUNDANCY_DECIMALS).to_layout(layout)}
 
-    # Configure cross-validation
-    rkf_cv = RepeatedKFold(n_splits=KFOLD_SPLITS, n_repeats=KFOLD_REPEATS, random_state=random_seed)
-
-    # Select the best model using GridSearchCV over the defined parameter space
-    selector = LearnerSelector(
-        searcher_type=GridSearchCV,
-        parameter_space=rnd_forest_ps,
-        cv=rkf_cv,
-        n_jobs=LEARNER_SELECTOR_JOBS,
-        scoring="r2"
-    ).fit(data_sample)
-
-    # Compute the feature redundancy matrix from model (time-consuming)
-    inspector = LearnerInspector(model=selector.best_estimator_, n_jobs=-3).fit(data_sample)
-    redundancy_matrix = inspector.feature_redundancy_matrix()
-    redundancy_df = redundancy_matrix.to_frame()
-
-    # Extract redundancy values for sensitive variables and format them to 5 decimal places, handling NaN values
-    result = redundancy_df[sensitive_variables].to_dict()
-    for item in result:
-
-        # result[item] = {col:"NaN" if pd.isna(val) else f"{round(float(val*100),5)}%" for col,val in result[item].items()}
-        result[item] = {col:"NaN" if pd.isna(float(val)) else round(float(val*100),5) for col,val in result[item].items()}
-    
-    return result
+'''
+Reports the hyperparameters compute_facet selected, and whether they were memoized. Takes the same parameters as
+compute_facet, without the layout and metric, and reuses its fit.
+Returns:
+    A dictionary with 'memoized', whether the search was skipped or narrowed by the memoized best hyperparameters of
+    the dataset, and the selected 'hyperparameters' of the surrogate learner.
+'''
+def compute_facet_selection(sensitive_variables, data, target_var, random_seed=RANDOM_STATE, search='grid', learner='random_forest', explain_rows=None, pairs='all', mode='exact', repeats=KFOLD_REPEATS, candidates=None, memo=None, memo_mode='best'):
+    model = facet_model(sensitive_variables, data, target_var, random_seed, search, learner, explain_rows, pairs, mode, repeats, candidates, memo, memo_mode)
+    grid = facet_learner(learner, len(data))[1]
+    params = model['selector'].best_estimator_.regressor.get_params()
+    return {'memoized': model['memoized'], 'hyperparameters': {name: params[name] for name in grid}}
 
 #test dataset takes about one minute to run in the default configuration
 '''
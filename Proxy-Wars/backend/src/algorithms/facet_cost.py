@@ -0,0 +1,193 @@
+'''
+facet_cost.py
+This program implements the cost model that predicts the wall time and peak memory of FACET jobs before they run.
+
+Key Features:
+    - Counts the work of the two phases of FACET: the cross-validated model selection grows
+      candidates x fits x estimators trees over rows x columns x depth, and the inspector walks
+      explained rows x estimators x leaves x depth^2 tree paths, times the columns for SHAP interaction values.
+    - Turns work into seconds with a fixed cost, a cost per fitted model and a cost per unit of work for every phase and
+      learner. The default coefficients were fitted by least squares to the runs in test/docs/facet_cost_model.csv,
+      on a single CPU. Every finished FACET run then rescales the predictions by the median ratio of the most recent
+      observed to predicted wall times, so the model follows the machine it runs on.
+    - Predicts the peak memory from the copies of the rows held by the workers and the SHAP values of the explained rows.
+'''
+
+
+import math
+import threading
+from collections import deque
+import numpy as np
+
+# Fixed seconds, seconds per fitted model and seconds per unit of work of every phase and learner, fitted to
+# test/docs/facet_cost_model.csv
+COST_COEFFICIENTS = {
+    ('selection', 'random_forest'): (0.0, 5.6e-2, 1.9e-8),
+    ('selection', 'extra_trees'): (4.1, 1.7e-2, 6.7e-9),
+    ('selection', 'hist_gradient_boosting'): (8.0, 0.0, 4.4e-9),
+    ('inspector', 'random_forest'): (0.0, 0.0, 1.4e-9),
+    ('inspector', 'extra_trees'): (0.1, 0.0, 3.0e-9),
+    ('inspector', 'hist_gradient_boosting'): (0.0, 0.0, 1.1e-8),
+}
+# Number of observed runs kept per phase and learner
+COST_HISTORY = 20
+# Bytes of a value of the data and of the SHAP values
+VALUE_BYTES = 8
+# Estimated number of copies of the SHAP values held in memory while projecting them
+SHAP_MEMORY_COPIES = 4
+
+'''
+Estimates the work of the cross-validated model selection.
+Parameters:
+    rows: the number of rows.
+    columns: the number of features.
+    candidates: the number of hyperparameter candidates.
+    fits: the number of cross-validation fits per candidate.
+    estimators: the number of trees, or boosting iterations, per fit.
+    depth: the effective depth of the trees.
+    halving_factor: None for an exhaustive search, or the factor of successive halving, which keeps 1/factor of the
+        candidates for each factor times larger subset of the rows.
+Returns:
+    The work, in tree nodes times rows.
+'''
+def selection_work(rows, columns, candidates, fits, estimators, depth, halving_factor=None):
+    per_row = columns * estimators * depth
+    if halving_factor is None:
+        return (candidates * fits + 1) * rows * per_row
+
+    # Every iteration keeps a factor fewer candidates on a factor more rows, ending on all rows
+    iterations = max(math.ceil(math.log(max(candidates, 1), halving_factor)), 1)
+    work = 0
+    remaining = candidates
+    for iteration in range(iterations):
+        work += remaining * fits * rows / halving_factor ** (iterations - 1 - iteration)
+        remaining = max(math.ceil(remaining / halving_factor), 1)
+    return (work + rows) * per_row
+
+'''
+Counts the models fitted by the cross-validated model selection.
+Parameters:
+    candidates: the number of hyperparameter candidates.
+    fits: the number of cross-validation fits per candidate.
+    halving_factor: None for an exhaustive search, or the factor of successive halving.
+Returns:
+    The number of fitted models, including the refit of the best candidate.
+'''
+def selection_fits(candidates, fits, halving_factor=None):
+    if halving_factor is None:
+        return candidates * fits + 1
+    iterations = max(math.ceil(math.log(max(candidates, 1), halving_factor)), 1)
+    total = 0
+    remaining = candidates
+    for _ in range(iterations):
+        total += remaining * fits
+        remaining = max(math.ceil(remaining / halving_factor), 1)
+    return total + 1
+
+'''
+Estimates the work of the inspector, which computes TreeSHAP values for the explained rows.
+Parameters:
+    explain_rows: the number of explained rows.
+    columns: the number of features.
+    estimators: the number of trees.
+    leaves: the number of leaves per tree.
+    depth: the effective depth of the trees.
+    interactions: whether SHAP interaction values are computed, which costs a factor columns more.
+Returns:
+    The work, in tree paths times rows.
+'''
+def inspector_work(explain_rows, columns, estimators, leaves, depth, interactions=True):
+    work = explain_rows * estimators * leaves * depth ** 2
+    return work * columns if interactions else work
+
+'''
+Estimates the peak memory of a FACET job.
+Parameters:
+    rows: the number of rows.
+    columns: the number of features.
+    explain_rows: the number of explained rows.
+    workers: the number of worker processes holding a copy of the rows.
+    interactions: whether SHAP interaction values are kept, a matrix of columns x columns per row.
+Returns:
+    The number of bytes.
+'''
+def peak_memory(rows, columns, explain_rows, workers=1, interactions=True):
+    data_bytes = rows * (columns + 1) * VALUE_BYTES * (workers + 1)
+    width = (columns + 1) ** 2 if interactions else columns + 1
+    return int(data_bytes + explain_rows * width * VALUE_BYTES * SHAP_MEMORY_COPIES)
+
+'''
+The coefficients turning work into seconds, rescaled by the observed runs.
+Parameters:
+    coefficients: the default (fixed seconds, seconds per fitted model, seconds per unit of work), by (phase, learner).
+    history: the number of observed runs kept per phase and learner.
+'''
+class CostModel:
+
+    def __init__(self, coefficients=COST_COEFFICIENTS, history=COST_HISTORY):
+        self.coefficients = dict(coefficients)
+        self.history = history
+        self.observed = {}
+        self.lock = threading.Lock()
+
+    '''
+    Parameters:
+        phase: 'selection' or 'inspector'.
+        learner: the surrogate learner.
+        fits: the number of fitted models of the phase, 1 for the inspector.
+        work: the work of the phase, see selection_work and inspector_work.
+    Returns:
+        The wall time of the phase in seconds predicted by the default coefficients.
+    '''
+    def default_seconds(self, phase, learner, fits, work):
+        fixed, per_fit, per_work = self.coefficients[(phase, learner)]
+        return fixed + fits * per_fit + work * per_work
+
+    '''
+    Records a finished phase of a run.
+    Parameters:
+        phase: 'selection' or 'inspector'.
+        learner: the surrogate learner.
+        fits: the number of fitted models of the phase.
+        work: the work of the phase.
+        seconds: the wall time of the phase.
+    '''
+    def observe(self, phase, learner, fits, work, seconds):
+        predicted = self.default_seconds(phase, learner, fits, work)
+        if predicted <= 0 or seconds <= 0:
+            return
+        with self.lock:
+            self.observed.setdefault((phase, learner), deque(maxlen=self.history)).append(seconds / predicted)
+
+    '''
+    Parameters:
+        phase: 'selection' or 'inspector'.
+        learner: the surrogate learner.
+    Returns:
+        The factor the default predictions are scaled by: the median ratio of observed to predicted wall times of the
+        recent runs, or 1 without any.
+    '''
+    def scale(self, phase, learner):
+        with self.lock:
+            ratios = list(self.observed.get((phase, learner), []))
+        return float(np.median(ratios)) if ratios else 1.0
+
+    '''
+    Parameters:
+        phase: 'selection' or 'inspector'.
+        learner: the surrogate learner.
+        fits: the number of fitted models of the phase.
+        work: the work of the phase.
+    Returns:
+        The predicted wall time of the phase in seconds.
+    '''
+    def seconds(self, phase, learner, fits, work):
+        return self.default_seconds(phase, learner, fits, work) * self.scale(phase, learner)
+
+    '''
+    Returns:
+        A dictionary with the number of observed runs of every phase and learner.
+    '''
+    def observations(self):
+        with self.lock:
+            return {f"{phase}/{learner}": len(ratios) for (phase, learner), ratios in self.observed.items()}
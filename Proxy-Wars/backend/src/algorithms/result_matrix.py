@@ -0,0 +1,108 @@
+'''
+result_matrix.py
+This program implements the result container shared by the analysis algorithms.
+
+Key Features:
+    - Keeps a matrix of scores as a NumPy array with row labels (usually the sensitive variables) and column labels.
+    - Rounds the whole matrix and finds its NaN values in one vectorized step instead of cell by cell.
+    - Produces the nested {row: {column: value}} dictionaries returned by the algorithms, or a compact columnar
+      layout {rows, columns, values} in which missing values are null, and serializes either one straight to JSON.
+'''
+
+
+import json
+import numpy as np
+
+# Result layouts: nested dictionaries (the default) or labels with a list of rows of values
+LAYOUTS = ['nested', 'columnar']
+# Value of missing results in the nested layout
+NESTED_MISSING = "NaN"
+
+'''
+Checks that a result layout is supported.
+Parameters:
+    layout: the name of the layout.
+Returns:
+    The layout. An unknown layout raises a ValueError.
+'''
+def check_layout(layout):
+    if layout not in LAYOUTS:
+        raise ValueError(f"layout must be one of {LAYOUTS}, '{layout}' was supplied")
+    return layout
+
+'''
+Rounds an array of values and turns it into Python lists, replacing missing values.
+Parameters:
+    values: a float array.
+    decimals: the number of decimal places to round to, or None to keep full precision.
+    missing: the value that replaces NaN values.
+Returns:
+    Nested lists with the shape of values.
+'''
+def round_values(values, decimals, missing):
+    values = np.asarray(values, dtype=float)
+    rounded = values if decimals is None else np.round(values, decimals)
+    cells = rounded.tolist()
+
+    # Only the missing cells are visited in Python
+    missing_positions = np.argwhere(np.isnan(values))
+    if values.ndim == 1:
+        for (i,) in missing_positions:
+            cells[i] = missing
+    else:
+        for i, j in missing_positions:
+            cells[i][j] = missing
+    return cells
+
+'''
+A labelled matrix of analysis results.
+Parameters:
+    values: a 2D float array of shape (len(rows), len(columns)).
+    rows: the row labels, usually the sensitive variables.
+    columns: the column labels.
+    decimals: the number of decimal places the values are rounded to, or None to keep full precision.
+'''
+class ResultMatrix:
+
+    def __init__(self, values, rows, columns, decimals=None):
+        self.values = np.asarray(values, dtype=float)
+        self.rows = list(rows)
+        self.columns = list(columns)
+        self.decimals = decimals
+
+        if self.values.shape != (len(self.rows), len(self.columns)):
+            raise ValueError(f"Result of shape {self.values.shape} does not match {len(self.rows)} rows and {len(self.columns)} columns")
+
+    '''
+    Returns:
+        A dictionary where the keys are the row labels and the values are dictionaries of the values of every column,
+        with "NaN" for missing values.
+    '''
+    def to_dict(self):
+        cells = round_values(self.values, self.decimals, NESTED_MISSING)
+        return {row: dict(zip(self.columns, values)) for row, values in zip(self.rows, cells)}
+
+    '''
+    Returns:
+        A dictionary with the 'rows' and 'columns' labels and the 'values' as a list of rows, with None for missing values.
+    '''
+    def to_columnar(self):
+        return {'rows': self.rows, 'columns': self.columns, 'values': round_values(self.values, self.decimals, None)}
+
+    '''
+    Parameters:
+        layout: one of LAYOUTS.
+    Returns:
+        The result in the given layout.
+    '''
+    def to_layout(self, layout):
+        return self.to_columnar() if check_layout(layout) == 'columnar' else self.to_dict()
+
+    '''
+    Parameters:
+        layout: one of LAYOUTS.
+    Returns:
+        The result in the given layout as a compact JSON string.
+    '''
+    def to_json(self, layout='columnar'):
+        return json.dumps(self.to_layout(layout), separators=(',', ':'))
@@ -0,0 +1,316 @@
+'''
+stability.py
+This program implements the bootstrap stability mode, which runs an analysis on many random samples of a dataset and
+summarizes how much every score of a sensitive variable with a column varies between the samples.
+
+Key Features:
+    - Draws B samples of a percentage of the rows with consecutive seeds, each one the sample /random draws for its seed.
+    - Runs Correlational Analysis, FACET or Association Rule Mining on every sample in a process pool, whose workers
+      split the CPUs of the current resource governor job between them.
+    - Reports the mean, standard deviation and quantiles of every score over the samples, and the share of the samples
+      in which the score has a value, ignoring the samples without one.
+    - Correlation converts the dataset to a float matrix and dense ranks its columns once, and hands both to the
+      workers through shared memory. The rows of a sample keep the order and ties of the whole column, so Kendall
+      reuses the dense ranks as they are, and the average ranks of Spearman are counted from them instead of sorting
+      every sample again.
+    - Association Rule Mining scores a pair by the best rule linking them, see rule_scores.
+    - Formats the summaries vectorized through ResultMatrix, as nested dictionaries or in a compact columnar layout.
+'''
+
+
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import pandas as pd
+import numpy as np
+
+# The algorithms are imported as a package by the tests and from the algorithms directory by api.py
+try:
+    from algorithms.result_matrix import ResultMatrix, check_layout
+    from algorithms.corr import CORR_METHODS, CORR_DECIMALS, to_float_matrix, dense_rank_columns, pearson_block, spearman_block, kendall_block, share_matrix
+    from algorithms.facet_alg import sweep_matrix, REDUNDANCY_DECIMALS
+    from algorithms.arm import mine_rules, rule_scores, RULE_METRICS, METRIC_DECIMALS
+except ImportError:
+    from result_matrix import ResultMatrix, check_layout
+    from corr import CORR_METHODS, CORR_DECIMALS, to_float_matrix, dense_rank_columns, pearson_block, spearman_block, kendall_block, share_matrix
+    from facet_alg import sweep_matrix, REDUNDANCY_DECIMALS
+    from arm import mine_rules, rule_scores, RULE_METRICS, METRIC_DECIMALS
+try:
+    from util.resource_governor import job_cpus, granted_cpus, worker_context
+except ImportError:
+    from resource_governor import job_cpus, granted_cpus, worker_context
+
+# Algorithms the stability mode runs, named as in /algorithm
+STABILITY_ALGORITHMS = ['Correlational Analysis', 'FACET', 'Association Rule Mining']
+# Quantiles of every score reported over the samples
+STABILITY_QUANTILES = [.05, .5, .95]
+# Largest number of samples of a stability job
+STABILITY_MAX_SAMPLES = 200
+# Default number of worker processes outside of a resource governor job
+STABILITY_WORKERS = 1
+# Number of decimal places the share of the samples with a value is rounded to
+FREQUENCY_DECIMALS = 3
+
+'''
+Draws the positions of a random sample of the rows, the same rows sample_dataset of api.py draws with the same seed.
+Parameters:
+    rows: the number of rows.
+    percentage: the percentage of the rows to sample, in (0, 100].
+    seed: the random seed for sampling.
+Returns:
+    A 1D int array of the positions of the sampled rows, in the order of the sample.
+'''
+def sample_positions(rows, percentage, seed):
+    if percentage >= 100:
+        return np.arange(rows)
+    return pd.RangeIndex(rows).to_series().sample(frac=float(percentage) / 100.0, random_state=seed).to_numpy()
+
+'''
+Computes the average ranks of the rows of a sample from the dense ranks of the whole columns. Counting the rows of
+every dense rank replaces sorting the sample, and gives the ranks rank_columns gives for the sample's own values.
+Parameters:
+    dense_ranks: the dense ranks of the rows of the sample, as returned by dense_rank_columns for all rows.
+Returns:
+    A 2D float array of the same shape holding the average column ranks within the sample, missing values kept missing.
+'''
+def sample_ranks(dense_ranks):
+    ranks = np.full(dense_ranks.shape, np.nan)
+    for j in range(dense_ranks.shape[1]):
+        valid = np.isfinite(dense_ranks[:, j])
+        codes = dense_ranks[valid, j].astype(np.int64)
+        if len(codes) == 0:
+            continue
+        # Rows with a smaller value come first, rows with the same value share the average of their ranks
+        counts = np.bincount(codes)
+        ranks[valid, j] = (np.cumsum(counts) - counts)[codes] + (counts[codes] + 1) / 2
+    return ranks
+
+'''
+Computes the correlation blocks of the sensitive variables of one sample.
+Parameters:
+    matrix: the float matrix of all rows, see to_float_matrix.
+    dense_ranks: the dense column ranks of all rows, see dense_rank_columns.
+    positions: the positions of the sensitive variables in the matrix.
+    rows: the positions of the rows of the sample.
+    methods: the correlation methods to compute.
+Returns:
+    A dictionary mapping each method to a (k, N) array of correlations.
+'''
+def corr_sample_blocks(matrix, dense_ranks, positions, rows, methods=CORR_METHODS):
+    y = matrix[rows]
+    x = y[:, positions]
+    blocks = {}
+    if 'pearson' in methods:
+        blocks['pearson'] = pearson_block(x, y)[0]
+    if 'spearman' in methods:
+        ranks = sample_ranks(dense_ranks[rows])
+        blocks['spearman'] = spearman_block(x, y, ranks[:, positions], ranks)[0]
+    if 'kendall' in methods:
+        # Kendall only needs the order and ties of the values, which the dense ranks of all rows keep
+        same_column = np.arange(matrix.shape[1])[None, :] == np.array(positions)[:, None]
+        codes = dense_ranks[rows]
+        blocks['kendall'] = kendall_block(x, y, same_column, codes[:, positions], codes)[0]
+    return blocks
+
+'''
+Computes the correlation blocks of some samples in a worker process, reading the data from shared memory.
+Parameters:
+    name: the name of the shared memory block holding the float matrix followed by its dense ranks.
+    shape: the shape of the float matrix.
+    positions: the positions of the sensitive variables in the matrix.
+    samples: the positions of the rows of every sample.
+    methods: the correlation methods to compute.
+    cpus: the CPUs of the worker.
+Returns:
+    The list of the correlation blocks of the samples, see corr_sample_blocks.
+'''
+def _corr_samples(name, shape, positions, samples, methods, cpus):
+    memory = shared_memory.SharedMemory(name=name)
+    try:
+        shared = np.ndarray((shape[0], 2 * shape[1]), dtype=float, buffer=memory.buf, order='F')
+        with granted_cpus(cpus):
+            blocks = [corr_sample_blocks(shared[:, :shape[1]], shared[:, shape[1]:], positions, rows, methods) for rows in samples]
+        # Views of the shared buffer have to be released before the buffer is closed
+        del shared
+        return blocks
+    finally:
+        memory.close()
+
+'''
+Computes the FACET redundancy of the sensitive variables of one sample, in a worker process.
+Parameters:
+    sensitive_variables: list of variables to analyze for redundancy.
+    sample: the rows of the sample.
+    target_var: the target variable for building the prediction model.
+    random_seed: the random seed of FACET, the seed of the sample.
+    options: the FACET options, see compute_facet.
+    cpus: the CPUs of the worker.
+Returns:
+    A (k, N) array of the redundancy percentages, with the features other than the target variable as columns.
+'''
+def facet_sample_scores(sensitive_variables, sample, target_var, random_seed, options, cpus):
+    matrix = sweep_matrix(sensitive_variables, sample, target_var, None, random_seed, cpus, options)
+    features = [col for col in sample.columns if col != target_var]
+    return matrix[sensitive_variables].reindex(features).to_numpy(dtype=float).T * 100
+
+'''
+Scores the pairs of the sensitive variables and the columns of one sample by association rules, in a worker process.
+Parameters:
+    sensitive_variables: list of variables to score.
+    sample: the rows of the sample.
+    random_seed: the random seed of the optimization, the seed of the sample.
+    cpus: the CPUs of the worker.
+Returns:
+    A dictionary mapping every metric of RULE_METRICS to a (k, N) array, see rule_scores.
+'''
+def arm_sample_scores(sensitive_variables, sample, random_seed, cpus):
+    with granted_cpus(cpus):
+        return rule_scores(mine_rules(sample, random_seed), sensitive_variables, sample.columns)
+
+'''
+Runs tasks in parallel worker processes, which split the CPUs of the current resource governor job between them.
+Parameters:
+    function: the function run by the workers. Its last parameter is the number of CPUs of the worker.
+    tasks: the list of the arguments of every call, without the CPUs.
+    workers: the number of worker processes. Defaults to the CPUs granted by the resource governor, or STABILITY_WORKERS.
+Returns:
+    The list of the results of the tasks, in order.
+'''
+def parallel_samples(function, tasks, workers=None):
+    cpus = job_cpus(STABILITY_WORKERS)
+    workers = min(workers or cpus, len(tasks))
+    task_cpus = max(cpus // workers, 1)
+    if workers <= 1:
+        return [function(*task, task_cpus) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=worker_context()) as pool:
+        return list(pool.map(function, *zip(*tasks), [task_cpus] * len(tasks)))
+
+'''
+Computes the correlations of every sample. The float matrix and dense ranks of all rows are computed once, and handed
+to the worker processes in shared memory, every worker computing a contiguous share of the samples.
+Parameters:
+    df: a dataframe containing the dataset to be analyzed.
+    sensitive_variables: list of variables to correlate with every column.
+    samples: the positions of the rows of every sample.
+    methods: the correlation methods to compute.
+    workers: the number of worker processes, see parallel_samples.
+Returns:
+    A dictionary mapping each method to a (B, k, N) array of correlations.
+'''
+def corr_samples(df, sensitive_variables, samples, methods=CORR_METHODS, workers=None):
+    matrix = to_float_matrix(df)
+    dense_ranks = dense_rank_columns(matrix)
+    positions = [df.columns.get_loc(var) for var in sensitive_variables]
+
+    workers = min(workers or job_cpus(STABILITY_WORKERS), len(samples))
+    if workers <= 1:
+        blocks = [corr_sample_blocks(matrix, dense_ranks, positions, rows, methods) for rows in samples]
+    else:
+        memory = share_matrix(np.hstack([matrix, dense_ranks]))
+        try:
+            shares = np.array_split(np.arange(len(samples)), workers)
+            tasks = [(memory.name, matrix.shape, positions, [samples[i] for i in share], list(methods)) for share in shares]
+            blocks = [block for share in parallel_samples(_corr_samples, tasks, workers) for block in share]
+        finally:
+            memory.close()
+            memory.unlink()
+    return {method: np.array([block[method] for block in blocks]) for method in methods}
+
+'''
+Summarizes the scores of every sample.
+Parameters:
+    scores: a (B, k, N) array of the scores of B samples, NaN where a sample has no score.
+    rows: the row labels of the scores.
+    columns: the column labels of the scores.
+    decimals: the number of decimal places to round the scores to.
+    layout: 'nested' or 'columnar', see ResultMatrix.
+    quantiles: the quantiles to report, between 0 and 1.
+Returns:
+    A dictionary with the 'mean', the 'std' (standard deviation) and the 'quantiles' of the scores of the samples that
+    have one, keyed by quantile, and the 'frequency', the share of the samples that have one. Scores with no value in
+    any sample are missing, as is the standard deviation of scores with a value in a single sample.
+'''
+def summarize_scores(scores, rows, columns, decimals, layout='nested', quantiles=STABILITY_QUANTILES):
+    scores = np.asarray(scores, dtype=float)
+    # Scores without enough values are missing, which NumPy warns about
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nanmean(scores, axis=0)
+        std = np.nanstd(scores, axis=0, ddof=1)
+        bounds = np.nanquantile(scores, quantiles, axis=0)
+    return {
+        'mean': ResultMatrix(mean, rows, columns, decimals).to_layout(layout),
+        'std': ResultMatrix(std, rows, columns, decimals).to_layout(layout),
+        'quantiles': {str(q): ResultMatrix(bound, rows, columns, decimals).to_layout(layout) for q, bound in zip(quantiles, bounds)},
+        'frequency': ResultMatrix(np.isfinite(scores).mean(axis=0), rows, columns, FREQUENCY_DECIMALS).to_layout(layout),
+    }
+
+'''
+Runs an analysis on B random samples of a dataset, drawn with consecutive seeds, and summarizes how every score of a
+sensitive variable with a column varies between the samples.
+Parameters:
+    sensitive_variables: list of variables to analyze.
+    data: a dataframe containing the dataset to be analyzed.
+    algorithm: one of STABILITY_ALGORITHMS.
+    samples: the number of samples B, at most STABILITY_MAX_SAMPLES.
+    percentage: the percentage of the rows of every sample, in (0, 100].
+    random_seed: the seed of the first sample, the following samples using the next seeds. Every sample is analyzed
+        with its own seed, as /results analyzes the sample /random draws.
+    layout: 'nested' (default) or 'columnar', see ResultMatrix.
+    target_var: the target variable, needed for FACET.
+    workers: the number of worker processes. Defaults to the CPUs granted by the resource governor, or STABILITY_WORKERS.
+    quantiles: the quantiles to report, between 0 and 1.
+    methods: the correlation methods to compute, for Correlational Analysis.
+    options: the FACET options, see compute_facet.
+Returns:
+    A dictionary with the number of 'samples', the number of 'rows' of every sample, their 'seeds' and the 'results':
+    the summary of every score (a correlation method, the FACET metric in percent or a rule metric) as returned by
+    summarize_scores, with the sensitive variables as rows.
+'''
+def compute_stability(sensitive_variables, data, algorithm, samples, percentage, random_seed=0, layout='nested', target_var=None, workers=None, quantiles=STABILITY_QUANTILES, methods=CORR_METHODS, **options):
+    check_layout(layout)
+    if algorithm not in STABILITY_ALGORITHMS:
+        raise ValueError(f"algorithm must be one of {STABILITY_ALGORITHMS}, '{algorithm}' was supplied")
+    if not sensitive_variables:
+        raise ValueError("Sensitive Variables needed for the stability analysis")
+    if data is None:
+        raise ValueError("Data needed for the stability analysis")
+    if not 1 <= samples <= STABILITY_MAX_SAMPLES:
+        raise ValueError(f"The number of samples must be between 1 and {STABILITY_MAX_SAMPLES}, {samples} was supplied")
+    if not 0 < percentage <= 100:
+        raise ValueError(f"The percentage must be in (0, 100], {percentage} was supplied")
+    if any(not 0 <= q <= 1 for q in quantiles):
+        raise ValueError("Quantiles must be between 0 and 1")
+    df = pd.DataFrame(data)
+    missing_vars = [var for var in sensitive_variables if var not in df.columns]
+    if missing_vars:
+        raise ValueError(f"Sensitive variable(s) {missing_vars} not found in the data columns for the stability analysis")
+
+    seeds = [random_seed + b for b in range(samples)]
+    positions = [sample_positions(len(df), percentage, seed) for seed in seeds]
+
+    if algorithm == 'Correlational Analysis':
+        for method in methods:
+            if method not in CORR_METHODS:
+                raise ValueError(f"method must be one of {CORR_METHODS}, '{method}' was supplied")
+        columns = df.columns
+        scores = corr_samples(df, sensitive_variables, positions, methods, workers)
+        decimals = CORR_DECIMALS
+    elif algorithm == 'FACET':
+        if target_var not in df.columns:
+            raise ValueError(f"Target variable {target_var} not found in the data columns for FACET")
+        if target_var in sensitive_variables:
+            raise ValueError(f"Target variable {target_var} is a sensitive variable for FACET")
+        columns = [col for col in df.columns if col != target_var]
+        tasks = [(sensitive_variables, df.iloc[rows], target_var, seed, options) for rows, seed in zip(positions, seeds)]
+        scores = {options.get('metric', 'redundancy'): np.array(parallel_samples(facet_sample_scores, tasks, workers))}
+        decimals = REDUNDANCY_DECIMALS
+    else:
+        columns = df.columns
+        tasks = [(sensitive_variables, df.iloc[rows], seed) for rows, seed in zip(positions, seeds)]
+        sample_scores = parallel_samples(arm_sample_scores, tasks, workers)
+        scores = {metric: np.array([sample[metric] for sample in sample_scores]) for metric in RULE_METRICS}
+        decimals = METRIC_DECIMALS
+
+    results = {name: summarize_scores(values, sensitive_variables, columns, decimals, layout, quantiles) for name, values in scores.items()}
+    return {'samples': samples, 'rows': len(positions[0]), 'seeds': seeds, 'results': results}
@@ -4,16 +4,24 @@ This file defines API endpoints for a Flask application to handle the analysis o
 
 Endpoints:
     - /upload: Uploads a CSV file and processes the dataset.
-    - /algorithm: Selects an algorithm for analysis.
+    - /algorithm: Selects an algorithm for analysis (Correlation, FACET, ARM or Categorical Association).
     - /sensitive-variables: Updates the sensitive variables for analysis.
     - /random: Generates a random sample of the dataset.
-    - /results: Performs analysis based on the selected algorithm.
+    - /results: Performs analysis based on the selected algorithm. FACET can stream results over growing samples.
     - /columns: Retrieves the column names from the dataset.
     - /target-variable: Updates the target variable for the analysis.
+    - /stream-correlation: Computes Pearson correlations of a CSV file read in chunks, without loading it into memory.
+    - /facet-sweep: Computes how FACET redundancy changes as each of some columns is left out, in parallel fits.
+    - /facet-batch: Computes FACET redundancy for several target variables at once, in parallel fits.
+    - /stability: Runs an analysis on many random samples in parallel and summarizes how stable every score is.
+    - /estimate: Predicts the wall time and peak memory of a FACET run, and plans a cheaper run for a latency budget.
+    - /resources: Reports the CPUs and memory used by the running and queued analysis jobs.
 '''
 
 
-from flask import Flask, request, jsonify, Blueprint
+from flask import Flask, Response, request, jsonify, Blueprint
+from itertools import chain
+import json
 import pandas as pd
 import numpy as np
 import pandasql as ps
@@ -21,10 +29,21 @@ import pandasql as ps
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'algorithms')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'util')))
 
-from corr import compute_corr
-from facet_alg import compute_facet
+from corr import compute_corr, compute_corr_approx
+from corr_stream import compute_corr_chunked, PearsonAccumulator, CHUNK_ROWS
+from assoc import compute_assoc
+from facet_alg import compute_facet, compute_facet_error, compute_facet_selection, compute_facet_sweep, compute_facet_batch, estimate_facet, plan_facet, cost_model, SEARCH_STRATEGIES, LEARNERS, REDUNDANCY_PAIRS, REDUNDANCY_MODES, MATRICES, MEMO_MODES
 from arm import compute_arm
+from stability import compute_stability, STABILITY_ALGORITHMS, STABILITY_MAX_SAMPLES
+from result_matrix import LAYOUTS
+from result_cache import ResultCache, cache_key, fingerprint_dataframe
+# The algorithms import the governor as util.resource_governor when src is on the path, and its job CPUs must be shared with them
+try:
+    from util.resource_governor import ResourceGovernor, ResourceBusyError, QUEUE_TIMEOUT
+except ImportError:
+    from resource_governor import ResourceGovernor, ResourceBusyError, QUEUE_TIMEOUT
 
 # Initialize a Flask Blueprint for the API routes
 route_bp = Blueprint('api',__name__)
@@ -35,7 +54,7 @@ data = None
 # A random sample of the dataset
 sampled_data = None
 
-# The selected algorithm (Correlation, FACET, ARM)
+# The selected algorithm (Correlation, FACET, ARM, Categorical Association)
 selected_algorithm = None
 
 # The sensitive variables chosen by the user
@@ -46,18 +65,415 @@ target_variable = None
 
 # The columns of the dataset
 columns = []
+# Fingerprint of the uploaded dataset, under which FACET memoizes the best hyperparameters of its samples and subsets,
+# computed the first time the memo is used
+dataset_fingerprint = None
+# Pearson sufficient statistics of the uploaded dataset as a tuple (dataframe, statistics), accumulated by the first
+# Pearson query on all of its rows
+corr_statistics = None
+# The categories of the dictionary-encoded text columns, where a category's code is its position
+category_levels = {}
+
+# Cache of /results responses, keyed by the analyzed rows and the analysis parameters
+result_cache = ResultCache()
+# The /results parameters that change the analysis or its response, and so the result cache key. Parameters such as
+# the queue timeout only affect how the request is served
+RESULT_CACHE_ARGUMENTS = ['mode', 'epsilon', 'confidence', 'columns', 'significance', 'format', 'metrics', 'search',
+                          'learner', 'explain_rows', 'pairs', 'budget', 'memo']
+# The dataframe last fingerprinted for the result cache and its fingerprint
+fingerprinted = (None, None)
+# Budget of CPUs and memory shared by concurrent /results calls
+governor = ResourceGovernor()
+
+# Algorithms that run in parallel and get every free CPU, the others run on one CPU
+PARALLEL_ALGORITHMS = ['Correlational Analysis', 'FACET']
+# Estimated number of copies of the analyzed rows held in memory by an analysis
+JOB_MEMORY_COPIES = 4
+# Estimated number of copies of the SHAP values held in memory by FACET
+FACET_MEMORY_COPIES = 4
+
+# Percentages of the selected rows progressive FACET runs on, in order
+PROGRESSIVE_PERCENTAGES = [10, 25, 50, 100]
+# Smallest number of rows progressive FACET runs on, smaller samples are skipped
+PROGRESSIVE_MIN_ROWS = 50
+
+# Widest dataset whose Pearson statistics are cached, wider ones are correlated from their rows on every query
+CORR_STATISTICS_MAX_COLUMNS = 500
+# Largest estimated memory, in bytes, of accumulating the Pearson statistics of a dataset
+CORR_STATISTICS_MAX_MEMORY = 512 * 2 ** 20
+# Estimated number of copies of the rows held in memory while accumulating the Pearson statistics
+CORR_STATISTICS_ROW_COPIES = 5
+# Number of column-by-column matrices of the Pearson statistics
+CORR_STATISTICS_MATRICES = 6
+
+# Default number of samples of a stability job
+STABILITY_SAMPLES = 20
+
+# Text columns with more distinct values than this are treated as identifiers and dropped
+UPLOAD_MAX_CATEGORIES = 100
 # Random seed for reproducibility
 seed = 0  
 
+'''
+Cleans an uploaded dataset: drops a leading id column, dictionary-encodes text columns into compact integer codes
+and keeps the numerical columns.
+Parameters:
+    df: a dataframe read from the uploaded CSV file.
+    encode_categoricals: whether text columns are encoded. When False they are dropped.
+Returns:
+    A tuple (df, levels) of the cleaned dataframe and a dictionary of the categories of every encoded column.
+'''
+def prepare_dataset(df, encode_categoricals=True):
+    # Remove the first column if it contains 'id'
+    if 'id' in df.columns[0].lower():
+        df = df.drop(columns=[df.columns[0]])
+
+    # Encode text columns with few enough distinct values, missing values stay missing
+    levels = {}
+    if encode_categoricals:
+        df = df.copy()
+        for col in df.select_dtypes(exclude=[np.number]).columns:
+            codes, categories = pd.factorize(df[col])
+            if len(categories) > UPLOAD_MAX_CATEGORIES:
+                continue
+            if (codes < 0).any():
+                df[col] = np.where(codes < 0, np.nan, codes).astype(np.float32)
+            else:
+                df[col] = pd.to_numeric(codes, downcast='integer')
+            levels[col] = [str(category) for category in categories]
+
+    # Retain only numerical columns
+    df = df.select_dtypes([np.number])
+    return df.apply(pd.to_numeric, errors='coerce'), levels
+
+'''
+Reads a CSV file in chunks, cleaning every chunk the same way as the first one.
+Parameters:
+    file: a path or file-like object of the CSV file.
+    chunksize: the number of rows per chunk.
+Returns:
+    A generator of cleaned dataframes.
+'''
+def read_dataset_chunks(file, chunksize):
+    columns = None
+    for chunk in pd.read_csv(file, chunksize=chunksize):
+        # The first chunk decides which columns are kept, later chunks are coerced to match
+        if columns is None:
+            chunk, _ = prepare_dataset(chunk, encode_categoricals=False)
+            columns = list(chunk.columns)
+        else:
+            chunk = chunk[columns].apply(pd.to_numeric, errors='coerce')
+        yield chunk
+
+'''
+Builds the JSON response of an analysis. Columnar results are serialized straight to compact JSON, so the payload
+is not walked and key-sorted again by jsonify.
+Parameters:
+    payload: the dictionary to return.
+    layout: the layout of the results in the payload, one of LAYOUTS.
+Returns:
+    A tuple (response, status code).
+'''
+def results_response(payload, layout):
+    if layout == 'columnar':
+        return Response(json.dumps(payload, separators=(',', ':')), mimetype='application/json'), 200
+    return jsonify(payload), 200
+
+'''
+Estimates the memory of an analysis from the size of the analyzed rows. FACET holds a matrix of SHAP interaction
+values per explained row, and plain SHAP values in approximate mode.
+Parameters:
+    rows: the dataframe the analysis runs on.
+    algorithm: the algorithm. Defaults to the selected algorithm.
+    options: the FACET options explain_rows and mode. Default to the parameters of the current request.
+Returns:
+    The estimated number of bytes.
+'''
+def job_memory(rows, algorithm=None, options=None):
+    row_count, column_count = rows.shape
+    if (algorithm or selected_algorithm) != 'FACET':
+        return row_count * column_count * 8 * JOB_MEMORY_COPIES
+
+    options = request.args if options is None else options
+    explain_rows = str(options.get('explain_rows') or '')
+    if explain_rows.isdigit():
+        row_count = min(row_count, int(explain_rows))
+    width = column_count + 1 if options.get('mode') == 'approximate' else (column_count + 1) ** 2
+    return row_count * width * 8 * FACET_MEMORY_COPIES
+
+'''
+Returns the Pearson sufficient statistics of the uploaded dataset, accumulating them on the first call so later
+correlation queries do not rescan the rows. Runs within the job of the query that needs them.
+Parameters:
+    df: the uploaded dataframe.
+Returns:
+    A PearsonAccumulator over the numerical columns of df, or None when the dataset is too wide or the accumulation
+    would need too much memory.
+'''
+def pearson_statistics(df):
+    global corr_statistics
+    cached = corr_statistics
+    if cached is not None and cached[0] is df:
+        return cached[1]
+
+    numeric = numeric_rows(df)
+    row_count, column_count = numeric.shape
+    memory = (CORR_STATISTICS_MATRICES * column_count ** 2 + CORR_STATISTICS_ROW_COPIES * row_count * column_count) * 8
+    if column_count > CORR_STATISTICS_MAX_COLUMNS or memory > CORR_STATISTICS_MAX_MEMORY:
+        return None
+
+    statistics = PearsonAccumulator(list(numeric.columns)).update(numeric)
+    # Kept with the dataframe they describe, so statistics finished after a new upload are never used for it
+    corr_statistics = (df, statistics)
+    return statistics
+
+'''
+Draws a random sample of a dataset. With the same seed, a smaller percentage gives a subset of the rows of a larger one.
+Parameters:
+    df: a dataframe.
+    percentage: the percentage of the rows to sample, in (0, 100].
+    seed: the random seed for sampling, or -1 for an unseeded sample.
+Returns:
+    The sampled dataframe, or df itself for 100 percent.
+'''
+def sample_dataset(df, percentage, seed):
+    if percentage >= 100:
+        return df
+    sample_fraction = float(percentage) / 100.0
+    if seed == -1:
+        return df.sample(frac=sample_fraction)
+    return df.sample(frac=sample_fraction, random_state=seed)
+
+'''
+Drops the dictionary-encoded text columns, whose codes are arbitrary and only meaningful to Categorical Association,
+so that the numeric algorithms analyze the same columns as without the encoding.
+Parameters:
+    rows: a dataframe of the uploaded dataset, a sample or filtered rows of it.
+Returns:
+    The dataframe without the encoded columns, or rows itself when it has none.
+'''
+def numeric_rows(rows):
+    encoded = [col for col in rows.columns if col in category_levels]
+    return rows.drop(columns=encoded) if encoded else rows
+
+'''
+Reads and validates the FACET options of the current request.
+Parameters:
+    args: the request parameters holding the options. Defaults to the query string.
+Returns:
+    A tuple (options, error) of the keyword arguments of compute_facet, or of None and an error response.
+'''
+def facet_options(args=None):
+    args = request.args if args is None else args
+    search = args.get('search', 'grid')
+    if search not in SEARCH_STRATEGIES:
+        return None, (jsonify({'error': 'Invalid search strategy'}), 400)
+    learner = args.get('learner', 'random_forest')
+    if learner not in LEARNERS:
+        return None, (jsonify({'error': 'Invalid learner'}), 400)
+    explain_rows = args.get('explain_rows')
+    if explain_rows is not None and explain_rows != 'auto':
+        if not explain_rows.isdigit() or int(explain_rows) < 2:
+            return None, (jsonify({'error': 'Invalid explain rows'}), 400)
+        explain_rows = int(explain_rows)
+    pairs = args.get('pairs', 'all')
+    if pairs not in REDUNDANCY_PAIRS:
+        return None, (jsonify({'error': 'Invalid redundancy pairs'}), 400)
+    mode = args.get('mode', 'exact')
+    if mode not in REDUNDANCY_MODES:
+        return None, (jsonify({'error': 'Invalid mode'}), 400)
+    return {'search': search, 'learner': learner, 'explain_rows': explain_rows, 'pairs': pairs, 'mode': mode}, None
+
+'''
+Reads and validates the hyperparameter memo option of the current request.
+Returns:
+    A tuple (options, error) of the memo keyword arguments of compute_facet, empty when the memo is off, or of None
+    and an error response.
+'''
+def memo_options():
+    global dataset_fingerprint
+    memo_mode = request.args.get('memo', 'off')
+    if memo_mode == 'off':
+        return {}, None
+    if memo_mode not in MEMO_MODES:
+        return None, (jsonify({'error': 'Invalid memo'}), 400)
+    if dataset_fingerprint is None:
+        dataset_fingerprint = fingerprint_dataframe(data)
+    return {'memo': dataset_fingerprint, 'memo_mode': memo_mode}, None
+
+'''
+Reads and validates the latency budget of the current request.
+Returns:
+    A tuple (budget, error) of the budget in seconds, or None without a budget, or of None and an error response.
+'''
+def latency_budget():
+    budget = request.args.get('budget')
+    if budget is None:
+        return None, None
+    try:
+        budget = float(budget)
+    except ValueError:
+        return None, (jsonify({'error': 'Invalid budget'}), 400)
+    if not budget > 0:
+        return None, (jsonify({'error': 'Invalid budget'}), 400)
+    return budget, None
+
+'''
+Reads and validates the random seed of the current request.
+Parameters:
+    args: the request parameters holding the seed. Defaults to the query string.
+Returns:
+    A tuple (seed, error) of the seed, by default the seed of the current sample, or of None and an error response.
+'''
+def request_seed(args=None):
+    args = request.args if args is None else args
+    try:
+        random_seed = int(args.get('seed', max(seed, 0)))
+    except ValueError:
+        return None, (jsonify({'error': 'Invalid seed'}), 400)
+    if random_seed < 0:
+        return None, (jsonify({'error': 'Invalid seed'}), 400)
+    return random_seed, None
+
+'''
+Reads and validates the seconds the current request waits in the queue of the resource governor.
+Parameters:
+    args: the request parameters holding the timeout. Defaults to the query string.
+Returns:
+    A tuple (timeout, error) of the timeout in seconds, QUEUE_TIMEOUT by default, or of None and an error response.
+'''
+def queue_timeout(args=None):
+    args = request.args if args is None else args
+    try:
+        timeout = float(args.get('timeout', QUEUE_TIMEOUT))
+    except ValueError:
+        return None, (jsonify({'error': 'Invalid timeout'}), 400)
+    if not timeout >= 0:
+        return None, (jsonify({'error': 'Invalid timeout'}), 400)
+    return timeout, None
+
+'''
+Reads and validates the error bound and confidence of an approximate correlation analysis from the query string.
+Returns:
+    A tuple (epsilon, confidence, error) of the positive error bound and the confidence in (0, 1), 0.05 and 0.95 by
+    default, or of None, None and an error response.
+'''
+def approximation_options():
+    try:
+        epsilon = float(request.args.get('epsilon', 0.05))
+    except ValueError:
+        return None, None, (jsonify({'error': 'Invalid epsilon'}), 400)
+    if not (np.isfinite(epsilon) and epsilon > 0):
+        return None, None, (jsonify({'error': 'Invalid epsilon'}), 400)
+
+    try:
+        confidence = float(request.args.get('confidence', 0.95))
+    except ValueError:
+        return None, None, (jsonify({'error': 'Invalid confidence'}), 400)
+    if not 0 < confidence < 1:
+        return None, None, (jsonify({'error': 'Invalid confidence'}), 400)
+    return epsilon, confidence, None
+
+'''
+Parameters:
+    results: redundancy results in the given layout.
+    layout: one of LAYOUTS.
+Returns:
+    A dictionary of the values of the results keyed by (row, column), without the missing values.
+'''
+def result_cells(results, layout):
+    if layout == 'columnar':
+        return {(row, col): value for row, values in zip(results['rows'], results['values'])
+                for col, value in zip(results['columns'], values) if value is not None}
+    return {(row, col): value for row, values in results.items() for col, value in values.items() if value != 'NaN'}
+
+'''
+Runs FACET on growing random samples of the selected rows, holding a job of the resource governor until the last one.
+Every sample is drawn like /random with the same seed, so each one holds the rows of the smaller ones, and FACET uses
+the same seed for its cross-validation folds and learners.
+Parameters:
+    rows: the selected rows.
+    variables: the sensitive variables.
+    target: the target variable.
+    random_seed: the random seed of the samples and of FACET.
+    layout: the layout of the results, one of LAYOUTS.
+    options: the FACET options, see facet_options.
+    cpus: the CPUs of the job.
+    memory: the estimated memory of the job in bytes.
+    timeout: the seconds to wait for the job.
+Returns:
+    A generator of JSON lines. The first one reports the percentages, and is produced once the job got its resources.
+    Each following one holds the 'percentage' and number of 'rows' of a sample, its 'results', and the largest
+    'change' of a redundancy value from the previous sample (None for the first). A failed sample ends the stream
+    with an 'error' line.
+'''
+def progressive_facet(rows, variables, target, random_seed, layout, options, cpus, memory, timeout):
+    percentages = [percentage for percentage in PROGRESSIVE_PERCENTAGES
+                   if percentage == 100 or len(rows) * percentage / 100 >= PROGRESSIVE_MIN_ROWS]
+    with governor.job(cpus, memory, timeout=timeout):
+        yield json.dumps({'status': 'FACET analysis started', 'percentages': percentages}) + '\n'
+        previous = None
+        for percentage in percentages:
+            try:
+                sample = sample_dataset(rows, percentage, random_seed)
+                results = compute_facet(variables, sample, target, random_seed, layout=layout, **options)
+            except Exception as e:
+                yield json.dumps({'error': str(e), 'percentage': percentage}) + '\n'
+                return
+            cells = result_cells(results, layout)
+            change = None
+            if previous is not None:
+                changes = [abs(value - previous[cell]) for cell, value in cells.items() if cell in previous]
+                change = round(max(changes), 5) if changes else None
+            previous = cells
+            status = 'FACET analysis completed' if percentage == 100 else 'FACET analysis in progress'
+            yield json.dumps({'status': status, 'percentage': percentage, 'rows': len(sample), 'results': results,
+                              'change': change}, separators=(',', ':')) + '\n'
+
+'''
+Computes the result cache key of the current /results request. The rows are identified by their content, so samples
+and filters that select the same rows share results.
+Parameters:
+    rows: the dataframe the analysis runs on.
+Returns:
+    The cache key.
+'''
+def results_cache_key(rows):
+    global fingerprinted
+
+    # The fingerprint is kept until the analyzed dataframe changes
+    if fingerprinted[0] is not rows:
+        fingerprinted = (rows, fingerprint_dataframe(rows))
+
+    arguments = {name: sorted(request.args.getlist(name)) for name in RESULT_CACHE_ARGUMENTS if name in request.args}
+    return cache_key(dataset=fingerprinted[1], algorithm=selected_algorithm, sensitive_variables=sensitive_variables,
+                     target=target_variable if selected_algorithm == 'FACET' else None, seed=seed,
+                     categories=sorted(category_levels), arguments=arguments)
+
+'''
+Stores a successful analysis in the result cache and builds its response.
+Parameters:
+    key: the cache key of the request, or None when caching is disabled.
+    payload: the dictionary to return.
+    layout: the layout of the results in the payload, one of LAYOUTS.
+Returns:
+    A tuple (response, status code). The payload reports that the result was not found in the cache.
+'''
+def cached_response(key, payload, layout):
+    if key is not None:
+        result_cache.put(key, payload)
+    return results_response(dict(payload, cache={'hit': False}), layout)
+
 '''
 Uploads a CSV file and processes it to create a dataset.
 Returns:
     A JSON response indicating the status of the upload. If successful, the dataset is stored globally, 
-    and the columns are extracted.
+    and the columns are extracted. Text columns are stored as integer codes of their categories, which only
+    Categorical Association analyzes.
 '''
 @route_bp.route('/upload', methods=['POST'])
 def upload():
-    global data
+    global data, corr_statistics, category_levels, dataset_fingerprint
     
     # Check if a file is uploaded
     if 'file' not in request.files:
@@ -67,14 +483,11 @@ def upload():
 
     # Check if the uploaded file is a valid CSV
     if file and file.filename.endswith('.csv'):
-        # Read the CSV file into a pandas DataFrame
+        # Read the CSV file into a pandas DataFrame, invalidating the statistics of the previous dataset
+        corr_statistics = None
         data = pd.read_csv(file)
-        # Remove the first column if it contains 'id'
-        if 'id' in data.columns[0].lower():
-            data = data.drop(columns=[data.columns[0]])
-        # Retain only numerical columns
-        data = data.select_dtypes([np.number])
-        data = data.apply(pd.to_numeric, errors='coerce')
+        data, category_levels = prepare_dataset(data)
+        dataset_fingerprint = None
         
         # Store the columns of the dataset
         global columns
@@ -113,7 +526,7 @@ def algorithm():
         return jsonify({'error': 'No algorithm selected'}), 400
     
     # Validate the algorithm choice
-    algorithms_list = ['Correlational Analysis', 'FACET', 'Association Rule Mining']
+    algorithms_list = ['Correlational Analysis', 'FACET', 'Association Rule Mining', 'Categorical Association']
     if selected_algorithm not in algorithms_list:
         return jsonify({'error': 'Invalid algorithm selected'}), 400
     
@@ -178,14 +591,9 @@ def random_sample():
         return jsonify({'error': 'Invalid Percentage'}), 400
     
     # Sample the dataset based on the given percentage
-    sampled_data = data
-    if percentage < 100:
-        sample_fraction = float(percentage) / 100.0
-        if seed == -1:
-            seed = 0
-            sampled_data = data.sample(frac=sample_fraction)
-        else:
-            sampled_data = data.sample(frac=sample_fraction, random_state=seed)
+    sampled_data = sample_dataset(data, percentage, seed)
+    if seed == -1 and percentage < 100:
+        seed = 0
     
     # Convert the sampled data to JSON and return it
     result = sampled_data.to_dict(orient='records')
@@ -193,49 +601,471 @@ def random_sample():
     return jsonify({'sample': result}), 200
 
 
+'''
+Computes Pearson correlations between sensitive variables and all other variables of a CSV file, reading it in
+chunks so that files larger than memory can be analyzed. The file is not stored as the current dataset.
+Parameters:
+    file: the CSV file.
+    variables: the sensitive variables, repeated once per variable.
+    chunksize: the number of rows read per chunk (optional).
+    format: 'nested' (default) or 'columnar' (optional).
+Returns:
+    A JSON response with the Pearson correlation results.
+'''
+@route_bp.route('/stream-correlation', methods=['POST'])
+def stream_correlation():
+    # Check if a file is uploaded
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file uploaded'}), 400
+
+    file = request.files['file']
+    if not (file and file.filename.endswith('.csv')):
+        return jsonify({'error': 'Invalid file'}), 400
+
+    # Ensure sensitive variables were provided
+    variables = request.form.getlist('variables')
+    if not variables:
+        return jsonify({'error': 'No sensitive variables selected'}), 400
+
+    # Validate the chunk size
+    try:
+        chunksize = int(request.form.get('chunksize', CHUNK_ROWS))
+    except ValueError:
+        return jsonify({'error': 'Invalid chunk size'}), 400
+    if chunksize <= 0:
+        return jsonify({'error': 'Invalid chunk size'}), 400
+
+    # Validate the result layout
+    layout = request.form.get('format', 'nested')
+    if layout not in LAYOUTS:
+        return jsonify({'error': 'Invalid format'}), 400
+
+    try:
+        results = compute_corr_chunked(variables, read_dataset_chunks(file, chunksize), layout=layout)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    return results_response({'status': 'Correlation analysis completed', 'results': results}, layout)
+
+
 '''
 Performs analysis based on the selected algorithm and the sensitive variables.
+Parameters:
+    columns: optional columns to restrict Correlational Analysis to, repeated once per column.
+    mode: 'exact' (default) or 'approximate'. In approximate mode Correlational Analysis grows a random sample of the
+        selected rows (or of the whole dataset when no sample was drawn) until every confidence interval is narrow enough,
+        and FACET approximates the redundancy by the association of plain SHAP vectors instead of computing SHAP
+        interaction values.
+    epsilon: the largest accepted confidence interval width in approximate mode (default 0.05).
+    confidence: the confidence level of the intervals in approximate mode (default 0.95).
+    cache: 'false' to recompute the results instead of reading them from the result cache.
+    timeout: the seconds to wait for free CPUs and memory when other analyses are running (default 600).
+    significance: 'true' to add p-values and Benjamini-Hochberg adjusted p-values to exact Correlational Analysis.
+    search: the hyperparameter search of FACET, 'grid' (default) for the exhaustive grid search or 'halving' for
+        successive halving.
+    learner: the surrogate learner of FACET, 'random_forest' (default), 'extra_trees' or 'hist_gradient_boosting'.
+    explain_rows: a number of rows for FACET to compute SHAP values for a stratified subsample of the rows only, or
+        'auto' to grow the subsample until the redundancy is stable. The response then also holds the number of
+        'explained_rows' and the bootstrap 'redundancy_error' of every redundancy value.
+    pairs: 'all' (default) for FACET to compute the redundancy matrix of every feature pair, or 'sensitive' to compute
+        the redundancy of the pairs involving the sensitive variables only.
+    metrics: the FACET matrices to return, 'redundancy' (default), 'synergy' and/or 'association', repeated once per
+        matrix. All of them are computed from one fit. The redundancy is returned in 'results', and the synergy and
+        association in entries of the same names. Synergy is not available in approximate mode.
+    budget: a latency budget in seconds for FACET. The run is shrunk to fit it, see /estimate, and the response
+        holds the 'plan' that was run.
+    memo: 'off' (default), 'best' or 'neighbours'. FACET then memoizes the best hyperparameters per uploaded dataset
+        and target, and later runs on any sample or filter of the dataset fit only the memoized best candidate
+        ('best'), or also search its neighbouring values ('neighbours'). The response reports whether a 'memoized'
+        configuration was used and the selected 'hyperparameters'.
+    progressive: 'true' for FACET to run on 10, 25, 50 and then 100 percent of the selected rows, and stream the results
+        of every sample as newline-delimited JSON as soon as they are ready. Samples under 50 rows are skipped, and the
+        results are not cached.
+    format: 'nested' (default) for nested dictionaries, or 'columnar' for compact row and column labels with lists of
+        values, where missing values are null.
 Returns:
-    A JSON response with the results of the analysis.
+    A JSON response with the results of the analysis. Its 'cache' entry reports whether the results were read from the
+    result cache, and from which tier ('memory' or 'disk'). Analyses that wait for resources longer than the timeout
+    return a 503 error.
 '''
 @route_bp.route('/results', methods=['GET'])
 def get_results():
     global sampled_data, sensitive_variables, columns, target_variable, seed
 
+    # Approximate Correlational Analysis picks its own sample, so it does not need one to be drawn first
+    approximate = request.args.get('mode', 'exact') == 'approximate' and selected_algorithm == 'Correlational Analysis'
+
     # Ensure dataset and sensitive variables are available
-    if sampled_data is None:
+    if sampled_data is None and not (approximate and data is not None):
         return jsonify({'error': 'No dataset available'}), 400
+
+    # Validate the result layout
+    layout = request.args.get('format', 'nested')
+    if layout not in LAYOUTS:
+        return jsonify({'error': 'Invalid format'}), 400
+
+    # Answer from the result cache when the same analysis already ran on the same rows
+    key = None
+    if selected_algorithm is not None and request.args.get('cache', 'true').lower() != 'false':
+        key = results_cache_key(data if sampled_data is None else sampled_data)
+        payload, tier = result_cache.get(key)
+        if payload is not None:
+            return results_response(dict(payload, cache={'hit': True, 'tier': tier}), layout)
     
+    # Run the analysis within the CPU and memory budget shared with concurrent requests
+    rows = data if sampled_data is None else sampled_data
+    cpus = governor.cpus if selected_algorithm in PARALLEL_ALGORITHMS else 1
+    timeout, error = queue_timeout()
+    if error is not None:
+        return error
+    if approximate:
+        epsilon, confidence, error = approximation_options()
+        if error is not None:
+            return error
+
+    # Progressive FACET streams the results of growing samples, and holds its job until the stream ends
+    if selected_algorithm == 'FACET' and request.args.get('progressive', 'false').lower() == 'true':
+        if target_variable is None:
+            return jsonify({'error': 'Target variable not set'}), 400
+        if not sensitive_variables:
+            return jsonify({'error': 'Sensitive variables not set'}), 400
+        options, error = facet_options()
+        if error is not None:
+            return error
+        stream = progressive_facet(numeric_rows(sampled_data), list(sensitive_variables), target_variable, max(seed, 0), layout, options, cpus, job_memory(rows), timeout)
+        try:
+            # The first line is produced once the job got its resources
+            first = next(stream)
+        except ResourceBusyError:
+            return jsonify({'error': 'Server busy, try again later'}), 503
+        return Response(chain([first], stream), mimetype='application/x-ndjson'), 200
+
     try:
-        # Correlational Analysis
-        if selected_algorithm == 'Correlational Analysis':
-            if not sensitive_variables:
-                return jsonify({'error': 'Sensitive variables not set'}), 400
-            results = compute_corr(sensitive_variables, sampled_data)
-            return jsonify({'status': 'Correlation analysis completed', 'results': results}), 200
+        with governor.job(cpus, job_memory(rows), timeout=timeout):
+            # Correlational Analysis
+            if selected_algorithm == 'Correlational Analysis':
+                if not sensitive_variables:
+                    return jsonify({'error': 'Sensitive variables not set'}), 400
+                if approximate:
+                    source = numeric_rows(sampled_data if sampled_data is not None else data)
+                    results, sample_size = compute_corr_approx(sensitive_variables, source, epsilon, confidence, seed, layout=layout)
+                    return cached_response(key, {'status': 'Correlation analysis completed', 'results': results, 'sample_size': sample_size}, layout)
+                # The cached statistics only describe the full dataset, not samples or filtered rows
+                statistics = pearson_statistics(data) if sampled_data is data else None
+                selected_columns = request.args.getlist('columns') or None
+                significance = request.args.get('significance', 'false').lower() == 'true'
+                results = compute_corr(sensitive_variables, numeric_rows(sampled_data), columns=selected_columns, statistics=statistics, significance=significance, layout=layout)
+                return cached_response(key, {'status': 'Correlation analysis completed', 'results': results}, layout)
         
-        # FACET Analysis
-        if selected_algorithm == 'FACET':
-            if target_variable is None:
-                return jsonify({'error': 'Target variable not set'}), 400
+            # FACET Analysis
+            if selected_algorithm == 'FACET':
+                if target_variable is None:
+                    return jsonify({'error': 'Target variable not set'}), 400
             
-            if not sensitive_variables:
-                return jsonify({'error': 'Sensitive variables not set'}), 400
-            results = compute_facet(sensitive_variables, sampled_data, target_variable, seed)
-            return jsonify({'status': 'FACET analysis completed', 'results': results}), 200
+                if not sensitive_variables:
+                    return jsonify({'error': 'Sensitive variables not set'}), 400
+
+                options, error = facet_options()
+                if error is not None:
+                    return error
+                budget, error = latency_budget()
+                if error is not None:
+                    return error
+                memo, error = memo_options()
+                if error is not None:
+                    return error
+                facet_rows = numeric_rows(sampled_data)
+                plan = None
+                if budget is not None:
+                    # Fewer cross-validation repeats, candidates or rows, as planned by the cost model
+                    plan = plan_facet(len(facet_rows), len(facet_rows.columns) - 1, budget, **options)
+                    options.update(explain_rows=plan['explain_rows'], repeats=plan['repeats'], candidates=plan['candidates'])
+                    if plan['rows'] < len(facet_rows):
+                        facet_rows = sample_dataset(facet_rows, plan['rows'] / len(facet_rows) * 100, max(seed, 0))
+                options.update(memo)
+                metrics = request.args.getlist('metrics') or ['redundancy']
+                if any(metric not in MATRICES for metric in metrics) or ('synergy' in metrics and options['mode'] == 'approximate'):
+                    return jsonify({'error': 'Invalid metrics'}), 400
+                payload = {'status': 'FACET analysis completed'}
+                if plan is not None:
+                    payload['plan'] = plan
+                # Every matrix reuses the fit of the first one
+                for metric in MATRICES:
+                    if metric in metrics:
+                        results = compute_facet(sensitive_variables, facet_rows, target_variable, seed, layout=layout, metric=metric, **options)
+                        payload['results' if metric == 'redundancy' else metric] = results
+                # The error of a subsampled explanation reuses the same fit
+                if options['explain_rows'] is not None:
+                    payload.update(compute_facet_error(sensitive_variables, facet_rows, target_variable, seed, layout=layout, **options))
+                # So does the report of the memoized hyperparameters
+                if memo:
+                    payload.update(compute_facet_selection(sensitive_variables, facet_rows, target_variable, seed, **options))
+                return cached_response(key, payload, layout)
         
-        # Association Rule Mining (ARM)
-        if selected_algorithm == 'Association Rule Mining':
-            results = compute_arm(sensitive_variables, sampled_data, seed)
-            return jsonify({'status': 'Association Rule Mining completed', 'results': results}), 200
+            # Categorical Association
+            if selected_algorithm == 'Categorical Association':
+                if not sensitive_variables:
+                    return jsonify({'error': 'Sensitive variables not set'}), 400
+                results = compute_assoc(sensitive_variables, sampled_data, list(category_levels), layout=layout)
+                return cached_response(key, {'status': 'Categorical association completed', 'results': results}, layout)
+
+            # Association Rule Mining (ARM)
+            if selected_algorithm == 'Association Rule Mining':
+                results = compute_arm(sensitive_variables, numeric_rows(sampled_data), seed, layout=layout)
+                return cached_response(key, {'status': 'Association Rule Mining completed', 'results': results}, layout)
+    except ResourceBusyError:
+        return jsonify({'error': 'Server busy, try again later'}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+'''
+Computes how the FACET redundancy with the sensitive variables changes when each of some columns is left out of the
+dataset. The dataset is parsed once, and the fits of the copies run in parallel within the resource budget.
+Parameters:
+    file: a CSV file to analyze (optional). Defaults to the current sample, or the uploaded dataset. The file is not
+        stored as the current dataset.
+    target: the target variable.
+    variables: the sensitive variables, repeated once per variable.
+    drop: the columns to leave out one at a time, repeated once per column.
+    seed: the random seed of every fit (optional). Defaults to the seed of the current sample.
+    search, learner, explain_rows, pairs, mode: the FACET options (optional), see /results.
+    format: 'nested' (default) or 'columnar' (optional).
+    timeout: the seconds to wait for free CPUs and memory when other analyses are running (default 600).
+Returns:
+    A JSON response with, for every sensitive variable, the redundancy of every variable with it and its change from
+    the whole dataset, with one row per left out column.
+'''
+@route_bp.route('/facet-sweep', methods=['POST'])
+def facet_sweep():
+    # Parse the uploaded file once, or analyze the current rows
+    if 'file' in request.files:
+        file = request.files['file']
+        if not (file and file.filename.endswith('.csv')):
+            return jsonify({'error': 'Invalid file'}), 400
+        rows, _ = prepare_dataset(pd.read_csv(file), encode_categoricals=False)
+    else:
+        rows = sampled_data if sampled_data is not None else data
+        if rows is None:
+            return jsonify({'error': 'No dataset available'}), 400
+        rows = numeric_rows(rows)
+
+    target = request.form.get('target')
+    if target is None:
+        return jsonify({'error': 'Target variable not set'}), 400
+    variables = request.form.getlist('variables')
+    if not variables:
+        return jsonify({'error': 'No sensitive variables selected'}), 400
+    drop_columns = request.form.getlist('drop')
+    if not drop_columns:
+        return jsonify({'error': 'No columns to leave out'}), 400
+    layout = request.form.get('format', 'nested')
+    if layout not in LAYOUTS:
+        return jsonify({'error': 'Invalid format'}), 400
+    options, error = facet_options(request.form)
+    if error is not None:
+        return error
+    sweep_seed, error = request_seed(request.form)
+    if error is not None:
+        return error
+    timeout, error = queue_timeout(request.form)
+    if error is not None:
+        return error
+
+    # Every fit holds its own copy of the rows and of the SHAP values
+    memory = (len(drop_columns) + 1) * job_memory(rows, 'FACET', options)
+    try:
+        with governor.job(governor.cpus, memory, timeout=timeout):
+            results = compute_facet_sweep(variables, rows, target, drop_columns, sweep_seed, layout=layout, **options)
+    except ResourceBusyError:
+        return jsonify({'error': 'Server busy, try again later'}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    return results_response({'status': 'FACET sweep completed', 'results': results}, layout)
+
+
+'''
+Computes the FACET redundancy with the sensitive variables for several target variables. The dataset is parsed once,
+and the fits of the targets run in parallel within the resource budget.
+Parameters:
+    file: a CSV file to analyze (optional). Defaults to the current sample, or the uploaded dataset. The file is not
+        stored as the current dataset.
+    targets: the target variables, repeated once per target.
+    variables: the sensitive variables, repeated once per variable.
+    seed: the random seed of every fit (optional). Defaults to the seed of the current sample.
+    search, learner, explain_rows, pairs, mode: the FACET options (optional), see /results.
+    format: 'nested' (default) or 'columnar' (optional).
+    timeout: the seconds to wait for free CPUs and memory when other analyses are running (default 600).
+Returns:
+    A JSON response with the redundancy results of every target variable.
+'''
+@route_bp.route('/facet-batch', methods=['POST'])
+def facet_batch():
+    # Parse the uploaded file once, or analyze the current rows
+    if 'file' in request.files:
+        file = request.files['file']
+        if not (file and file.filename.endswith('.csv')):
+            return jsonify({'error': 'Invalid file'}), 400
+        rows, _ = prepare_dataset(pd.read_csv(file), encode_categoricals=False)
+    else:
+        rows = sampled_data if sampled_data is not None else data
+        if rows is None:
+            return jsonify({'error': 'No dataset available'}), 400
+        rows = numeric_rows(rows)
+
+    targets = request.form.getlist('targets')
+    if not targets:
+        return jsonify({'error': 'Target variable not set'}), 400
+    variables = request.form.getlist('variables')
+    if not variables:
+        return jsonify({'error': 'No sensitive variables selected'}), 400
+    layout = request.form.get('format', 'nested')
+    if layout not in LAYOUTS:
+        return jsonify({'error': 'Invalid format'}), 400
+    options, error = facet_options(request.form)
+    if error is not None:
+        return error
+    batch_seed, error = request_seed(request.form)
+    if error is not None:
+        return error
+    timeout, error = queue_timeout(request.form)
+    if error is not None:
+        return error
+
+    # Every fit holds its own copy of the rows and of the SHAP values
+    memory = len(set(targets)) * job_memory(rows, 'FACET', options)
+    try:
+        with governor.job(governor.cpus, memory, timeout=timeout):
+            results = compute_facet_batch(variables, rows, targets, batch_seed, layout=layout, **options)
+    except ResourceBusyError:
+        return jsonify({'error': 'Server busy, try again later'}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    return results_response({'status': 'FACET batch completed', 'results': results}, layout)
+
+
+'''
+Runs an analysis on random samples of the uploaded dataset drawn with consecutive seeds, each one the sample /random
+draws for its seed, and summarizes how every score of a sensitive variable with a column varies between them. The
+samples are analyzed in parallel within the resource budget.
+Parameters:
+    percentage: the percentage of the rows of every sample.
+    samples: the number of samples (optional, default 20).
+    algorithm: 'Correlational Analysis', 'FACET' or 'Association Rule Mining' (optional). Defaults to the selected algorithm.
+    variables: the sensitive variables, repeated once per variable (optional). Default to the selected ones.
+    target: the target variable of FACET (optional). Defaults to the selected one.
+    seed: the seed of the first sample (optional). Defaults to the seed of the current sample.
+    methods: the correlation methods, repeated once per method (optional). Default to all of them.
+    quantiles: the quantiles to report, repeated once per quantile (optional). Default to 0.05, 0.5 and 0.95.
+    search, learner, explain_rows, pairs, mode: the FACET options (optional), see /results.
+    format: 'nested' (default) or 'columnar' (optional).
+    timeout: the seconds to wait for free CPUs and memory when other analyses are running (default 600).
+Returns:
+    A JSON response with the number of samples, their rows and seeds, and the mean, standard deviation, quantiles and
+    frequency of every score.
+'''
+@route_bp.route('/stability', methods=['POST'])
+def stability():
+    if data is None:
+        return jsonify({'error': 'No dataset available'}), 400
+
+    algorithm = request.form.get('algorithm', selected_algorithm)
+    if algorithm not in STABILITY_ALGORITHMS:
+        return jsonify({'error': 'Invalid algorithm selected'}), 400
+    variables = request.form.getlist('variables') or list(sensitive_variables)
+    if not variables:
+        return jsonify({'error': 'No sensitive variables selected'}), 400
+    target = request.form.get('target', target_variable)
+    if algorithm == 'FACET' and target is None:
+        return jsonify({'error': 'Target variable not set'}), 400
+    try:
+        percentage = float(request.form.get('percentage', ''))
+        samples = int(request.form.get('samples', STABILITY_SAMPLES))
+        quantiles = [float(q) for q in request.form.getlist('quantiles')] or None
+        stability_seed = int(request.form.get('seed', max(seed, 0)))
+    except ValueError:
+        return jsonify({'error': 'Invalid stability parameters'}), 400
+    if stability_seed < 0:
+        return jsonify({'error': 'Invalid seed'}), 400
+    if percentage <= 0 or percentage > 100:
+        return jsonify({'error': 'Invalid Percentage'}), 400
+    if samples < 1 or samples > STABILITY_MAX_SAMPLES:
+        return jsonify({'error': 'Invalid number of samples'}), 400
+    layout = request.form.get('format', 'nested')
+    if layout not in LAYOUTS:
+        return jsonify({'error': 'Invalid format'}), 400
+    options, error = facet_options(request.form)
+    if error is not None:
+        return error
+    if algorithm != 'FACET':
+        options = {}
+    if request.form.getlist('methods'):
+        options['methods'] = request.form.getlist('methods')
+    if quantiles is not None:
+        options['quantiles'] = quantiles
+    timeout, error = queue_timeout(request.form)
+    if error is not None:
+        return error
+
+    # Every worker holds its own copy of a sample
+    memory = min(samples, governor.cpus) * job_memory(sample_dataset(data, percentage, stability_seed), algorithm, options)
+    try:
+        with governor.job(governor.cpus, memory, timeout=timeout):
+            payload = compute_stability(variables, numeric_rows(data), algorithm, samples, percentage, stability_seed, layout=layout, target_var=target, **options)
+    except ResourceBusyError:
+        return jsonify({'error': 'Server busy, try again later'}), 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    return results_response(dict(payload, status='Stability analysis completed'), layout)
+
+
+'''
+Predicts the wall time and peak memory of FACET on the current sample before it is submitted to /results.
+Parameters:
+    search, learner, explain_rows, pairs, mode: the FACET options (optional), see /results.
+    budget: a latency budget in seconds (optional). The response then also holds the 'plan' of a run shrunk to meet it:
+        the 'rows' it trains on, its 'explain_rows', cross-validation 'repeats' and hyperparameter 'candidates', its
+        'estimate' and whether it is 'within_budget'. /results?budget= runs that plan.
+Returns:
+    A JSON response with the predicted 'seconds', 'selection_seconds', 'inspector_seconds' and 'memory_bytes', and the
+    number of runs the cost model was calibrated on.
+'''
+@route_bp.route('/estimate', methods=['GET'])
+def estimate():
+    if sampled_data is None:
+        return jsonify({'error': 'No dataset available'}), 400
+    if target_variable is None:
+        return jsonify({'error': 'Target variable not set'}), 400
+    options, error = facet_options()
+    if error is not None:
+        return error
+    budget, error = latency_budget()
+    if error is not None:
+        return error
+
+    facet_rows = numeric_rows(sampled_data)
+    rows, features = len(facet_rows), len(facet_rows.columns) - 1
+    payload = estimate_facet(rows, features, **options)
+    payload['observations'] = cost_model.observations()
+    if budget is not None:
+        payload['plan'] = plan_facet(rows, features, budget, **options)
+    return jsonify(payload), 200
+
+
+'''
+Reports the resource budget of the analyses.
+Returns:
+    A JSON response with the CPU and memory budgets, the free CPUs and memory, and the numbers of running and queued jobs.
+'''
+@route_bp.route('/resources', methods=['GET'])
+def get_resources():
+    return jsonify(governor.status()), 200
 
 
 '''
 Retrieves the columns from the uploaded dataset.
 Returns:
-    A JSON response containing the list of columns in the dataset.
+    A JSON response containing the list of columns in the dataset, and the list of the 'categorical' text columns
+    among them, which only Categorical Association analyzes.
 '''
 @route_bp.route('/columns', methods=['GET'])
 def get_columns():
@@ -246,7 +1076,7 @@ def get_columns():
     if columns is None:
         return jsonify({'error': 'No columns set available'}), 400
     
-    return jsonify({'columns': columns}), 200
+    return jsonify({'columns': columns, 'categorical': [col for col in columns if col in category_levels]}), 200
 
 
 '''
@@ -0,0 +1,197 @@
+'''
+resource_governor.py
+This program implements a process-wide governor of the CPUs and memory used by concurrent analysis jobs, so that
+parallel requests share the machine instead of oversubscribing it.
+
+Key Features:
+    - Hands every job a CPU budget. The algorithms read it with job_cpus() and pass it as joblib n_jobs (or as the
+      number of worker processes), and BLAS/OpenMP thread pools are limited to it through threadpoolctl.
+    - Reserves an estimated amount of memory per job. Jobs that do not fit in the remaining memory are queued until
+      earlier jobs finish, and jobs larger than the whole memory budget run alone.
+    - Downsizes jobs when fewer CPUs than requested are free, instead of waiting for all of them.
+    - The budgets are set with the PROXY_WARS_CPUS and PROXY_WARS_MEMORY_BYTES environment variables.
+    - Starts the worker processes of the analyses from a clean server process rather than by forking the threaded
+      web server, see worker_context().
+'''
+
+
+import os
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from threadpoolctl import threadpool_limits
+
+# Number of CPUs shared by all jobs
+CPU_BUDGET = int(os.environ.get('PROXY_WARS_CPUS', os.cpu_count() or 1))
+# Share of the physical memory shared by all jobs, unless PROXY_WARS_MEMORY_BYTES is set
+MEMORY_SHARE = .5
+# Seconds a job waits in the queue before it is rejected
+QUEUE_TIMEOUT = 600
+
+# Start method of the worker processes of the analyses. Requests are handled in threads, and forking a threaded process
+# can copy locks held by other threads into the workers, so they are forked from a single-threaded server process, or
+# spawned where that is not available
+WORKER_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# The budget of the job running in the current thread
+current_job = threading.local()
+
+'''
+Returns:
+    The memory budget in bytes: PROXY_WARS_MEMORY_BYTES, or MEMORY_SHARE of the physical memory.
+'''
+def memory_budget():
+    if 'PROXY_WARS_MEMORY_BYTES' in os.environ:
+        return int(os.environ['PROXY_WARS_MEMORY_BYTES'])
+    try:
+        return int(os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') * MEMORY_SHARE)
+    except (ValueError, OSError, AttributeError):
+        # Without a way to read the physical memory, only the CPUs are governed
+        return None
+
+# Memory in bytes shared by all jobs
+MEMORY_BUDGET = memory_budget()
+
+'''
+Parameters:
+    default: the value returned outside of a governed job.
+Returns:
+    The number of CPUs granted to the job running in the current thread, or default outside of a job.
+'''
+def job_cpus(default=None):
+    return getattr(current_job, 'cpus', default)
+
+'''
+Returns:
+    The multiprocessing context the analyses start their worker processes with, see WORKER_START_METHOD.
+'''
+def worker_context():
+    return multiprocessing.get_context(WORKER_START_METHOD)
+
+'''
+Makes a number of CPUs available to job_cpus() in the current thread and limits the BLAS/OpenMP thread pools to them,
+for example in the worker processes of a job that splits its CPUs between them.
+Parameters:
+    cpus: the number of CPUs.
+Returns:
+    A context manager holding the number of CPUs.
+'''
+@contextmanager
+def granted_cpus(cpus):
+    outer = job_cpus()
+    current_job.cpus = cpus
+    try:
+        with threadpool_limits(limits=cpus):
+            yield cpus
+    finally:
+        current_job.cpus = outer
+        if outer is None:
+            del current_job.cpus
+
+'''
+Raised when a job waited longer than its timeout for resources.
+'''
+class ResourceBusyError(TimeoutError):
+    pass
+
+'''
+A process-wide budget of CPUs and memory, shared by the jobs running in any thread.
+Parameters:
+    cpus: the number of CPUs shared by all jobs.
+    memory_bytes: the memory in bytes shared by all jobs, or None to govern the CPUs only.
+'''
+class ResourceGovernor:
+
+    def __init__(self, cpus=CPU_BUDGET, memory_bytes=MEMORY_BUDGET):
+        self.cpus = max(int(cpus), 1)
+        self.memory_bytes = memory_bytes
+        self.free_cpus = self.cpus
+        self.free_memory = self.memory_bytes
+        self.running = 0
+        self.queued = 0
+        self.condition = threading.Condition()
+
+    '''
+    Waits until a job fits and reserves its resources.
+    Parameters:
+        cpus: the number of CPUs the job can use.
+        memory: the estimated memory of the job in bytes.
+        min_cpus: the fewest CPUs the job runs with. Jobs get fewer CPUs than requested when others hold them.
+        timeout: the seconds to wait, None to wait forever.
+    Returns:
+        A tuple (cpus, memory) of the reserved resources. A job that waited longer than timeout raises a ResourceBusyError.
+    '''
+    def acquire(self, cpus, memory=0, min_cpus=1, timeout=QUEUE_TIMEOUT):
+        cpus = min(max(int(cpus), 1), self.cpus)
+        min_cpus = min(max(int(min_cpus), 1), cpus)
+        # A job larger than the whole budget runs alone
+        if self.memory_bytes is not None:
+            memory = min(int(memory), self.memory_bytes)
+
+        with self.condition:
+            self.queued += 1
+            try:
+                if not self.condition.wait_for(lambda: self.fits(min_cpus, memory), timeout):
+                    raise ResourceBusyError(f"No resources for a job of {min_cpus} CPU(s) and {memory} bytes after {timeout} seconds")
+            finally:
+                self.queued -= 1
+            cpus = min(cpus, self.free_cpus)
+            self.free_cpus -= cpus
+            if self.memory_bytes is not None:
+                self.free_memory -= memory
+            self.running += 1
+        return cpus, memory
+
+    '''
+    Parameters:
+        cpus: a number of CPUs.
+        memory: a number of bytes.
+    Returns:
+        Whether the resources are free.
+    '''
+    def fits(self, cpus, memory):
+        return self.free_cpus >= cpus and (self.memory_bytes is None or self.free_memory >= memory)
+
+    '''
+    Returns the resources of a finished job and wakes up the queued jobs.
+    Parameters:
+        cpus: the CPUs reserved by acquire.
+        memory: the memory reserved by acquire.
+    '''
+    def release(self, cpus, memory=0):
+        with self.condition:
+            self.free_cpus += cpus
+            if self.memory_bytes is not None:
+                self.free_memory += memory
+            self.running -= 1
+            self.condition.notify_all()
+
+    '''
+    Runs a job within the budget: reserves its resources, makes its CPUs available to job_cpus() and limits the
+    BLAS/OpenMP thread pools to them. The thread pool limits are process-wide, so concurrent jobs share the limit of
+    the job that started last.
+    Parameters:
+        cpus: the number of CPUs the job can use.
+        memory: the estimated memory of the job in bytes.
+        min_cpus: the fewest CPUs the job runs with.
+        timeout: the seconds to wait in the queue.
+    Returns:
+        A context manager holding the number of CPUs granted to the job.
+    '''
+    @contextmanager
+    def job(self, cpus, memory=0, min_cpus=1, timeout=QUEUE_TIMEOUT):
+        cpus, memory = self.acquire(cpus, memory, min_cpus, timeout)
+        try:
+            with granted_cpus(cpus):
+                yield cpus
+        finally:
+            self.release(cpus, memory)
+
+    '''
+    Returns:
+        A dictionary with the budgets, the free resources and the numbers of running and queued jobs.
+    '''
+    def status(self):
+        with self.condition:
+            return {'cpus': self.cpus, 'free_cpus': self.free_cpus, 'memory_bytes': self.memory_bytes,
+                    'free_memory_bytes': self.free_memory, 'running': self.running, 'queued': self.queued}
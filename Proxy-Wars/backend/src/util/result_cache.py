@@ -0,0 +1,177 @@
+'''
+result_cache.py
+This program implements a content-addressed cache for analysis results, so repeated requests are answered without
+recomputing them.
+
+Key Features:
+    - Keys are hashes of a fingerprint of the analyzed rows and of every parameter of the analysis, so a cached result
+      is reused only when the data and the request are the same.
+    - Keeps the most recently used results in an in-memory LRU tier.
+    - Keeps results as JSON files in an on-disk tier that survives restarts, evicting the least recently used files
+      once the tier grows over its size limit.
+    - The directory of the on-disk tier is set with the PROXY_WARS_CACHE_DIR environment variable.
+'''
+
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+# Version of the cached results, to be increased whenever the algorithms change their output
+CACHE_VERSION = 2
+# Number of results kept in the in-memory tier
+CACHE_MEMORY_ENTRIES = 64
+# Largest total size in bytes of the results kept in the on-disk tier
+CACHE_DISK_BYTES = 256 * 1024 * 1024
+# Directory of the on-disk tier
+CACHE_DIR = os.environ.get('PROXY_WARS_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'proxy-wars-cache'))
+
+'''
+Computes a fingerprint of the content of a dataframe, covering its columns, types and the values of every row in order.
+Parameters:
+    df: a dataframe.
+Returns:
+    A hexadecimal string.
+'''
+def fingerprint_dataframe(df):
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(col) for col in df.columns]).encode())
+    digest.update(json.dumps([str(dtype) for dtype in df.dtypes]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+'''
+Computes a cache key from the parts of a request.
+Parameters:
+    parts: keyword arguments holding JSON-serializable parts of the request, such as the dataset fingerprint,
+        the algorithm and its parameters.
+Returns:
+    A hexadecimal string.
+'''
+def cache_key(**parts):
+    parts['version'] = CACHE_VERSION
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+'''
+A two-tier cache of JSON-serializable results.
+Parameters:
+    directory: the directory of the on-disk tier, or None to keep results in memory only.
+    memory_entries: the number of results kept in memory.
+    disk_bytes: the largest total size in bytes of the on-disk tier.
+'''
+class ResultCache:
+
+    def __init__(self, directory=CACHE_DIR, memory_entries=CACHE_MEMORY_ENTRIES, disk_bytes=CACHE_DISK_BYTES):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.disk_bytes = disk_bytes
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+
+    '''
+    Parameters:
+        key: a cache key.
+    Returns:
+        The path of the file holding the result in the on-disk tier.
+    '''
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    '''
+    Looks a result up, first in memory and then on disk. Results found on disk are moved into memory.
+    Parameters:
+        key: a cache key.
+    Returns:
+        A tuple (result, tier) where tier is 'memory' or 'disk', or (None, None) when the result is not cached.
+    '''
+    def get(self, key):
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                return self.memory[key], 'memory'
+
+        if self.directory is None:
+            return None, None
+        try:
+            with open(self.path(key)) as file:
+                result = json.load(file)
+            # Touching the file marks it as recently used for eviction
+            os.utime(self.path(key))
+        except (OSError, ValueError):
+            return None, None
+
+        self.remember(key, result)
+        return result, 'disk'
+
+    '''
+    Stores a result in both tiers.
+    Parameters:
+        key: a cache key.
+        result: a JSON-serializable result.
+    '''
+    def put(self, key, result):
+        self.remember(key, result)
+        if self.directory is None:
+            return
+        temporary = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write to a temporary file first, so readers never see a partial result
+            descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(descriptor, 'w') as file:
+                json.dump(result, file, separators=(',', ':'))
+            os.replace(temporary, self.path(key))
+            temporary = None
+            self.evict()
+        except (OSError, TypeError, ValueError):
+            # The on-disk tier is best effort, results stay cached in memory. A result that cannot be written, for
+            # example one that is not JSON-serializable, leaves no partial file behind
+            if temporary is not None:
+                try:
+                    os.unlink(temporary)
+                except OSError:
+                    pass
+
+    '''
+    Stores a result in the in-memory tier, evicting the least recently used results beyond its capacity.
+    Parameters:
+        key: a cache key.
+        result: a JSON-serializable result.
+    '''
+    def remember(self, key, result):
+        with self.lock:
+            self.memory[key] = result
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_entries:
+                self.memory.popitem(last=False)
+
+    '''
+    Deletes the least recently used files of the on-disk tier until it fits in its size limit.
+    '''
+    def evict(self):
+        files = [entry for entry in os.scandir(self.directory) if entry.is_file() and entry.name.endswith('.json')]
+        files.sort(key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in files)
+        for entry in files:
+            if total <= self.disk_bytes:
+                break
+            total -= entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    '''
+    Empties both tiers.
+    '''
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+        if self.directory is not None and os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.json'):
+                    os.remove(entry.path)
@@ -0,0 +1,88 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import pytest
+from controllers.api import route_bp
+from flask import Flask
+import time
+import numpy as np
+import pandas as pd
+from algorithms.corr import corr_block
+
+# Reset the global variables in each test case
+@pytest.fixture(autouse=True)
+def reset_globals():
+    from controllers import api
+    api.data = None
+    api.sampled_data = None
+    api.selected_algorithm = None
+    api.sensitive_variables = []
+    api.columns = []
+    api.corr_statistics = None
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(route_bp)
+    return app.test_client()
+
+# Helper function to upload a sample CSV dataset
+def upload_sample_dataset(client, dataset_path):
+    with open(dataset_path, 'rb') as data:
+        response = client.post('/upload', content_type='multipart/form-data', data={'file': (data, os.path.basename(dataset_path))})
+        assert response.status_code == 200
+
+# Drop each column in turn with a single upload, answering Pearson from the statistics cached at upload
+def test_pearson_column_subsets_from_cache(client):
+    from controllers import api
+
+    # List of datasets
+    datasets = [
+        os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'test_data.csv')),
+        os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'titanic_train.csv')),
+        os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'titanic_test.csv')),
+        os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'census.csv')),
+    ]
+
+    # List to store results
+    results = []
+
+    for dataset in datasets:
+        dataset_name = os.path.basename(dataset)
+
+        # Upload once, which computes the statistics
+        start_time = time.time()
+        upload_sample_dataset(client, dataset)
+        upload_time = time.time() - start_time
+
+        for drop_column in api.columns:
+            if drop_column == 'Age':
+                continue
+            kept_columns = [col for col in api.columns if col != drop_column]
+
+            # Pearson from the rows of the reduced dataset, as a re-upload would compute it
+            start_time = time.time()
+            expected, _ = corr_block(api.data[kept_columns], ['Age'], 'pearson')
+            rows_time = time.time() - start_time
+
+            # Pearson from the cached statistics
+            start_time = time.time()
+            actual = api.corr_statistics.correlation(['Age'], kept_columns)
+            cache_time = time.time() - start_time
+
+            # Both must agree
+            assert np.nanmax(np.abs(actual[0] - expected)) <= 1e-9
+
+            # Append the result
+            results.append({
+                'Dataset': dataset_name,
+                'Removed Column': drop_column,
+                'Upload Runtime': upload_time,
+                'Rescan Runtime': rows_time,
+                'Cached Runtime': cache_time
+            })
+
+    # Export results to CSV
+    df_results = pd.DataFrame(results)
+    output_csv = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'corr_cols_cache_runtime.csv'))
+    df_results.to_csv(output_csv, index=False)
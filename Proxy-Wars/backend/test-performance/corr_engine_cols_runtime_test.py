@@ -0,0 +1,56 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import time
+import numpy as np
+import pandas as pd
+from algorithms.corr import corr_block, CORR_TOLERANCE
+
+# Number of rows in the synthetic datasets
+ROWS = 5000
+# Column counts to benchmark
+COLUMN_COUNTS = [25, 50, 100, 200, 400, 800]
+# Kendall on the full matrix is quadratic in columns, so it is only timed up to this many columns
+KENDALL_MAX_COLUMNS = 100
+
+# Compare the full DataFrame.corr matrix against the sensitive-only block as the number of columns grows
+def test_corr_engine_scaling_with_columns():
+    rng = np.random.default_rng(0)
+
+    # List to store results
+    results = []
+
+    for column_count in COLUMN_COUNTS:
+        df = pd.DataFrame(rng.normal(size=(ROWS, column_count)), columns=[f"col{i}" for i in range(column_count)])
+        sensitive_variables = ['col0']
+
+        for method in ['pearson', 'spearman', 'kendall']:
+            if method == 'kendall' and column_count > KENDALL_MAX_COLUMNS:
+                continue
+
+            # Time the full N x N matrix, as compute_corr used to
+            start_time = time.time()
+            expected = df.corr(method=method)[sensitive_variables].T.to_numpy()
+            full_time = time.time() - start_time
+
+            # Time the k x N block
+            start_time = time.time()
+            actual, _ = corr_block(df, sensitive_variables, method)
+            block_time = time.time() - start_time
+
+            # Both engines must agree
+            assert np.nanmax(np.abs(actual - expected)) <= CORR_TOLERANCE
+
+            # Append the result
+            results.append({
+                'Columns': column_count,
+                'Method': method,
+                'Full Matrix Runtime': full_time,
+                'Sensitive Block Runtime': block_time,
+                'Speedup': full_time / block_time if block_time > 0 else np.nan
+            })
+
+    # Export results to CSV
+    df_results = pd.DataFrame(results)
+    output_csv = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'corr_engine_cols_runtime.csv'))
+    df_results.to_csv(output_csv, index=False)
@@ -0,0 +1,57 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import time
+import numpy as np
+import pandas as pd
+from algorithms.corr import corr_block, CORR_TOLERANCE
+
+# Row counts to benchmark
+ROW_COUNTS = [10000, 100000, 1000000]
+# Number of columns in the synthetic datasets
+COLUMNS = 6
+
+# Compare DataFrame.corr(method='kendall') against the merge sort Kendall block as the number of rows grows
+def test_kendall_scaling_with_rows():
+    rng = np.random.default_rng(0)
+
+    # Warm up the compiled Kendall kernels so compilation is not timed
+    warm_up = pd.DataFrame(rng.normal(size=(100, 2)), columns=['a', 'b'])
+    corr_block(warm_up, ['a'], 'kendall')
+
+    # List to store results
+    results = []
+
+    for row_count in ROW_COUNTS:
+        # Mix of continuous and heavily tied columns
+        values = rng.normal(size=(row_count, COLUMNS))
+        values[:, 1::2] = np.round(values[:, 1::2] * 2)
+        df = pd.DataFrame(values, columns=[f"col{i}" for i in range(COLUMNS)])
+        sensitive_variables = ['col0']
+
+        # Time the full Kendall matrix, as compute_corr used to
+        start_time = time.time()
+        expected = df.corr(method='kendall')[sensitive_variables].T.to_numpy()
+        full_time = time.time() - start_time
+
+        # Time the Kendall block
+        start_time = time.time()
+        actual, _ = corr_block(df, sensitive_variables, 'kendall')
+        block_time = time.time() - start_time
+
+        # Both engines must agree
+        assert np.nanmax(np.abs(actual - expected)) <= CORR_TOLERANCE
+
+        # Append the result
+        results.append({
+            'Rows': row_count,
+            'Columns': COLUMNS,
+            'DataFrame.corr Runtime': full_time,
+            'Kendall Block Runtime': block_time,
+            'Speedup': full_time / block_time if block_time > 0 else np.nan
+        })
+
+    # Export results to CSV
+    df_results = pd.DataFrame(results)
+    output_csv = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'corr_kendall_rows_runtime.csv'))
+    df_results.to_csv(output_csv, index=False)
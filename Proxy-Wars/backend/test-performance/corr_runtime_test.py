@@ -67,7 +67,7 @@ def test_get_results_on_datasets(client):
 
             # Measure time for results
             start_time = time.time()
-            response = client.get('/results')
+            response = client.get('/results?cache=false')
             end_time = time.time()
 
             # Assert that the result is valid
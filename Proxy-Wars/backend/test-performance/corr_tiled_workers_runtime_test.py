@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import time
+import numpy as np
+import pandas as pd
+from algorithms.corr import corr_block, corr_blocks_tiled, CORR_METHODS, CORR_TOLERANCE
+
+# Number of rows in the synthetic dataset
+ROWS = 100000
+# Number of columns in the synthetic dataset
+COLUMNS = 2000
+# Worker process counts to benchmark, capped at the number of cores
+WORKER_COUNTS = [1, 2, 4, 8, 16, 32]
+
+# Compare the serial sensitive block against the tiled engine as the number of worker processes grows
+def test_corr_tiled_scaling_with_workers():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(ROWS, COLUMNS)), columns=[f"col{i}" for i in range(COLUMNS)])
+    sensitive_variables = ['col0', 'col1']
+    cores = os.cpu_count() or 1
+
+    # List to store results
+    results = []
+
+    for method in CORR_METHODS:
+        # Time the serial k x N block
+        start_time = time.time()
+        expected, _ = corr_block(df, sensitive_variables, method)
+        serial_time = time.time() - start_time
+
+        for workers in [count for count in WORKER_COUNTS if count <= cores]:
+            # Time the tiled engine, including the copy into shared memory and the process pool start-up
+            start_time = time.time()
+            actual, _ = corr_blocks_tiled(df, sensitive_variables, [method], workers=workers)[method]
+            tiled_time = time.time() - start_time
+
+            # Both engines must agree
+            assert np.nanmax(np.abs(actual - expected)) <= CORR_TOLERANCE
+
+            # Append the result
+            results.append({
+                'Method': method,
+                'Cores': cores,
+                'Workers': workers,
+                'Serial Runtime': serial_time,
+                'Tiled Runtime': tiled_time,
+                'Speedup': serial_time / tiled_time if tiled_time > 0 else np.nan
+            })
+
+    # Export results to CSV
+    df_results = pd.DataFrame(results)
+    output_csv = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'corr_tiled_workers_runtime.csv'))
+    df_results.to_csv(output_csv, index=False)
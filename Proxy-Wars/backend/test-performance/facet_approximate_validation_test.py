@@ -0,0 +1,70 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import time
+import numpy as np
+import pandas as pd
+from scipy.stats import spearmanr, kendalltau
+from facet.data import Sample
+from algorithms.facet_alg import fit_facet, fit_inspector
+
+# Datasets to validate on with their target variable
+DATASETS = [
+    ('titanic_train.csv', 'Pclass'),
+    ('titanic_test.csv', 'Pclass'),
+    ('census.csv', 'Class'),
+]
+# Number of most redundant features per column compared between both modes
+TOP_FEATURES = 3
+
+# Validate the approximate redundancy (association of plain SHAP vectors) against the exact redundancy (SHAP
+# interaction values) of the same model: runtime, rank agreement over all feature pairs, agreement on the most
+# redundant features of every column, and how often the approximation bounds the exact value from above
+def test_facet_approximate_validation():
+    # List to store results
+    results = []
+
+    for dataset_name, target in DATASETS:
+        df = pd.read_csv(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', dataset_name)))
+        features = [col for col in df.columns if col != target]
+        sample = Sample(observations=df, target_name=target)
+        pairs = ~np.eye(len(features), dtype=bool)
+
+        # Select the model once, only the inspectors are timed
+        selector, _ = fit_facet(df, target, pairs='sensitive', mode='approximate')
+        model = selector.best_estimator_
+
+        start_time = time.time()
+        exact = fit_inspector(model, sample).feature_redundancy_matrix().to_frame().loc[features, features].to_numpy(dtype=float) * 100
+        exact_time = time.time() - start_time
+        start_time = time.time()
+        approximate = fit_inspector(model, sample, interactions=False).feature_association_matrix().to_frame().loc[features, features].to_numpy(dtype=float) * 100
+        approximate_time = time.time() - start_time
+
+        # Share of the most redundant features of every column found by both modes
+        top = min(TOP_FEATURES, len(features) - 1)
+        overlaps = []
+        for j in range(len(features)):
+            exact_top = set(np.argsort(-np.nan_to_num(exact[:, j], nan=-1))[:top])
+            approximate_top = set(np.argsort(-np.nan_to_num(approximate[:, j], nan=-1))[:top])
+            overlaps.append(len(exact_top & approximate_top) / top)
+
+        # Append the result
+        results.append({
+            'Dataset': dataset_name,
+            'Features': len(features),
+            'Exact Runtime': exact_time,
+            'Approximate Runtime': approximate_time,
+            'Speedup': exact_time / approximate_time,
+            'Spearman Rank Correlation': spearmanr(exact[pairs], approximate[pairs])[0],
+            'Kendall Rank Correlation': kendalltau(exact[pairs], approximate[pairs])[0],
+            f'Top {TOP_FEATURES} Overlap': np.mean(overlaps),
+            'Mean Absolute Difference': np.abs(exact - approximate)[pairs].mean(),
+            'Max Absolute Difference': np.abs(exact - approximate)[pairs].max(),
+            'Share Approximate Above Exact': np.mean(approximate[pairs] >= exact[pairs] - 1e-9)
+        })
+
+    # Export results to CSV
+    df_results = pd.DataFrame(results)
+    output_csv = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'facet_approximate_validation.csv'))
+    df_results.to_csv(output_csv, index=False)
@@ -0,0 +1,47 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import time
+import pandas as pd
+import algorithms.facet_alg as facet_alg
+from algorithms.facet_alg import compute_facet, compute_facet_batch
+from util.resource_governor import granted_cpus
+
+# Datasets to benchmark with their target variables, sensitive variable and the percentage of their rows
+DATASETS = [
+    ('titanic_train.csv', ['Survived', 'Pclass'], 'Sex', 100),
+    ('census.csv', ['Class', 'Hours-per-week'], 'Sex', 10),
+]
+# Numbers of worker processes of the batch
+WORKERS = [1, 2]
+
+# Compare one FACET fit per target in a serial loop, as one /results call per target does, with the batch of all
+# targets, for several numbers of workers
+def test_facet_batch():
+    # List to store results
+    results = []
+
+    for dataset_name, targets, sensitive, percentage in DATASETS:
+        df = pd.read_csv(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', dataset_name)))
+        df = df.sample(frac=percentage / 100, random_state=1) if percentage < 100 else df
+
+        # One fit per target, one after the other
+        facet_alg.fitted_models.clear()
+        start_time = time.time()
+        for target in targets:
+            compute_facet([sensitive], df, target)
+        results.append({'Dataset': dataset_name, 'Rows': len(df), 'Method': 'serial loop', 'Workers': 1,
+                        'CPUs': os.cpu_count(), 'Targets': len(targets), 'Runtime': time.time() - start_time})
+
+        for workers in WORKERS:
+            facet_alg.fitted_models.clear()
+            start_time = time.time()
+            with granted_cpus(os.cpu_count()):
+                compute_facet_batch([sensitive], df, targets, workers=workers)
+            results.append({'Dataset': dataset_name, 'Rows': len(df), 'Method': 'batch', 'Workers': workers,
+                            'CPUs': os.cpu_count(), 'Targets': len(targets), 'Runtime': time.time() - start_time})
+
+    # Export results to CSV
+    df_results = pd.DataFrame(results)
+    output_csv = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'facet_batch_runtime.csv'))
+    df_results.to_csv(output_csv, index=False)
@@ -0,0 +1,78 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import time
+import numpy as np
+import pandas as pd
+import algorithms.facet_alg as facet_alg
+from algorithms.facet_alg import fit_facet, facet_work, LEARNERS, SEARCH_STRATEGIES
+from algorithms.facet_cost import CostModel
+
+# Cost model that also keeps the raw wall time of every phase
+class RecordingCostModel(CostModel):
+    def __init__(self):
+        super().__init__()
+        self.phases = []
+
+    def observe(self, phase, learner, fits, work, seconds):
+        self.phases.append((phase, seconds))
+        super().observe(phase, learner, fits, work, seconds)
+
+# Datasets to calibrate on with their target variable and the percentages of their rows
+DATASETS = [
+    ('titanic_train.csv', 'Pclass', [50, 100]),
+    ('titanic_test.csv', 'Pclass', [100]),
+    ('census.csv', 'Class', [10, 25]),
+]
+
+# Time both FACET phases over datasets, sizes, learners and searches, and compare the predictions of the default
+# coefficients with the predictions rescaled by the other runs of the same learner, as the online calibration does
+def test_facet_cost_model():
+    # List to store results
+    results = []
+    recorder = RecordingCostModel()
+    facet_alg.cost_model = recorder
+
+    for dataset_name, target, percentages in DATASETS:
+        df = pd.read_csv(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', dataset_name)))
+        for percentage in percentages:
+            sample = df.sample(frac=percentage / 100, random_state=1) if percentage < 100 else df
+            for learner in LEARNERS:
+                for search in SEARCH_STRATEGIES:
+                    start_time = time.time()
+                    selector, inspector = fit_facet(sample, target, search=search, learner=learner)
+                    total_time = time.time() - start_time
+                    fits, selection, inspection, _ = facet_work(len(sample), len(sample.columns) - 1, search, learner)
+                    (_, selection_time), (_, inspector_time) = recorder.phases[-2:]
+                    results.append({
+                        'Dataset': dataset_name,
+                        'Rows': len(sample),
+                        'Columns': len(sample.columns) - 1,
+                        'Learner': learner,
+                        'Search': search,
+                        'Selection Fits': fits,
+                        'Selection Work': selection,
+                        'Inspector Work': inspection,
+                        'Selection Runtime': selection_time,
+                        'Inspector Runtime': inspector_time,
+                        'Runtime': total_time
+                    })
+
+    # Default prediction of every phase, and the prediction rescaled by the median ratio of the other runs
+    df_results = pd.DataFrame(results)
+    model = CostModel()
+    for phase, fits in [('selection', 'Selection Fits'), ('inspector', None)]:
+        name = phase.capitalize()
+        default = [model.default_seconds(phase, row['Learner'], row[fits] if fits else 1, row[f'{name} Work']) for _, row in df_results.iterrows()]
+        df_results[f'{name} Default Prediction'] = default
+        ratio = df_results[f'{name} Runtime'] / df_results[f'{name} Default Prediction']
+        scale = [np.median(ratio[(df_results['Learner'] == row['Learner']) & (df_results.index != index)]) for index, row in df_results.iterrows()]
+        df_results[f'{name} Calibrated Prediction'] = df_results[f'{name} Default Prediction'] * scale
+    df_results['Default Prediction'] = df_results['Selection Default Prediction'] + df_results['Inspector Default Prediction']
+    df_results['Calibrated Prediction'] = df_results['Selection Calibrated Prediction'] + df_results['Inspector Calibrated Prediction']
+    df_results['Default Ratio'] = df_results['Default Prediction'] / df_results['Runtime']
+    df_results['Calibrated Ratio'] = df_results['Calibrated Prediction'] / df_results['Runtime']
+
+    # Export results to CSV
+    output_csv = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'facet_cost_model.csv'))
+    df_results.to_csv(output_csv, index=False)
@@ -0,0 +1,67 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import time
+import numpy as np
+import pandas as pd
+from facet.data import Sample
+from facet.inspection import LearnerInspector
+from algorithms.facet_alg import fit_facet, explain_subsample, redundancy_error
+
+# Datasets to benchmark with their target variable
+DATASETS = [
+    ('titanic_train.csv', 'Pclass'),
+    ('census.csv', 'Class'),
+]
+# Rows explained by the SHAP values: all of them, fixed subsamples, and the adaptive subsample
+EXPLAIN_ROWS = [None, 1000, 4000, 'auto']
+
+# Compare the inspector on every row with the inspector on stratified subsamples: runtime, how far the redundancy
+# values are from the full explanation, and the bootstrap error the subsample reports
+def test_facet_explain_rows():
+    # List to store results
+    results = []
+
+    for dataset_name, target in DATASETS:
+        df = pd.read_csv(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', dataset_name)))
+        features = [col for col in df.columns if col != target]
+        pairs = ~np.eye(len(features), dtype=bool)
+
+        # Select the model once, only the inspector is timed
+        selector, _ = fit_facet(df, target)
+        model = selector.best_estimator_
+
+        reference = None
+        for explain_rows in EXPLAIN_ROWS:
+            start_time = time.time()
+            if explain_rows is None:
+                inspector = LearnerInspector(model=model, n_jobs=-3).fit(Sample(observations=df, target_name=target))
+            else:
+                inspector = explain_subsample(model, df, target, explain_rows)
+            redundancy = inspector.feature_redundancy_matrix().to_frame().loc[features, features].to_numpy(dtype=float) * 100
+            inspector_time = time.time() - start_time
+
+            # The bootstrap is timed on its own
+            start_time = time.time()
+            error = redundancy_error(inspector).loc[features, features].to_numpy(dtype=float) * 100
+            bootstrap_time = time.time() - start_time
+            reference = redundancy if reference is None else reference
+
+            # Append the result
+            results.append({
+                'Dataset': dataset_name,
+                'Rows': len(df),
+                'Explain Rows': 'all' if explain_rows is None else explain_rows,
+                'Explained Rows': len(inspector.sample_),
+                'Inspector Runtime': inspector_time,
+                'Bootstrap Runtime': bootstrap_time,
+                'Mean Bootstrap Error': error[pairs].mean(),
+                'Max Bootstrap Error': error[pairs].max(),
+                'Mean Difference From All Rows': np.abs(redundancy - reference)[pairs].mean(),
+                'Max Difference From All Rows': np.abs(redundancy - reference)[pairs].max()
+            })
+
+    # Export results to CSV
+    df_results = pd.DataFrame(results)
+    output_csv = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'facet_explain_rows_runtime.csv'))
+    df_results.to_csv(output_csv, index=False)
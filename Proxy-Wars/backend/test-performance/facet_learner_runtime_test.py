@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import time
+import numpy as np
+import pandas as pd
+from scipy.stats import spearmanr
+from algorithms.facet_alg import fit_facet, LEARNERS
+
+# Datasets to benchmark with their target variable
+DATASETS = [
+    ('titanic_train.csv', 'Pclass'),
+    ('census.csv', 'Class'),
+]
+
+# Compare the surrogate learners: runtime, fit quality and how far their redundancy matrices are from the Random Forest
+def test_facet_learners():
+    # List to store results
+    results = []
+
+    for dataset_name, target in DATASETS:
+        df = pd.read_csv(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', dataset_name)))
+
+        reference = None
+        for learner in LEARNERS:
+            # Time model selection and the inspector separately
+            start_time = time.time()
+            selector, inspector = fit_facet(df, target, learner=learner)
+            fit_time = time.time() - start_time
+            start_time = time.time()
+            features = [col for col in df.columns if col != target]
+            redundancy = inspector.feature_redundancy_matrix().to_frame().loc[features, features].to_numpy(dtype=float) * 100
+            redundancy_time = time.time() - start_time
+
+            # Differences from the Random Forest over the feature pairs, ignoring the diagonal
+            reference = redundancy if reference is None else reference
+            pairs = ~np.eye(len(redundancy), dtype=bool)
+
+            # Append the result
+            results.append({
+                'Dataset': dataset_name,
+                'Learner': learner,
+                'Selection and Inspector Fit Runtime': fit_time,
+                'Redundancy Runtime': redundancy_time,
+                'Best Parameters': selector.searcher_.best_params_,
+                'Best R2': selector.searcher_.best_score_,
+                'Mean Redundancy Difference': np.abs(redundancy - reference)[pairs].mean(),
+                'Max Redundancy Difference': np.abs(redundancy - reference)[pairs].max(),
+                'Redundancy Rank Correlation': spearmanr(redundancy[pairs], reference[pairs])[0]
+            })
+
+    # Export results to CSV
+    df_results = pd.DataFrame(results)
+    output_csv = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'facet_learner_runtime.csv'))
+    df_results.to_csv(output_csv, index=False)
@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import time
+import pandas as pd
+import algorithms.facet_alg as facet_alg
+from algorithms.facet_alg import compute_facet_selection, facet_matrix, MEMO_MODES
+
+# Datasets to benchmark with their target and sensitive variable
+DATASETS = [
+    ('titanic_train.csv', 'Pclass', 'Age'),
+    ('census.csv', 'Class', 'Age'),
+]
+# Percentage and seed of the sample that warms the memo, and of the later samples of the same dataset
+WARM_SAMPLE = (25, 1)
+SAMPLES = [(25, 2), (50, 3)]
+
+# Warm the hyperparameter memo on one sample of every dataset, then compare the full search against the memoized
+# best candidate and its neighbours on other samples: wall time, the selected hyperparameters and the redundancy values
+def test_facet_memo_runtime():
+    # List to store results
+    results = []
+
+    for dataset_name, target, sensitive in DATASETS:
+        df = pd.read_csv(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', dataset_name)))
+        facet_alg.hyperparameter_memo.clear()
+        facet_alg.fitted_models.clear()
+        warm = df.sample(frac=WARM_SAMPLE[0] / 100, random_state=WARM_SAMPLE[1])
+        facet_matrix([sensitive], warm, target, memo=dataset_name)
+
+        for percentage, seed in SAMPLES:
+            sample = df.sample(frac=percentage / 100, random_state=seed)
+            redundancy = {}
+            for memo_mode in ['off'] + MEMO_MODES:
+                memo = {} if memo_mode == 'off' else {'memo': dataset_name, 'memo_mode': memo_mode}
+                start_time = time.time()
+                redundancy[memo_mode] = facet_matrix([sensitive], sample, target, **memo)[sensitive] * 100
+                runtime = time.time() - start_time
+                selection = compute_facet_selection([sensitive], sample, target, **memo)
+
+                # Append the result
+                results.append({
+                    'Dataset': dataset_name,
+                    'Rows': len(sample),
+                    'Memo': memo_mode,
+                    'Memoized': selection['memoized'],
+                    'Runtime': runtime,
+                    'Hyperparameters': selection['hyperparameters'],
+                    'Max Redundancy Difference': (redundancy[memo_mode] - redundancy['off']).abs().max()
+                })
+
+    # Export results to CSV
+    df_results = pd.DataFrame(results)
+    output_csv = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'facet_memo_runtime.csv'))
+    df_results.to_csv(output_csv, index=False)
@@ -0,0 +1,52 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import time
+import numpy as np
+import pandas as pd
+from algorithms.facet_alg import fit_facet, SEARCH_STRATEGIES
+
+# Datasets to benchmark with their target and sensitive variable
+DATASETS = [
+    ('titanic_train.csv', 'Pclass', 'Age'),
+    ('census.csv', 'Class', 'Age'),
+]
+
+# Compare the exhaustive grid search against successive halving: wall time, the chosen model and its redundancy values
+def test_facet_search_strategies():
+    # List to store results
+    results = []
+
+    for dataset_name, target, sensitive in DATASETS:
+        df = pd.read_csv(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', dataset_name)))
+
+        redundancy = {}
+        for search in SEARCH_STRATEGIES:
+            # Time model selection and the inspector separately
+            start_time = time.time()
+            selector, inspector = fit_facet(df, target, search=search)
+            fit_time = time.time() - start_time
+            start_time = time.time()
+            redundancy[search] = inspector.feature_redundancy_matrix().to_frame()[sensitive] * 100
+            redundancy_time = time.time() - start_time
+
+            # Redundancy of the sensitive variable with every other column, and its largest change from the grid search
+            others = redundancy[search].drop(index=sensitive)
+            difference = (others - redundancy['grid'].drop(index=sensitive)).abs().max()
+
+            # Append the result
+            results.append({
+                'Dataset': dataset_name,
+                'Search': search,
+                'Selection and Inspector Fit Runtime': fit_time,
+                'Redundancy Runtime': redundancy_time,
+                'Best Parameters': selector.searcher_.best_params_,
+                'Best R2': selector.searcher_.best_score_,
+                'Max Redundancy Difference': difference,
+                'Redundancy': {col: round(float(val), 3) for col, val in others.items()}
+            })
+
+    # Export results to CSV
+    df_results = pd.DataFrame(results)
+    output_csv = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'facet_search_runtime.csv'))
+    df_results.to_csv(output_csv, index=False)
@@ -0,0 +1,62 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import time
+import numpy as np
+import pandas as pd
+from facet.data import Sample
+from algorithms.facet_alg import facet_learner, fit_inspector, sensitive_redundancy
+
+# Rows of the census dataset used
+ROWS = 2000
+# Number of features, the census features being widened with noisy copies
+FEATURE_COUNTS = [14, 28, 56]
+# Sensitive variables
+SENSITIVE_VARIABLES = ['Age', 'Sex']
+
+# Compare the redundancy of every feature pair with the redundancy of the sensitive pairs only, as the number of
+# features grows. The model is fitted once per width, only the inspector and redundancy are timed
+def test_facet_sensitive_pairs():
+    # List to store results
+    results = []
+    rng = np.random.default_rng(0)
+    census = pd.read_csv(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'census.csv'))).head(ROWS)
+    features = [col for col in census.columns if col != 'Class']
+
+    for feature_count in FEATURE_COUNTS:
+        df = census.copy()
+        for copy in range(feature_count - len(features)):
+            col = features[copy % len(features)]
+            df[f"{col}_{copy}"] = df[col] + rng.normal(0, df[col].std() / 4, len(df))
+        sample = Sample(observations=df, target_name='Class')
+        model, _ = facet_learner('random_forest', len(df))
+        model.regressor.set_params(max_depth=10, min_samples_leaf=20)
+        model.fit(sample.features, sample.target)
+
+        # Every feature pair, the default
+        start_time = time.time()
+        inspector = fit_inspector(model, sample)
+        full = inspector.feature_redundancy_matrix().to_frame()[SENSITIVE_VARIABLES]
+        all_time = time.time() - start_time
+
+        # The sensitive pairs only
+        start_time = time.time()
+        inspector = fit_inspector(model, sample, project=False)
+        shap_time = time.time() - start_time
+        sensitive = sensitive_redundancy(inspector, SENSITIVE_VARIABLES)
+        sensitive_time = time.time() - start_time
+
+        # Append the result
+        results.append({
+            'Rows': len(df),
+            'Features': feature_count,
+            'All Pairs Runtime': all_time,
+            'Sensitive Pairs Runtime': sensitive_time,
+            'SHAP Interaction Values Runtime': shap_time,
+            'Max Difference': np.nanmax(np.abs(full.loc[sensitive.index].to_numpy() - sensitive.to_numpy())) * 100
+        })
+
+    # Export results to CSV
+    df_results = pd.DataFrame(results)
+    output_csv = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'facet_sensitive_pairs_runtime.csv'))
+    df_results.to_csv(output_csv, index=False)
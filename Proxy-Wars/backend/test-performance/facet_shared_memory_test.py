@@ -0,0 +1,106 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import gc
+import time
+import threading
+from contextlib import nullcontext
+import psutil
+import pandas as pd
+from joblib.externals.loky import get_reusable_executor
+import algorithms.facet_alg as facet_alg
+
+# Datasets to benchmark with their target variable and the percentages of their rows
+DATASETS = [
+    ('titanic_train.csv', 'Pclass', [100]),
+    ('census.csv', 'Class', [25, 50]),
+]
+# Number of joblib workers of the model selection and the inspector, forced so that workers start on any machine
+WORKERS = 2
+# Number of runs of every handoff, keeping the fastest and the smallest
+REPEATS = 2
+# Seconds between two memory samples
+SAMPLE_INTERVAL = .2
+
+# Samples the memory of this process and its workers until stopped, keeping the peaks. The proportional set size
+# splits the pages shared by several processes between them, so the shared copy of the features is counted once
+class MemorySampler(threading.Thread):
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.stopped = threading.Event()
+        self.peak_rss = 0
+        self.peak_pss = 0
+
+    def run(self):
+        process = psutil.Process()
+        while not self.stopped.is_set():
+            rss = pss = 0
+            for member in [process] + process.children(recursive=True):
+                try:
+                    info = member.memory_full_info()
+                except psutil.Error:
+                    continue
+                rss += info.rss
+                pss += info.pss
+            self.peak_rss = max(self.peak_rss, rss)
+            self.peak_pss = max(self.peak_pss, pss)
+            self.stopped.wait(SAMPLE_INTERVAL)
+
+# Run FACET with the features pickled to every worker as before, and converted once and shared through memory maps,
+# comparing the wall time and the peak memory of the process and its workers
+def test_facet_shared_memory():
+    # List to store results
+    results = []
+    facet_alg.LEARNER_SELECTOR_JOBS = WORKERS
+    facet_alg.INSPECTOR_JOBS = WORKERS
+    shared_features = facet_alg.shared_features
+    shared_workers = facet_alg.shared_workers
+
+    for dataset_name, target, percentages in DATASETS:
+        df = pd.read_csv(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', dataset_name)))
+        for percentage in percentages:
+            sample = df.sample(frac=percentage / 100, random_state=1) if percentage < 100 else df
+            redundancy = {}
+            for handoff in ['pickled', 'shared']:
+                if handoff == 'pickled':
+                    facet_alg.shared_features = lambda data, target_var, learner: data
+                    facet_alg.shared_workers = nullcontext
+                else:
+                    facet_alg.shared_features = shared_features
+                    facet_alg.shared_workers = shared_workers
+
+                runtimes, peak_rss, peak_pss = [], [], []
+                for _ in range(REPEATS):
+                    # Fresh workers and no fits of earlier runs, so that no run inherits the memory of another
+                    get_reusable_executor().shutdown(wait=True)
+                    gc.collect()
+                    sampler = MemorySampler()
+                    sampler.start()
+                    start_time = time.time()
+                    selector, inspector = facet_alg.fit_facet(sample, target)
+                    runtimes.append(time.time() - start_time)
+                    sampler.stopped.set()
+                    sampler.join()
+                    peak_rss.append(sampler.peak_rss)
+                    peak_pss.append(sampler.peak_pss)
+                    redundancy[handoff] = inspector.feature_redundancy_matrix().to_frame()
+                    del selector, inspector
+
+                # Append the result
+                results.append({
+                    'Dataset': dataset_name,
+                    'Rows': len(sample),
+                    'Handoff': handoff,
+                    'Runtime': min(runtimes),
+                    'Peak RSS MB': min(peak_rss) / 2 ** 20,
+                    'Peak PSS MB': min(peak_pss) / 2 ** 20,
+                    'Max Redundancy Difference': (redundancy[handoff] - redundancy['pickled']).abs().max().max()
+                })
+
+    facet_alg.shared_features = shared_features
+    facet_alg.shared_workers = shared_workers
+
+    # Export results to CSV
+    df_results = pd.DataFrame(results)
+    output_csv = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'facet_shared_memory.csv'))
+    df_results.to_csv(output_csv, index=False)
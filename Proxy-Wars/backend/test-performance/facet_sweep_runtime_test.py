@@ -0,0 +1,46 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import time
+import pandas as pd
+import algorithms.facet_alg as facet_alg
+from algorithms.facet_alg import compute_facet, compute_facet_sweep
+from util.resource_governor import granted_cpus
+
+# Datasets to benchmark with their target and sensitive variables
+DATASETS = [
+    ('titanic_train.csv', 'Pclass', 'Age'),
+    ('titanic_test.csv', 'Pclass', 'Age'),
+]
+# Numbers of worker processes of the sweep
+WORKERS = [1, 2, 4]
+
+# Compare leaving out every column in a serial loop of FACET fits with the sweep, for several numbers of workers
+def test_facet_sweep():
+    # List to store results
+    results = []
+
+    for dataset_name, target, sensitive in DATASETS:
+        df = pd.read_csv(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', dataset_name)))
+        drop_columns = [col for col in df.columns if col not in (target, sensitive)]
+
+        # One fit per copy, one after the other
+        facet_alg.fitted_models.clear()
+        start_time = time.time()
+        for drop_column in [None] + drop_columns:
+            compute_facet([sensitive], df if drop_column is None else df.drop(columns=[drop_column]), target)
+        results.append({'Dataset': dataset_name, 'Method': 'serial loop', 'Workers': 1, 'CPUs': os.cpu_count(),
+                        'Fits': len(drop_columns) + 1, 'Runtime': time.time() - start_time})
+
+        for workers in WORKERS:
+            facet_alg.fitted_models.clear()
+            start_time = time.time()
+            with granted_cpus(os.cpu_count()):
+                compute_facet_sweep([sensitive], df, target, drop_columns, workers=workers)
+            results.append({'Dataset': dataset_name, 'Method': 'sweep', 'Workers': workers, 'CPUs': os.cpu_count(),
+                            'Fits': len(drop_columns) + 1, 'Runtime': time.time() - start_time})
+
+    # Export results to CSV
+    df_results = pd.DataFrame(results)
+    output_csv = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'facet_sweep_runtime.csv'))
+    df_results.to_csv(output_csv, index=False)
@@ -0,0 +1,63 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import time
+import numpy as np
+import pandas as pd
+from flask import Flask, jsonify
+from algorithms.result_matrix import ResultMatrix
+
+# Number of sensitive variables in the result
+SENSITIVE_COUNT = 3
+# Column counts to benchmark
+COLUMN_COUNTS = [100, 1000, 10000, 100000]
+# Number of decimal places the values are rounded to
+DECIMALS = 3
+
+# Compare per-cell formatting followed by jsonify against the vectorized nested and columnar layouts as results widen
+def test_result_serialization_scaling_with_columns():
+    rng = np.random.default_rng(0)
+    app = Flask(__name__)
+
+    # List to store results
+    results = []
+
+    with app.app_context():
+        for column_count in COLUMN_COUNTS:
+            values = rng.uniform(-1, 1, size=(SENSITIVE_COUNT, column_count))
+            values[rng.random(values.shape) < 0.01] = np.nan
+            rows = [f"sens{i}" for i in range(SENSITIVE_COUNT)]
+            columns = [f"col{j}" for j in range(column_count)]
+
+            # Time the per-cell formatting the algorithms used before
+            start_time = time.time()
+            cells = {row: {col: "NaN" if np.isnan(val) else round(float(val), DECIMALS) for col, val in zip(columns, line)}
+                     for row, line in zip(rows, values)}
+            jsonify({'results': cells}).get_data()
+            per_cell_time = time.time() - start_time
+
+            # Time the vectorized nested layout, still returned through jsonify
+            start_time = time.time()
+            nested = ResultMatrix(values, rows, columns, DECIMALS).to_dict()
+            jsonify({'results': nested}).get_data()
+            nested_time = time.time() - start_time
+            assert nested == cells
+
+            # Time the columnar layout serialized straight to compact JSON
+            start_time = time.time()
+            ResultMatrix(values, rows, columns, DECIMALS).to_json()
+            columnar_time = time.time() - start_time
+
+            # Append the result
+            results.append({
+                'Columns': column_count,
+                'Per-Cell Runtime': per_cell_time,
+                'Nested Runtime': nested_time,
+                'Columnar Runtime': columnar_time,
+                'Columnar Speedup': per_cell_time / columnar_time if columnar_time > 0 else np.nan
+            })
+
+    # Export results to CSV
+    df_results = pd.DataFrame(results)
+    output_csv = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'result_serialization_runtime.csv'))
+    df_results.to_csv(output_csv, index=False)
@@ -0,0 +1,67 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import time
+import numpy as np
+import pandas as pd
+from algorithms.corr import compute_corr, CORR_METHODS
+from algorithms.stability import compute_stability
+
+# Datasets to benchmark with their sensitive variables
+DATASETS = [
+    ('titanic_train.csv', ['Age', 'Sex']),
+    ('census.csv', ['Age', 'Sex']),
+]
+# Number of samples, their percentage and the seed of the first one
+SAMPLES = 20
+PERCENTAGES = [10, 25]
+SEED = 1
+# Numbers of worker processes of the stability job
+WORKERS = [1, 2]
+# Number of runs of every variant, keeping the fastest
+REPEATS = 3
+
+# Returns the fastest wall time of some runs of a function and the result of the last run
+def fastest(function):
+    runtimes = []
+    for _ in range(REPEATS):
+        start_time = time.time()
+        result = function()
+        runtimes.append(time.time() - start_time)
+    return min(runtimes), result
+
+# Summarize the correlations of B samples with the stability job, which converts and ranks the dataset once, against
+# running compute_corr on every sample drawn like /random: wall time and the largest difference of the mean correlations
+def test_stability_runtime():
+    # List to store results
+    results = []
+    # Compile the Kendall kernels before timing anything
+    compute_corr(['A'], pd.DataFrame({'A': [1.0, 2.0, 3.0], 'B': [3.0, 1.0, 2.0]}))
+
+    for dataset_name, sensitive in DATASETS:
+        df = pd.read_csv(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', dataset_name)))
+        df = df.select_dtypes([np.number])
+        for percentage in PERCENTAGES:
+            # Baseline: one full correlation analysis per sample
+            baseline_runtime, samples = fastest(lambda: [compute_corr(sensitive, df.sample(frac=percentage / 100, random_state=SEED + b), layout='columnar') for b in range(SAMPLES)])
+            baseline = {method: np.array([sample[method]['values'] for sample in samples], dtype=float).mean(axis=0) for method in CORR_METHODS}
+
+            for workers in WORKERS:
+                runtime, stability = fastest(lambda: compute_stability(sensitive, df, 'Correlational Analysis', SAMPLES, percentage, SEED, layout='columnar', workers=workers))
+
+                # Append the result
+                results.append({
+                    'Dataset': dataset_name,
+                    'Rows': stability['rows'],
+                    'Samples': SAMPLES,
+                    'Workers': workers,
+                    'Per-Sample compute_corr Runtime': baseline_runtime,
+                    'Stability Runtime': runtime,
+                    'Speedup': baseline_runtime / runtime,
+                    'Max Mean Difference': max(np.nanmax(np.abs(np.array(stability['results'][method]['mean']['values'], dtype=float) - baseline[method])) for method in CORR_METHODS)
+                })
+
+    # Export results to CSV
+    df_results = pd.DataFrame(results)
+    output_csv = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'docs', 'stability_runtime.csv'))
+    df_results.to_csv(output_csv, index=False)
@@ -0,0 +1,78 @@
+'''
+assoc_test.py
+Unit tests for the `compute_assoc` function, which measures association between sensitive variables and other
+variables with Cramér's V and the correlation ratio.
+
+Key Features:
+    - Checks Cramér's V and the correlation ratio against direct computations from contingency tables and group means.
+    - Validates the handling of missing values and constant columns.
+    - Ensures that appropriate exceptions are raised for erroneous inputs.
+'''
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+import unittest
+import numpy as np
+import pandas as pd
+from scipy.stats.contingency import association, crosstab
+from algorithms.assoc import compute_assoc
+
+'''
+This class contains unit tests for the compute_assoc function.
+'''
+class TestComputeAssoc(unittest.TestCase):
+
+    '''
+    Set up for tests. Defines a dataset with categorical, numeric and constant columns.
+    '''
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        rows = 2000
+        occupation = rng.integers(0, 4, rows)
+        self.data = pd.DataFrame({
+            'Occupation': occupation.astype(float),
+            'Country': ((occupation + rng.integers(0, 3, rows)) % 5).astype(float),
+            'Income': occupation * 1.5 + rng.normal(size=rows),
+            'Noise': rng.normal(size=rows),
+            'Constant': np.ones(rows)
+        })
+        self.data.loc[rng.random(rows) < 0.05, 'Country'] = np.nan
+
+    '''
+    Tests Cramér's V between two categorical columns, with missing values
+    '''
+    def test_cramers_v(self):
+        result = compute_assoc(['Occupation'], self.data, categorical_columns=['Occupation', 'Country'])
+        complete = self.data[['Occupation', 'Country']].dropna()
+        expected = association(crosstab(complete['Occupation'], complete['Country']).count, method='cramer')
+        self.assertAlmostEqual(result['Occupation']['Country'], expected, places=3)
+        self.assertEqual(result['Occupation']['Occupation'], 1.0)
+        # Association is undefined against a constant column
+        self.assertEqual(result['Occupation']['Constant'], "NaN")
+
+    '''
+    Tests the correlation ratio in both directions between a categorical and a numeric column
+    '''
+    def test_correlation_ratio(self):
+        result = compute_assoc(['Occupation', 'Income'], self.data)
+        groups = self.data.groupby('Occupation')['Income']
+        income = self.data['Income']
+        expected = np.sqrt(((groups.mean() - income.mean()) ** 2 * groups.count()).sum() / ((income - income.mean()) ** 2).sum())
+        self.assertAlmostEqual(result['Occupation']['Income'], expected, places=3)
+        self.assertEqual(result['Income']['Occupation'], result['Occupation']['Income'])
+        self.assertLess(result['Income']['Noise'], 0.1)
+
+    '''
+    Tests the results in the case of invalid inputs
+    '''
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError, msg="Sensitive Variables needed for Categorical Association"):
+            compute_assoc(None, self.data)
+        with self.assertRaises(ValueError, msg="Data needed for Categorical Association"):
+            compute_assoc(['Occupation'], None)
+        with self.assertRaises(ValueError):
+            compute_assoc(['non_existent_column'], self.data)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+'''
+corr_stream_test.py
+Unit tests for the out-of-core Pearson correlation in corr_stream.py.
+
+Key Features:
+    - Checks that chunked correlations match compute_corr, including data with missing values.
+    - Checks that accumulators filled separately can be merged.
+    - Ensures that appropriate exceptions are raised for erroneous inputs.
+'''
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+import unittest
+import numpy as np
+import pandas as pd
+from algorithms.corr import corr_block
+from algorithms.corr_stream import compute_corr_chunked, PearsonAccumulator
+
+'''
+This class contains unit tests for the PearsonAccumulator class and the compute_corr_chunked function.
+'''
+class TestCorrStream(unittest.TestCase):
+
+    '''
+    Set up for tests. Defines the test data before running the test cases.
+    '''
+    def setUp(self):
+        file_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'docs', 'test_data.csv'))
+        self.data = pd.read_csv(file_path)
+
+        # Data with missing values and a large offset, to exercise pairwise masks and the shifted sums
+        rng = np.random.default_rng(0)
+        values = rng.normal(size=(500, 5)) + 1e6
+        values[rng.random(values.shape) < 0.15] = np.nan
+        self.missing_data = pd.DataFrame(values, columns=['A', 'B', 'C', 'D', 'E'])
+
+    '''
+    Tests that reading the data in chunks gives the same results as compute_corr
+    '''
+    def test_chunked_matches_compute_corr(self):
+        chunks = [self.data.iloc[start:start + 5] for start in range(0, len(self.data), 5)]
+        result = compute_corr_chunked(['Salary', 'Graduated'], chunks)
+        self.assertEqual(result['pearson']['Salary']['IQ'], 0.711)
+        self.assertEqual(result['pearson']['Graduated']['Speed'], 0.462)
+        self.assertEqual(result['pearson']['Salary']['Salary'], 1.0)
+
+    '''
+    Tests the accumulated statistics on data with missing values
+    '''
+    def test_missing_values(self):
+        accumulator = PearsonAccumulator(self.missing_data.columns, ['B', 'D'])
+        for start in range(0, len(self.missing_data), 64):
+            accumulator.update(self.missing_data.iloc[start:start + 64])
+        expected, expected_counts = corr_block(self.missing_data, ['B', 'D'], 'pearson')
+        actual, counts = accumulator.correlation()
+        np.testing.assert_allclose(actual, expected, atol=1e-9)
+        np.testing.assert_array_equal(counts, expected_counts)
+
+    '''
+    Tests merging accumulators filled separately, and querying a subset of the statistics
+    '''
+    def test_merge(self):
+        first = PearsonAccumulator(self.missing_data.columns).update(self.missing_data.iloc[:100])
+        second = PearsonAccumulator(self.missing_data.columns).update(self.missing_data.iloc[100:])
+        merged = PearsonAccumulator(self.missing_data.columns).merge(first).merge(second)
+
+        expected = self.missing_data.corr().loc[['C', 'A'], ['E', 'B']].to_numpy()
+        actual, _ = merged.correlation(['C', 'A'], ['E', 'B'])
+        np.testing.assert_allclose(actual, expected, atol=1e-9)
+
+        with self.assertRaises(ValueError):
+            merged.merge(PearsonAccumulator(['A', 'B']))
+
+    '''
+    Tests the results in the case of invalid inputs
+    '''
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError, msg="Sensitive Variables needed for Correlation Analysis"):
+            compute_corr_chunked(None, [self.data])
+        with self.assertRaises(ValueError, msg="Data needed for Correlation Analysis"):
+            compute_corr_chunked(['Salary'], [])
+        with self.assertRaises(ValueError):
+            compute_corr_chunked(['non_existent_column'], [self.data])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,14 +7,23 @@ Key Features:
     - Tests three correlation methods: Pearson, Spearman, and Kendall.
     - Validates the function’s ability to handle missing, non-numeric, and invalid sensitive variables.
     - Ensures that the correlation results are accurate and raises appropriate exceptions for erroneous inputs.
+    - Checks that the sensitive-only correlation block matches DataFrame.corr on data with missing values and ties.
+    - Checks that the tiled process-parallel engine matches the serial engine, and that only an unavailable process
+      pool or shared memory falls back to the serial engine.
 '''
 
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
 import unittest
+from unittest.mock import patch
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
 import pandas as pd
-from algorithms.corr import compute_corr
+from scipy.stats import kendalltau, pearsonr, spearmanr
+import algorithms.corr as corr
+from algorithms.corr import compute_corr, compute_corr_approx, corr_block, corr_blocks_tiled, benjamini_hochberg, CORR_TOLERANCE
+from algorithms.corr_stream import PearsonAccumulator
 
 '''
 This class contains unit tests for the compute_corr function which calculates 
@@ -281,5 +290,142 @@ class TestComputeCorr(unittest.TestCase):
         with self.assertRaises(ValueError, msg="Sensitive variable(s) ['non_existent_column'] not found in the data columns for Correlation Analysis"):
             compute_corr(invalid_sensitive_var, self.data)
 
+    '''
+    Tests that the sensitive-only correlation block matches DataFrame.corr when there are missing values and ties
+    '''
+    def test_block_matches_dataframe_corr(self):
+        rng = np.random.default_rng(0)
+        values = rng.integers(0, 5, size=(120, 6)).astype(float)
+        values[:, 1] = rng.normal(size=120)
+        values[rng.random(values.shape) < 0.1] = np.nan
+        df = pd.DataFrame(values, columns=['A', 'B', 'C', 'D', 'E', 'F'])
+        sensitive_variables = ['B', 'E']
+
+        for method in ['pearson', 'spearman', 'kendall']:
+            expected = df.corr(method=method)[sensitive_variables].T.to_numpy()
+            actual, counts = corr_block(df, sensitive_variables, method)
+            self.assertEqual(actual.shape, (2, 6))
+            np.testing.assert_allclose(actual, expected, rtol=0, atol=CORR_TOLERANCE,
+                err_msg=f"{method} block does not match DataFrame.corr")
+            # Pairwise-complete observation counts
+            self.assertEqual(counts[0, 1], df['B'].notna().sum())
+            self.assertEqual(counts[0, 4], (df['B'].notna() & df['E'].notna()).sum())
+
+    '''
+    Tests the merge sort Kendall tau-b against scipy on data with many ties
+    '''
+    def test_kendall_with_ties(self):
+        rng = np.random.default_rng(1)
+        df = pd.DataFrame({
+            'A': rng.integers(0, 3, size=2000),
+            'B': rng.integers(0, 10, size=2000),
+            'C': rng.normal(size=2000),
+            'D': np.ones(2000)
+        })
+        actual, _ = corr_block(df, ['A'], 'kendall')
+        self.assertEqual(actual[0, 0], 1.0)
+        for position, column in enumerate(['B', 'C']):
+            self.assertAlmostEqual(actual[0, position + 1], kendalltau(df['A'], df[column])[0], delta=CORR_TOLERANCE)
+        # Kendall is undefined against a constant column
+        self.assertTrue(np.isnan(actual[0, 3]))
+
+    '''
+    Tests restricting the analysis to a subset of columns, with Pearson read from cached statistics
+    '''
+    def test_column_subset_with_statistics(self):
+        statistics = PearsonAccumulator(self.data.columns).update(self.data)
+        result = compute_corr(['Salary'], self.data, columns=['IQ', 'Gender'], statistics=statistics)
+        self.assertEqual(result['pearson'], {'Salary': {'IQ': 0.711, 'Gender': 0.265, 'Salary': 1.0}})
+        self.assertEqual(result['spearman'], {'Salary': {'IQ': 0.93, 'Gender': 0.167, 'Salary': 1.0}})
+        with self.assertRaises(ValueError):
+            compute_corr(['Salary'], self.data, columns=['non_existent_column'])
+
+    '''
+    Tests approximate correlations, which grow the sample until the confidence intervals are narrow enough
+    '''
+    def test_approximate_correlation(self):
+        rng = np.random.default_rng(2)
+        x = rng.normal(size=20000)
+        df = pd.DataFrame({'X': x, 'Y': 0.5 * x + rng.normal(size=20000), 'Z': rng.normal(size=20000)})
+        exact = compute_corr(['X'], df)
+
+        results, sample_size = compute_corr_approx(['X'], df, epsilon=0.05, seed=0)
+        self.assertLess(sample_size, len(df))
+        for method in ['pearson', 'spearman', 'kendall']:
+            for col in ['Y', 'Z']:
+                interval = results[method]['X'][col]
+                self.assertLessEqual(interval['upper'] - interval['lower'], 0.05 + 1e-3)
+                self.assertLessEqual(interval['lower'], interval['estimate'])
+                self.assertLessEqual(interval['estimate'], interval['upper'])
+                self.assertLess(abs(interval['estimate'] - exact[method]['X'][col]), 0.05)
+
+        # A tiny epsilon falls back to every row, giving the exact values
+        results, sample_size = compute_corr_approx(['X'], df.iloc[:1500], epsilon=1e-6, seed=0)
+        self.assertEqual(sample_size, 1500)
+        self.assertEqual(results['pearson']['X']['Y']['estimate'], compute_corr(['X'], df.iloc[:1500])['pearson']['X']['Y'])
+
+        with self.assertRaises(ValueError):
+            compute_corr_approx(['X'], df, epsilon=0)
+
+    '''
+    Tests the p-values and Benjamini-Hochberg adjusted p-values computed with the coefficients
+    '''
+    def test_significance(self):
+        result = compute_corr(['Salary'], self.data, significance=True)
+        p_values = result['p_values']
+        self.assertAlmostEqual(p_values['pearson']['Salary']['IQ'], pearsonr(self.data['Salary'], self.data['IQ'])[1], places=10)
+        self.assertAlmostEqual(p_values['spearman']['Salary']['Age'], spearmanr(self.data['Salary'], self.data['Age'])[1], places=10)
+        self.assertAlmostEqual(p_values['kendall']['Salary']['Gender'],
+                               kendalltau(self.data['Salary'], self.data['Gender'], method='asymptotic')[1], places=10)
+        # A variable is not tested against itself
+        self.assertEqual(p_values['pearson']['Salary']['Salary'], "NaN")
+        # Adjusted p-values are never smaller than the raw ones
+        for col, adjusted in result['p_adjusted']['spearman']['Salary'].items():
+            if adjusted != "NaN":
+                self.assertGreaterEqual(adjusted, p_values['spearman']['Salary'][col])
+        # The coefficients are unchanged
+        self.assertEqual(result['pearson'], compute_corr(['Salary'], self.data)['pearson'])
+
+        np.testing.assert_allclose(benjamini_hochberg(np.array([0.01, 0.04, 0.03, 0.005, np.nan])), [0.02, 0.04, 0.04, 0.02, np.nan])
+
+
+    '''
+    Tests that the tiled process-parallel engine assembles the same blocks as the serial engine
+    '''
+    def test_tiled_matches_serial(self):
+        rng = np.random.default_rng(2)
+        values = rng.integers(0, 4, size=(150, 23)).astype(float)
+        values[:, ::3] = rng.normal(size=(150, 8))
+        values[rng.random(values.shape) < 0.05] = np.nan
+        df = pd.DataFrame(values, columns=[f"C{j}" for j in range(23)])
+        sensitive_variables = ['C4', 'C0', 'C17']
+
+        # Tiles that do not divide the columns evenly, computed by two workers that are not forked from this process
+        with patch.object(corr, 'ProcessPoolExecutor', wraps=corr.ProcessPoolExecutor) as pool:
+            tiled = corr_blocks_tiled(df, sensitive_variables, workers=2, tile_columns=5)
+        self.assertNotEqual(pool.call_args.kwargs['mp_context'].get_start_method(), 'fork')
+        for method in ['pearson', 'spearman', 'kendall']:
+            expected, expected_counts = corr_block(df, sensitive_variables, method)
+            actual, counts = tiled[method]
+            np.testing.assert_allclose(actual, expected, rtol=0, atol=CORR_TOLERANCE,
+                err_msg=f"tiled {method} block does not match the serial block")
+            np.testing.assert_array_equal(counts, expected_counts)
+
+    '''
+    Tests that the serial engine takes over when the tiled engine cannot start, and that other failures are raised
+    '''
+    def test_tiled_fallback(self):
+        df = self.data.drop(columns=['id'])
+        expected = compute_corr(['Age'], df)
+        with patch.object(corr, 'PARALLEL_MIN_COLUMNS', 2):
+            for error in [OSError("No shared memory"), BrokenProcessPool("Worker died")]:
+                with patch.object(corr, 'corr_blocks_tiled', side_effect=error):
+                    with self.assertLogs(corr.logger, level='WARNING'):
+                        self.assertEqual(compute_corr(['Age'], df), expected)
+            with patch.object(corr, 'corr_blocks_tiled', side_effect=IndexError("Bad tile")):
+                with self.assertRaises(IndexError):
+                    compute_corr(['Age'], df)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,58 @@
+'''
+facet_cost_test.py
+Unit tests for the FACET cost model in facet_cost.py.
+
+Key Features:
+    - Checks that the work of both FACET phases grows with the rows, candidates and fits, and that successive halving
+      counts less work than the exhaustive search.
+    - Checks that the predictions start from the default coefficients and are rescaled by the observed runs.
+'''
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+import unittest
+from algorithms.facet_cost import CostModel, selection_fits, selection_work, inspector_work, peak_memory
+
+'''
+This class contains unit tests for the work counts and the CostModel class.
+'''
+
+class TestFacetCost(unittest.TestCase):
+
+    '''
+    Tests that the work grows with the size of the run
+    '''
+    def test_work(self):
+        work = selection_work(1000, 10, 9, 15, 50, 8)
+        self.assertEqual(selection_work(2000, 10, 9, 15, 50, 8), 2 * work)
+        self.assertGreater(work, selection_work(1000, 10, 4, 15, 50, 8))
+        self.assertGreater(work, selection_work(1000, 10, 9, 3, 50, 8))
+        self.assertLess(selection_work(1000, 10, 9, 15, 50, 8, halving_factor=3), work)
+        self.assertEqual(selection_fits(9, 15), 136)
+        self.assertEqual(selection_fits(9, 15, halving_factor=3), 9 * 15 + 3 * 15 + 1)
+        self.assertEqual(inspector_work(100, 10, 50, 32, 5), 10 * inspector_work(100, 10, 50, 32, 5, interactions=False))
+        self.assertGreater(peak_memory(1000, 10, 1000), peak_memory(1000, 10, 100))
+        self.assertGreater(peak_memory(1000, 10, 1000), peak_memory(1000, 10, 1000, interactions=False))
+
+    '''
+    Tests that the predictions are the defaults until runs are observed, and then scaled by the median ratio
+    '''
+    def test_calibration(self):
+        model = CostModel(coefficients={('selection', 'random_forest'): (1, 0.01, 1e-6), ('inspector', 'random_forest'): (0, 0, 1e-6)}, history=3)
+        self.assertAlmostEqual(model.seconds('selection', 'random_forest', 100, 1e6), 3)
+        for seconds in [6, 9, 12, 300]:
+            model.observe('selection', 'random_forest', 100, 1e6, seconds)
+        # Only the last three runs are kept
+        self.assertAlmostEqual(model.scale('selection', 'random_forest'), 4)
+        self.assertAlmostEqual(model.seconds('selection', 'random_forest', 100, 1e6), 12)
+        self.assertAlmostEqual(model.default_seconds('selection', 'random_forest', 100, 1e6), 3)
+        self.assertEqual(model.scale('inspector', 'random_forest'), 1)
+        self.assertEqual(model.observations(), {'selection/random_forest': 3})
+
+        # Runs without a measured time tell nothing about the scale
+        model.observe('inspector', 'random_forest', 1, 1e6, 0)
+        self.assertEqual(model.observations(), {'selection/random_forest': 3})
+
+if __name__ == '__main__':
+    unittest.main()
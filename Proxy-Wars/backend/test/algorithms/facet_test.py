@@ -6,14 +6,40 @@ Key functionalities:
 - Defines test cases to validate the expected output for valid inputs.
 - Ensures that appropriate errors are raised for missing or invalid data.
 - Tests edge cases such as empty datasets, non-numeric data, and missing sensitive/target variables.
+- Tests the successive halving hyperparameter search.
+- Tests that fitted models are reused when only the sensitive variables change, and are not mixed up between
+  dataframes analyzed concurrently.
+- Tests the Extra Trees and gradient boosting surrogate learners.
+- Tests explaining a stratified subsample of the rows and its bootstrap error estimates.
+- Tests that the redundancy of the sensitive pairs only matches the full redundancy matrix.
+- Tests the approximate redundancy from plain SHAP vectors.
+- Tests that the synergy and association matrices reuse the redundancy fit, in both pairs modes.
+- Tests the leave-one-column-out redundancy sweep.
+- Tests the batch of several target variables, in one and in several worker processes.
+- Tests the runtime estimates and the plans that shrink a run to a latency budget.
+- Tests that the features shared with the joblib workers as memory maps give the same redundancy.
+- Tests that the memoized hyperparameters of a dataset skip or narrow the search on its samples.
 '''
 
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
 import unittest
+from collections import OrderedDict
+from unittest.mock import patch, MagicMock
+import numpy as np
 import pandas as pd
-from algorithms.facet_alg import compute_facet
+import algorithms.facet_alg as facet_alg
+from algorithms.facet_alg import compute_facet, compute_facet_batch, compute_facet_error, compute_facet_selection, compute_facet_sweep, estimate_facet, plan_facet, fit_facet, stratified_order, HALVING_MIN_ROWS, LEARNERS
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV
+
+# The Titanic training data most tests run on
+TITANIC_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'docs', 'titanic_train.csv'))
+# Number of fitted models kept while the tests run, so that tests analyzing the same rows share their fits
+TEST_MODEL_CACHE_ENTRIES = 32
+# Fit options of the tests that check how the results are computed from a fit rather than the search: a single
+# candidate and round of folds
+QUICK_FIT = {'repeats': 1, 'candidates': 1}
 
 '''
 This class contains unit tests for the compute_corr function which calculates 
@@ -21,6 +47,18 @@ redundancy values between sensitive variables and all other variables in a datas
 '''
 class TestComputeFacet(unittest.TestCase):
 
+    '''
+    Set up for all tests. Reads the Titanic data once, which the tests share and must not modify, and keeps enough
+    fitted models for the tests to reuse each other's fits. Tests that count fits use a cache of their own.
+    '''
+    @classmethod
+    def setUpClass(cls):
+        cls.titanic = pd.read_csv(TITANIC_PATH)
+        cache_entries = patch.object(facet_alg, 'FACET_MODEL_CACHE_ENTRIES', TEST_MODEL_CACHE_ENTRIES)
+        cache_entries.start()
+        cls.addClassCleanup(cache_entries.stop)
+        cls.addClassCleanup(facet_alg.fitted_models.clear)
+
     '''
     Set up for tests. Defines the test data and variable names before running the test cases.
     '''
@@ -96,5 +134,293 @@ class TestComputeFacet(unittest.TestCase):
         with self.assertRaises(ValueError, msg="Target variable(s) non_existent_column not found in the data columns for FACET"):
             compute_facet(sensitive_variables, self.data, invalid_target_var)
 
+    '''
+    Tests the successive halving search, which falls back to the grid search on small datasets
+    '''
+    def test_halving_search(self):
+        titanic = self.titanic.head(2 * HALVING_MIN_ROWS)
+        selector = facet_alg.facet_model(['Age'], titanic, 'Pclass', search='halving')['selector']
+        self.assertIsInstance(selector.searcher_, HalvingGridSearchCV)
+        # Every candidate is scored in the first round, only the best third in the next one
+        self.assertEqual(list(selector.searcher_.n_candidates_), [9, 3])
+        self.assertIn(selector.searcher_.best_params_['regressor__min_samples_leaf'], [.05, .06, .07])
+
+        result = compute_facet(['Age'], titanic, 'Pclass', search='halving')
+        self.assertEqual(set(result['Age']), set(titanic.columns) - {'Pclass'})
+
+        selector, _ = fit_facet(self.data, 'Salary', search='halving')
+        self.assertIsInstance(selector.searcher_, GridSearchCV)
+        with self.assertRaises(ValueError):
+            compute_facet(['Graduated'], self.data, 'Salary', search='random')
+
+    '''
+    Tests that the full redundancy matrix is reused when only the sensitive variables change
+    '''
+    def test_reuse_fitted_model(self):
+        with patch.object(facet_alg, 'fitted_models', OrderedDict()), patch.object(facet_alg, 'fit_facet', wraps=facet_alg.fit_facet) as fit:
+            graduated = compute_facet(['Graduated'], self.data, 'Salary', **QUICK_FIT)
+            both = compute_facet(['Age', 'Graduated'], self.data, 'Salary', **QUICK_FIT)
+            self.assertEqual(fit.call_count, 1)
+            self.assertEqual(both['Graduated'], graduated['Graduated'])
+
+            # Other rows, targets or seeds are fitted again
+            compute_facet(['Graduated'], self.data.iloc[::-1], 'Salary', **QUICK_FIT)
+            compute_facet(['Graduated'], self.data, 'Age', **QUICK_FIT)
+            compute_facet(['Graduated'], self.data, 'Salary', random_seed=1, **QUICK_FIT)
+            self.assertEqual(fit.call_count, 4)
+
+    '''
+    Tests that a job on another dataframe starting between the check of the fingerprint and the lookup of the model
+    does not hand its model to the first job
+    '''
+    def test_interleaved_fitted_models(self):
+        first, other = self.data, self.data.iloc[::-1]
+        # Reading the dataframe of the kept fingerprint runs a job on the other dataframe, which replaces the fingerprint
+        class Interleaved(tuple):
+            interleaved = False
+            def __getitem__(self, position):
+                if position == 0 and not self.interleaved:
+                    self.interleaved = True
+                    facet_alg.fitted_facet(other, other, 'Salary')
+                return tuple.__getitem__(self, position)
+
+        # The fit is replaced by one that remembers its rows
+        with patch.object(facet_alg, 'fitted_models', OrderedDict()), patch.object(facet_alg, 'fit_facet', side_effect=lambda df, *args: (df, MagicMock())):
+            try:
+                self.assertIs(facet_alg.fitted_facet(first, first, 'Salary')['selector'], first)
+                self.assertIs(facet_alg.fitted_facet(other, other, 'Salary')['selector'], other)
+                facet_alg.fingerprinted = Interleaved((first, facet_alg.fingerprint_dataframe(first)))
+                self.assertIs(facet_alg.fitted_facet(first, first, 'Salary')['selector'], first)
+                self.assertIs(facet_alg.fingerprinted[0], other)
+            finally:
+                facet_alg.fingerprinted = (None, None)
+
+    '''
+    Tests that every surrogate learner is selected and explained
+    '''
+    def test_learners(self):
+        titanic = self.titanic.head(150)
+        for learner in LEARNERS:
+            selector = facet_alg.facet_model(['Age'], titanic, 'Pclass', learner=learner, repeats=1)['selector']
+            self.assertEqual(len(selector.searcher_.cv_results_['params']), 9)
+            result = compute_facet(['Age'], titanic, 'Pclass', learner=learner, repeats=1)
+            self.assertEqual(result['Age']['Age'], "NaN")
+            self.assertTrue(all(val == "NaN" or 0 <= val <= 100 for col, val in result["Age"].items()))
+        with self.assertRaises(ValueError):
+            compute_facet(['Age'], titanic, 'Pclass', learner='linear')
+
+    '''
+    Test that a stratified subsample of the rows is explained, and that the error of its redundancy values is reported.
+    '''
+    def test_explain_rows(self):
+        titanic = self.titanic
+
+        # Every prefix of the order holds the classes in about the same proportions as the dataset
+        order = stratified_order(titanic['Pclass'])
+        self.assertEqual(sorted(order), list(range(len(titanic))))
+        proportions = titanic['Pclass'].value_counts(normalize=True)
+        subsample = titanic['Pclass'].iloc[order[:100]].value_counts(normalize=True)
+        self.assertTrue(((subsample - proportions).abs() < .05).all())
+
+        result = compute_facet(['Age'], titanic, 'Pclass', explain_rows=200, **QUICK_FIT)
+        self.assertEqual(result['Age']['Age'], "NaN")
+        self.assertTrue(all(val == "NaN" or 0 <= val <= 100 for col, val in result["Age"].items()))
+        error = compute_facet_error(['Age'], titanic, 'Pclass', explain_rows=200, **QUICK_FIT)
+        self.assertEqual(error['explained_rows'], 200)
+        self.assertEqual(set(error['redundancy_error']['Age']), set(result['Age']))
+        self.assertTrue(all(val == "NaN" or val >= 0 for col, val in error['redundancy_error']["Age"].items()))
+
+        # Explaining every row reports no error
+        self.assertIsNone(compute_facet_error(['Age'], titanic.head(150), 'Pclass', **QUICK_FIT)['redundancy_error'])
+        with self.assertRaises(ValueError):
+            compute_facet(['Age'], titanic, 'Pclass', explain_rows=1, **QUICK_FIT)
+
+    '''
+    Test that computing the redundancy of the sensitive pairs only gives the values of the full redundancy matrix.
+    '''
+    def test_sensitive_pairs(self):
+        titanic = self.titanic
+        full = compute_facet(['Age', 'Fare'], titanic, 'Pclass', **QUICK_FIT)
+        sensitive = compute_facet(['Age', 'Fare'], titanic, 'Pclass', pairs='sensitive', **QUICK_FIT)
+        for sens in ['Age', 'Fare']:
+            self.assertEqual(set(sensitive[sens]), set(full[sens]))
+            for col, val in full[sens].items():
+                if val == "NaN":
+                    self.assertEqual(sensitive[sens][col], "NaN")
+                else:
+                    self.assertAlmostEqual(sensitive[sens][col], val, places=4)
+
+        # The bootstrap errors match too
+        full = compute_facet_error(['Age'], titanic, 'Pclass', explain_rows=200, **QUICK_FIT)
+        sensitive = compute_facet_error(['Age'], titanic, 'Pclass', explain_rows=200, pairs='sensitive', **QUICK_FIT)
+        self.assertEqual(sensitive['explained_rows'], 200)
+        for col, val in full['redundancy_error']['Age'].items():
+            if val != "NaN":
+                self.assertAlmostEqual(sensitive['redundancy_error']['Age'][col], val, places=4)
+        with self.assertRaises(ValueError):
+            compute_facet(['Age'], titanic, 'Pclass', pairs='some', **QUICK_FIT)
+
+    '''
+    Test that the approximate redundancy covers the same variables as the exact one, in both pairs modes.
+    '''
+    def test_approximate_mode(self):
+        titanic = self.titanic
+        exact = compute_facet(['Age'], titanic, 'Pclass', **QUICK_FIT)
+        approximate = compute_facet(['Age'], titanic, 'Pclass', mode='approximate', **QUICK_FIT)
+        sensitive = compute_facet(['Age'], titanic, 'Pclass', mode='approximate', pairs='sensitive', **QUICK_FIT)
+        self.assertEqual(set(approximate['Age']), set(exact['Age']))
+        self.assertEqual(approximate['Age']['Age'], "NaN")
+        for col, val in approximate['Age'].items():
+            if val != "NaN":
+                self.assertTrue(0 <= val <= 100)
+                self.assertAlmostEqual(sensitive['Age'][col], val, places=4)
+        with self.assertRaises(ValueError):
+            compute_facet(['Age'], titanic, 'Pclass', mode='rough', **QUICK_FIT)
+
+    '''
+    Test that the synergy and association matrices are computed from the same fit as the redundancy matrix, and match
+    their values for the sensitive pairs only.
+    '''
+    def test_matrices(self):
+        titanic = self.titanic
+        redundancy = compute_facet(['Age'], titanic, 'Pclass', **QUICK_FIT)
+        for metric in ['synergy', 'association']:
+            with patch.object(facet_alg, 'fit_facet', wraps=facet_alg.fit_facet) as fit:
+                full = compute_facet(['Age'], titanic, 'Pclass', metric=metric, **QUICK_FIT)
+            self.assertEqual(fit.call_count, 0)
+            sensitive = compute_facet(['Age'], titanic, 'Pclass', metric=metric, pairs='sensitive', **QUICK_FIT)
+            self.assertEqual(set(full['Age']), set(redundancy['Age']))
+            self.assertEqual(full['Age']['Age'], "NaN")
+            for col, val in full['Age'].items():
+                if val != "NaN":
+                    self.assertTrue(0 <= val <= 100)
+                    self.assertAlmostEqual(sensitive['Age'][col], val, places=4)
+        with self.assertRaises(ValueError):
+            compute_facet(['Age'], titanic, 'Pclass', metric='importance', **QUICK_FIT)
+        with self.assertRaises(ValueError):
+            compute_facet(['Age'], titanic, 'Pclass', metric='synergy', mode='approximate', **QUICK_FIT)
+
+    '''
+    Test that the sweep reports the redundancy of the whole dataset and of every copy with a column left out
+    '''
+    def test_sweep(self):
+        titanic = self.titanic
+        sweep = compute_facet_sweep(['Age'], titanic, 'Pclass', ['Fare', 'SibSp'], **QUICK_FIT)
+        whole = compute_facet(['Age'], titanic, 'Pclass', **QUICK_FIT)
+        without_fare = compute_facet(['Age'], titanic.drop(columns=['Fare']), 'Pclass', **QUICK_FIT)
+        redundancy, change = sweep['Age']['redundancy'], sweep['Age']['change']
+        self.assertEqual(list(redundancy), ['none', 'Fare', 'SibSp'])
+        self.assertEqual(redundancy['none'], {col: whole['Age'][col] for col in redundancy['none']})
+        self.assertEqual(redundancy['Fare']['Fare'], "NaN")
+        for col, val in without_fare['Age'].items():
+            self.assertEqual(redundancy['Fare'][col], val)
+            if val != "NaN":
+                self.assertAlmostEqual(change['Fare'][col], val - whole['Age'][col], places=4)
+                self.assertEqual(change['none'][col], 0)
+        for drop in [['Age'], ['Pclass'], ['Unknown'], []]:
+            with self.assertRaises(ValueError):
+                compute_facet_sweep(['Age'], titanic, 'Pclass', drop)
+
+    '''
+    Test that a batch of targets gives the redundancy of every target, in the order of the batch, and rejects
+    targets that are missing or sensitive variables
+    '''
+    def test_batch(self):
+        titanic = self.titanic.head(150)
+        batch = compute_facet_batch(['Age'], titanic, ['Survived', 'Pclass', 'Survived'], **QUICK_FIT)
+        self.assertEqual(list(batch), ['Survived', 'Pclass'])
+        for target in batch:
+            self.assertEqual(batch[target], compute_facet(['Age'], titanic, target, **QUICK_FIT))
+        # Worker processes that are not forked from this process give the same batch
+        with patch.object(facet_alg, 'ProcessPoolExecutor', wraps=facet_alg.ProcessPoolExecutor) as pool:
+            self.assertEqual(compute_facet_batch(['Age'], titanic, ['Survived', 'Pclass'], workers=2, **QUICK_FIT), batch)
+        self.assertNotEqual(pool.call_args.kwargs['mp_context'].get_start_method(), 'fork')
+        self.assertEqual(set(compute_facet_batch(['Age'], titanic, ['Pclass'], layout='columnar', **QUICK_FIT)['Pclass']), {'rows', 'columns', 'values'})
+        for targets in [['Age'], ['Unknown'], []]:
+            with self.assertRaises(ValueError):
+                compute_facet_batch(['Age'], titanic, targets)
+
+    '''
+    Test that estimates grow with the run, and that plans shrink the run until it meets the budget
+    '''
+    def test_estimate_plan(self):
+        estimate = estimate_facet(10000, 10)
+        self.assertGreater(estimate_facet(20000, 10)['seconds'], estimate['seconds'])
+        self.assertGreater(estimate['seconds'], estimate_facet(10000, 10, explain_rows=1000)['seconds'])
+        self.assertAlmostEqual(estimate['seconds'], estimate['selection_seconds'] + estimate['inspector_seconds'])
+        self.assertGreater(estimate['memory_bytes'], estimate_facet(10000, 10, mode='approximate')['memory_bytes'])
+
+        # A generous budget keeps the run, a tight one shrinks it step by step
+        plan = plan_facet(10000, 10, estimate['seconds'] + 1)
+        self.assertEqual((plan['rows'], plan['explain_rows'], plan['repeats'], plan['candidates']), (10000, None, 5, None))
+        self.assertTrue(plan['within_budget'])
+        plan = plan_facet(10000, 10, estimate['seconds'] / 4)
+        self.assertLess(plan['estimate']['seconds'], estimate['seconds'])
+        self.assertLess(plan['repeats'], 5)
+        plan = plan_facet(10000, 10, 0.01)
+        self.assertFalse(plan['within_budget'])
+        self.assertEqual((plan['repeats'], plan['candidates']), (1, 1))
+        self.assertTrue(500 <= plan['explain_rows'] <= plan['rows'] < 1000)
+
+        # The planned options search a single candidate with fewer cross-validation fits
+        selector = facet_alg.facet_model(['Graduated'], self.data, 'Salary', repeats=1, candidates=1)['selector']
+        self.assertEqual(len(selector.searcher_.cv_results_['params']), 1)
+        self.assertEqual(selector.searcher_.n_splits_, 3)
+        result = compute_facet(['Graduated'], self.data, 'Salary', repeats=1, candidates=1)
+        self.assertEqual(set(result['Graduated']), set(self.data.columns) - {'Salary'})
+
+    '''
+    Test that the features are converted once to a contiguous array, and that workers memory mapping it compute the
+    same redundancy as a single process
+    '''
+    def test_shared_features(self):
+        shared = facet_alg.shared_features(self.data, 'Salary', 'random_forest')
+        self.assertEqual(list(shared.columns), [col for col in self.data.columns if col != 'Salary'] + ['Salary'])
+        self.assertTrue((shared.drop(columns='Salary').dtypes == np.float32).all())
+        self.assertTrue(shared['Salary'].equals(self.data['Salary']))
+        shared = facet_alg.shared_features(self.data, 'Salary', 'hist_gradient_boosting')
+        self.assertTrue((shared.drop(columns='Salary').dtypes == np.float64).all())
+
+        expected = compute_facet(['Graduated', 'Gender'], self.data, 'Salary', **QUICK_FIT)
+        with patch.object(facet_alg, 'fitted_models', OrderedDict()), patch.object(facet_alg, 'LEARNER_SELECTOR_JOBS', 2), patch.object(facet_alg, 'INSPECTOR_JOBS', 2), patch.object(facet_alg, 'SHARED_MEMORY_MIN_BYTES', 0):
+            self.assertEqual(compute_facet(['Graduated', 'Gender'], self.data, 'Salary', **QUICK_FIT), expected)
+
+    '''
+    Test that a memoized dataset fits only its best candidate on a sample, or searches around it, and that samples of
+    other datasets or targets search the whole grid
+    '''
+    def test_memo(self):
+        titanic = self.titanic.head(150)
+        sample = titanic.sample(frac=.8, random_state=1)
+        facet_alg.hyperparameter_memo.clear()
+
+        # The first run searches the whole grid and memoizes its best hyperparameters
+        compute_facet(['Age'], titanic, 'Pclass', memo='titanic', repeats=1)
+        first = compute_facet_selection(['Age'], titanic, 'Pclass', memo='titanic', repeats=1)
+        self.assertFalse(first['memoized'])
+        self.assertEqual(len(facet_alg.facet_model(['Age'], titanic, 'Pclass', memo='titanic', repeats=1)['selector'].searcher_.cv_results_['params']), 9)
+
+        # A sample fits the best candidate only, with a single round of folds
+        result = compute_facet(['Age'], sample, 'Pclass', memo='titanic', repeats=1)
+        self.assertTrue(all(val == "NaN" or 0 <= val <= 100 for val in result['Age'].values()))
+        selection = compute_facet_selection(['Age'], sample, 'Pclass', memo='titanic', repeats=1)
+        self.assertTrue(selection['memoized'])
+        searcher = facet_alg.facet_model(['Age'], sample, 'Pclass', memo='titanic', repeats=1)['selector'].searcher_
+        self.assertEqual(len(searcher.cv_results_['params']), 1)
+        self.assertEqual(searcher.n_splits_, 3)
+        self.assertEqual(selection['hyperparameters']['max_depth'], first['hyperparameters']['max_depth'])
+
+        # The neighbours of the best values are searched again
+        model = facet_alg.facet_model(['Age'], sample, 'Pclass', memo='titanic', memo_mode='neighbours', repeats=1)
+        self.assertTrue(model['memoized'])
+        self.assertLessEqual(len(model['selector'].searcher_.cv_results_['params']), 9)
+        self.assertGreater(len(model['selector'].searcher_.cv_results_['params']), 1)
+
+        # Other targets and runs without a memo search the whole grid
+        self.assertFalse(compute_facet_selection(['Age'], sample, 'Survived', memo='titanic', repeats=1)['memoized'])
+        self.assertFalse(compute_facet_selection(['Age'], sample, 'Pclass', repeats=1)['memoized'])
+        with self.assertRaises(ValueError):
+            compute_facet(['Age'], sample, 'Pclass', memo='titanic', memo_mode='nearest', repeats=1)
+
 if __name__ == '__main__':
     unittest.main()
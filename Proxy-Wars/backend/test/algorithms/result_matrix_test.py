@@ -0,0 +1,67 @@
+'''
+result_matrix_test.py
+Unit tests for the ResultMatrix result container shared by the algorithms.
+
+Key Features:
+    - Checks that vectorized rounding and NaN handling match the per-cell formatting the algorithms used before.
+    - Checks the nested, columnar and JSON layouts.
+    - Ensures that appropriate exceptions are raised for erroneous inputs.
+'''
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+import json
+import unittest
+import numpy as np
+from algorithms.result_matrix import ResultMatrix, round_values
+
+'''
+This class contains unit tests for the ResultMatrix class.
+'''
+
+class TestResultMatrix(unittest.TestCase):
+
+    '''
+    Set up for tests. Defines a small matrix with a missing value.
+    '''
+    def setUp(self):
+        self.values = np.array([[0.12345, np.nan, -1.0], [0.5, 0.98765, 0.0001]])
+        self.result = ResultMatrix(self.values, ['A', 'B'], ['X', 'Y', 'Z'], decimals=3)
+
+    '''
+    Tests that vectorized rounding matches rounding every cell in Python
+    '''
+    def test_rounding_matches_per_cell(self):
+        values = np.random.default_rng(0).uniform(-1, 1, size=(20, 500))
+        values[values > 0.9] = np.nan
+        rows = [f"r{i}" for i in range(20)]
+        columns = [f"c{j}" for j in range(500)]
+        expected = {row: {col: "NaN" if np.isnan(val) else round(float(val), 3) for col, val in zip(columns, cells)}
+                    for row, cells in zip(rows, values)}
+        self.assertEqual(ResultMatrix(values, rows, columns, 3).to_dict(), expected)
+
+    '''
+    Tests the nested and columnar layouts
+    '''
+    def test_layouts(self):
+        self.assertEqual(self.result.to_dict(), {'A': {'X': 0.123, 'Y': "NaN", 'Z': -1.0}, 'B': {'X': 0.5, 'Y': 0.988, 'Z': 0.0}})
+        self.assertEqual(self.result.to_layout('columnar'), {'rows': ['A', 'B'], 'columns': ['X', 'Y', 'Z'],
+                                                             'values': [[0.123, None, -1.0], [0.5, 0.988, 0.0]]})
+        self.assertEqual(json.loads(self.result.to_json()), self.result.to_columnar())
+        self.assertNotIn(' ', self.result.to_json())
+        # Full precision is kept without decimals
+        self.assertEqual(round_values(self.values[1], None, None), [0.5, 0.98765, 0.0001])
+
+    '''
+    Tests that mismatched labels and unknown layouts raise errors
+    '''
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            ResultMatrix(self.values, ['A'], ['X', 'Y', 'Z'])
+        with self.assertRaises(ValueError):
+            self.result.to_layout('xml')
+
+
+if __name__ == '__main__':
+    unittest.main()
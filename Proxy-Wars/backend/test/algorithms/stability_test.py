@@ -0,0 +1,124 @@
+'''
+stability_test.py
+Unit tests for the bootstrap stability mode in stability.py.
+
+Key Features:
+    - Checks that the samples are the ones /random draws for consecutive seeds.
+    - Checks that the ranks counted from the shared dense ranks match ranking every sample again.
+    - Checks that the correlation summaries match the correlations of every sample, serially and in worker processes.
+    - Checks that FACET and ARM are summarized over the samples, and that invalid requests raise a ValueError.
+'''
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from algorithms.corr import corr_block, rank_columns, dense_rank_columns, to_float_matrix, CORR_METHODS
+import algorithms.stability as stability_module
+from algorithms.facet_alg import facet_matrix
+from algorithms.stability import compute_stability, sample_positions, sample_ranks, STABILITY_QUANTILES
+
+'''
+This class contains unit tests for the compute_stability function and its helpers.
+'''
+
+class TestStability(unittest.TestCase):
+
+    '''
+    Set up for tests. Reads the test data without its id column.
+    '''
+    def setUp(self):
+        file_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'docs', 'test_data.csv'))
+        self.data = pd.read_csv(file_path).drop(columns=['id'])
+
+    '''
+    Tests that the samples are the rows DataFrame.sample draws, as /random does
+    '''
+    def test_sample_positions(self):
+        for seed in range(3):
+            expected = self.data.sample(frac=.4, random_state=seed)
+            self.assertListEqual(list(self.data.iloc[sample_positions(len(self.data), 40, seed)].index), list(expected.index))
+        self.assertListEqual(list(sample_positions(5, 100, 0)), [0, 1, 2, 3, 4])
+
+    '''
+    Tests that the average ranks of a sample come out of the dense ranks of all rows, with ties and missing values
+    '''
+    def test_sample_ranks(self):
+        matrix = np.array([[1, 3], [2, np.nan], [2, 1], [5, 1], [np.nan, 2], [2, 3]], dtype=float)
+        dense = dense_rank_columns(matrix)
+        for rows in [np.arange(6), np.array([5, 0, 2]), np.array([1, 4]), np.array([3, 2, 1])]:
+            np.testing.assert_array_equal(sample_ranks(dense[rows]), rank_columns(matrix[rows]))
+
+    '''
+    Tests that the correlation summaries are the mean, standard deviation and quantiles of the samples' correlations
+    '''
+    def test_correlation(self):
+        stability = compute_stability(['Age', 'Salary'], self.data, 'Correlational Analysis', 4, 60, 1, layout='columnar')
+        self.assertEqual(stability['samples'], 4)
+        self.assertEqual(stability['seeds'], [1, 2, 3, 4])
+        self.assertEqual(stability['rows'], len(self.data.sample(frac=.6, random_state=1)))
+        self.assertSetEqual(set(stability['results']), set(CORR_METHODS))
+
+        for method in CORR_METHODS:
+            blocks = np.array([corr_block(self.data.sample(frac=.6, random_state=seed), ['Age', 'Salary'], method)[0] for seed in stability['seeds']])
+            summary = stability['results'][method]
+            self.assertEqual(summary['mean']['columns'], list(self.data.columns))
+            np.testing.assert_allclose(summary['mean']['values'], np.round(blocks.mean(axis=0), 3))
+            np.testing.assert_allclose(summary['std']['values'], np.round(blocks.std(axis=0, ddof=1), 3))
+            for q in STABILITY_QUANTILES:
+                np.testing.assert_allclose(summary['quantiles'][str(q)]['values'], np.round(np.quantile(blocks, q, axis=0), 3))
+            np.testing.assert_array_equal(summary['frequency']['values'], np.ones(blocks.shape[1:]))
+
+        # The worker processes, which are not forked from this process, read the shared matrix and ranks, and return
+        # the same summaries
+        with patch.object(stability_module, 'ProcessPoolExecutor', wraps=stability_module.ProcessPoolExecutor) as pool:
+            parallel = compute_stability(['Age', 'Salary'], self.data, 'Correlational Analysis', 4, 60, 1, layout='columnar', workers=2)
+        self.assertEqual(parallel, stability)
+        self.assertNotEqual(pool.call_args.kwargs['mp_context'].get_start_method(), 'fork')
+
+    '''
+    Tests that FACET summarizes the redundancy of every sample, fitted with the seed of the sample
+    '''
+    def test_facet(self):
+        options = {'learner': 'extra_trees'}
+        stability = compute_stability(['Age'], self.data, 'FACET', 2, 80, 3, target_var='Graduated', workers=2, quantiles=[.5], **options)
+        redundancy = stability['results']['redundancy']
+        self.assertNotIn('Graduated', redundancy['mean']['Age'])
+        self.assertSetEqual(set(redundancy['quantiles']), {'0.5'})
+
+        matrices = [facet_matrix(['Age'], self.data.sample(frac=.8, random_state=seed), 'Graduated', seed, **options)['Age'] * 100 for seed in [3, 4]]
+        expected = (matrices[0] + matrices[1]) / 2
+        for col, value in redundancy['mean']['Age'].items():
+            if value != 'NaN':
+                self.assertAlmostEqual(value, expected[col], places=4)
+
+    '''
+    Tests that ARM scores the pairs by the rules of every sample
+    '''
+    def test_arm(self):
+        data = pd.DataFrame({'A': [1, 2, 3, 1, 2, 3], 'B': [4, 5, 6, 4, 5, 6]})
+        stability = compute_stability(['A'], data, 'Association Rule Mining', 2, 100, 42)
+        self.assertSetEqual(set(stability['results']), {'support', 'confidence', 'lift'})
+        self.assertEqual(stability['results']['lift']['frequency']['A'], {'A': 0.0, 'B': 1.0})
+        self.assertEqual(stability['results']['confidence']['mean']['A']['A'], 'NaN')
+
+    '''
+    Tests that invalid requests raise a ValueError
+    '''
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            compute_stability(['Age'], self.data, 'Categorical Association', 2, 50)
+        with self.assertRaises(ValueError):
+            compute_stability(['Missing'], self.data, 'Correlational Analysis', 2, 50)
+        with self.assertRaises(ValueError):
+            compute_stability(['Age'], self.data, 'Correlational Analysis', 0, 50)
+        with self.assertRaises(ValueError):
+            compute_stability(['Age'], self.data, 'Correlational Analysis', 2, 150)
+        with self.assertRaises(ValueError):
+            compute_stability(['Age'], self.data, 'FACET', 2, 50, target_var='Age')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,6 +10,14 @@ Tested Endpoints:
     - /results: Tests for retrieving analysis results based on the selected algorithm and dataset.
     - /columns: Tests for retrieving column names from the dataset.
     - /target-variable: Tests for updating the target variable for analysis.
+    - /stream-correlation: Tests for computing correlations of a CSV file read in chunks.
+    - Result cache: Tests that repeated /results requests are answered from the memory and disk tiers.
+    - /facet-sweep: Tests the leave-one-column-out FACET sweep of an uploaded file or of the current rows.
+    - /facet-batch: Tests the FACET batch of several target variables of an uploaded file or of the current rows.
+    - /stability: Tests the summaries of an analysis over samples of the uploaded dataset drawn with consecutive seeds.
+    - /estimate: Tests the runtime and memory predictions of FACET, and the runs planned for a latency budget.
+    - Hyperparameter memo: Tests that FACET runs on samples of an uploaded dataset report memoized hyperparameters.
+    - /resources: Tests that analyses run within the CPU and memory budget and are rejected when it stays full.
 '''
 
 import sys
@@ -25,13 +33,20 @@ import io
 Resets the global variables in each test case to ensure test isolation.
 '''
 @pytest.fixture(autouse=True)
-def reset_globals():
+def reset_globals(tmp_path):
     from controllers import api
+    from result_cache import ResultCache
+    api.result_cache = ResultCache(str(tmp_path / 'cache'))
+    api.governor = api.ResourceGovernor(cpus=2, memory_bytes=10 ** 9)
     api.data = None
     api.sampled_data = None
     api.selected_algorithm = None
     api.sensitive_variables = []
     api.columns = []
+    api.corr_statistics = None
+    api.category_levels = {}
+    api.seed = 0
+    api.dataset_fingerprint = None
 
 '''
 Sets up a Flask test client for the API routes.
@@ -98,6 +113,8 @@ def test_select_valid_algorithm(client):
     assert response.status_code == 200
     response = client.post('/algorithm', json={'algorithm': 'FACET'})
     assert response.status_code == 200
+    response = client.post('/algorithm', json={'algorithm': 'Categorical Association'})
+    assert response.status_code == 200
 
 '''
 Tests selecting an invalid algorithm.
@@ -398,4 +415,520 @@ def test_sql_filter_no_data(client):
     # Send POST request to filter endpoint
     response = client.post('/filter', json={'query': sql_filter})
     # Make sure we get an error code
-    assert response.status_code == 400
\ No newline at end of file
+    assert response.status_code == 400
+
+"""Test computing correlations of a file read in chunks."""
+def test_stream_correlation_valid(client):
+    csv_file_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'docs', 'test_data.csv'))
+    with open(csv_file_path, 'rb') as data:
+        response = client.post('/stream-correlation', content_type='multipart/form-data',
+                               data={'file': (data, 'test_data.csv'), 'variables': ['Salary'], 'chunksize': '4'})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    # The id column is dropped like in /upload
+    assert 'id' not in results['pearson']['Salary']
+    assert results['pearson']['Salary']['IQ'] == 0.711
+
+"""Test computing correlations of a file read in chunks with invalid input."""
+def test_stream_correlation_invalid(client):
+    response = client.post('/stream-correlation', content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert b'No file uploaded' in response.data
+
+    csv_file_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'docs', 'test_data.csv'))
+    with open(csv_file_path, 'rb') as data:
+        response = client.post('/stream-correlation', content_type='multipart/form-data',
+                               data={'file': (data, 'test_data.csv')})
+    assert response.status_code == 400
+    assert b'No sensitive variables selected' in response.data
+
+    for chunksize in ['abc', '0']:
+        with open(csv_file_path, 'rb') as data:
+            response = client.post('/stream-correlation', content_type='multipart/form-data',
+                                   data={'file': (data, 'test_data.csv'), 'variables': ['Salary'], 'chunksize': chunksize})
+        assert response.status_code == 400
+        assert response.json == {'error': 'Invalid chunk size'}
+
+
+"""Test correlation results on a subset of columns, answered from the statistics cached by the first full-dataset query."""
+def test_get_results_column_subset(client):
+    upload_sample_dataset(client)
+    from controllers import api
+    # The upload does not scan the rows for the statistics
+    assert api.corr_statistics is None
+    client.post('/random', json={'percentage': 100, 'seed': 1})
+    client.post('/sensitive-variables', json={'variables': ['Salary']})
+    client.post('/algorithm', json={'algorithm': 'Correlational Analysis'})
+    response = client.get('/results?columns=IQ&columns=Speed')
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert results['pearson']['Salary'] == {'Speed': 0.419, 'IQ': 0.711, 'Salary': 1.0}
+    assert set(results['kendall']['Salary']) == {'Speed', 'IQ', 'Salary'}
+    assert api.corr_statistics[0] is api.data
+
+    # The next query reuses the cached statistics
+    statistics = api.corr_statistics
+    response = client.get('/results?columns=IQ&cache=false')
+    assert response.status_code == 200
+    assert response.get_json()['results']['pearson']['Salary'] == {'IQ': 0.711, 'Salary': 1.0}
+    assert api.corr_statistics is statistics
+
+    # A new upload drops the cached statistics
+    upload_sample_dataset(client)
+    assert api.corr_statistics is None
+
+
+"""Test that the Pearson statistics of datasets too wide to cache are not kept, and correlations still come from the rows."""
+def test_get_results_statistics_limit(client, monkeypatch):
+    from controllers import api
+    monkeypatch.setattr(api, 'CORR_STATISTICS_MAX_COLUMNS', 2)
+    upload_sample_dataset(client)
+    client.post('/random', json={'percentage': 100, 'seed': 1})
+    client.post('/sensitive-variables', json={'variables': ['Salary']})
+    client.post('/algorithm', json={'algorithm': 'Correlational Analysis'})
+    response = client.get('/results?columns=IQ&columns=Speed')
+    assert response.status_code == 200
+    assert response.get_json()['results']['pearson']['Salary'] == {'Speed': 0.419, 'IQ': 0.711, 'Salary': 1.0}
+    assert api.corr_statistics is None
+
+
+"""Test approximate correlation results, which do not need a sample to be drawn first."""
+def test_get_results_approximate(client):
+    upload_sample_dataset(client)
+    client.post('/sensitive-variables', json={'variables': ['Salary']})
+    client.post('/algorithm', json={'algorithm': 'Correlational Analysis'})
+    response = client.get('/results?mode=approximate&epsilon=0.5')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['sample_size'] == 19
+    assert set(data['results']['pearson']['Salary']['IQ']) == {'estimate', 'lower', 'upper'}
+
+    # Invalid error bounds and confidences are rejected before the analysis runs
+    for query, error in [('epsilon=abc', 'Invalid epsilon'), ('epsilon=0', 'Invalid epsilon'), ('epsilon=inf', 'Invalid epsilon'),
+                         ('epsilon=nan', 'Invalid epsilon'), ('confidence=abc', 'Invalid confidence'),
+                         ('confidence=1', 'Invalid confidence'), ('confidence=nan', 'Invalid confidence')]:
+        response = client.get(f'/results?mode=approximate&{query}')
+        assert response.status_code == 400
+        assert response.json == {'error': error}
+
+
+"""Test correlation results with p-values."""
+def test_get_results_significance(client):
+    upload_sample_dataset(client)
+    client.post('/random', json={'percentage': 100, 'seed': 1})
+    client.post('/sensitive-variables', json={'variables': ['Salary']})
+    client.post('/algorithm', json={'algorithm': 'Correlational Analysis'})
+    response = client.get('/results?significance=true')
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert set(results) == {'pearson', 'spearman', 'kendall', 'p_values', 'p_adjusted'}
+    assert results['p_values']['pearson']['Salary']['IQ'] < 0.01
+
+
+"""Test that text columns are dictionary-encoded on upload and analyzed with Categorical Association."""
+def test_categorical_association(client):
+    csv = b"Name,Sex,Embarked,Age,Survived\n" + b"".join(
+        f"person{i},{'male' if i % 3 else 'female'},{'SCQ'[i % 3] if i % 7 else ''},{20 + i % 30},{int(i % 3 == 0)}\n".encode()
+        for i in range(150))
+    response = client.post('/upload', content_type='multipart/form-data', data={'file': (io.BytesIO(csv), 'people.csv')})
+    assert response.status_code == 200
+
+    from controllers import api
+    # Names have too many distinct values to be categories
+    assert api.columns == ['Sex', 'Embarked', 'Age', 'Survived']
+    assert api.category_levels['Sex'] == ['female', 'male']
+    assert api.data['Embarked'].isna().sum() > 0
+
+    client.post('/random', json={'percentage': 100, 'seed': 1})
+    client.post('/sensitive-variables', json={'variables': ['Sex']})
+    client.post('/algorithm', json={'algorithm': 'Categorical Association'})
+    response = client.get('/results')
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert results['Sex']['Survived'] == 1.0
+    assert 0 <= results['Sex']['Age'] <= 1
+
+
+"""Test that encoded text columns are left out of correlation, which gives the same results as without them."""
+def test_categorical_columns_not_correlated(client):
+    upload_sample_dataset(client)
+    client.post('/random', json={'percentage': 100, 'seed': 1})
+    client.post('/sensitive-variables', json={'variables': ['Age']})
+    client.post('/algorithm', json={'algorithm': 'Correlational Analysis'})
+    expected = client.get('/results?cache=false').get_json()['results']
+
+    # The same dataset with a text column of few categories
+    csv_file_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'docs', 'test_data.csv'))
+    with open(csv_file_path) as file:
+        lines = file.read().splitlines()
+    csv = "\n".join([lines[0] + ",Embarked"] + [line + "," + "SCQ"[i % 3] for i, line in enumerate(lines[1:])]) + "\n"
+    response = client.post('/upload', content_type='multipart/form-data', data={'file': (io.BytesIO(csv.encode()), 'test_data.csv')})
+    assert response.status_code == 200
+    assert client.get('/columns').get_json()['categorical'] == ['Embarked']
+
+    client.post('/random', json={'percentage': 100, 'seed': 1})
+    response = client.get('/results?cache=false')
+    assert response.status_code == 200
+    assert response.get_json()['results'] == expected
+
+    # Categorical Association still analyzes the text column
+    client.post('/algorithm', json={'algorithm': 'Categorical Association'})
+    response = client.get('/results?cache=false')
+    assert response.status_code == 200
+    assert 'Embarked' in response.get_json()['results']['Age']
+
+
+"""Test correlation results in the compact columnar format, where missing values are null."""
+def test_get_results_columnar(client):
+    upload_sample_dataset(client)
+    client.post('/random', json={'percentage': 100, 'seed': 1})
+    client.post('/sensitive-variables', json={'variables': ['Salary']})
+    client.post('/algorithm', json={'algorithm': 'Correlational Analysis'})
+    nested = client.get('/results').get_json()['results']
+    response = client.get('/results?format=columnar')
+    assert response.status_code == 200
+    pearson = response.get_json()['results']['pearson']
+    assert pearson['rows'] == ['Salary']
+    assert dict(zip(pearson['columns'], pearson['values'][0])) == nested['pearson']['Salary']
+
+    response = client.get('/results?format=xml')
+    assert response.status_code == 400
+    assert b'Invalid format' in response.data
+
+
+"""Test that repeated results are read from the cache, and that the disk tier survives a restart."""
+def test_get_results_cache(client, tmp_path):
+    upload_sample_dataset(client)
+    client.post('/random', json={'percentage': 100, 'seed': 1})
+    client.post('/sensitive-variables', json={'variables': ['Salary']})
+    client.post('/algorithm', json={'algorithm': 'Correlational Analysis'})
+    first = client.get('/results').get_json()
+    assert first['cache'] == {'hit': False}
+
+    # The same request is not recomputed
+    with patch('controllers.api.compute_corr', side_effect=Exception('Test Exception')):
+        second = client.get('/results').get_json()
+    assert second['cache'] == {'hit': True, 'tier': 'memory'}
+    assert second['results'] == first['results']
+
+    # A restarted server only has the disk tier
+    from controllers import api
+    from result_cache import ResultCache
+    api.result_cache = ResultCache(str(tmp_path / 'cache'))
+    api.governor = api.ResourceGovernor(cpus=2, memory_bytes=10 ** 9)
+    assert client.get('/results').get_json()['cache'] == {'hit': True, 'tier': 'disk'}
+
+    # The queue timeout and unknown parameters do not change the analysis
+    assert client.get('/results?timeout=5&unused=1').get_json()['cache'] == {'hit': True, 'tier': 'memory'}
+
+    # Other parameters or other rows are computed again
+    assert client.get('/results?columns=IQ').get_json()['cache'] == {'hit': False}
+    client.post('/random', json={'percentage': 50, 'seed': 1})
+    assert client.get('/results').get_json()['cache'] == {'hit': False}
+    assert client.get('/results?cache=false').get_json()['cache'] == {'hit': False}
+
+
+"""Test that FACET rejects unknown hyperparameter search strategies."""
+def test_get_results_invalid_search(client):
+    upload_sample_dataset(client)
+    client.post('/random', json={'percentage': 100, 'seed': 1})
+    client.post('/sensitive-variables', json={'variables': ['Age']})
+    client.post('/algorithm', json={'algorithm': 'FACET'})
+    client.post('/target-variable', json={'target': 'Salary'})
+    response = client.get('/results?search=random')
+    assert response.status_code == 400
+    assert b'Invalid search strategy' in response.data
+
+
+"""Test that FACET rejects unknown surrogate learners."""
+def test_get_results_invalid_learner(client):
+    upload_sample_dataset(client)
+    client.post('/random', json={'percentage': 100, 'seed': 1})
+    client.post('/sensitive-variables', json={'variables': ['Age']})
+    client.post('/algorithm', json={'algorithm': 'FACET'})
+    client.post('/target-variable', json={'target': 'Salary'})
+    response = client.get('/results?learner=linear')
+    assert response.status_code == 400
+    assert b'Invalid learner' in response.data
+
+
+"""Test that FACET rejects invalid numbers of explained rows."""
+def test_get_results_invalid_explain_rows(client):
+    upload_sample_dataset(client)
+    client.post('/random', json={'percentage': 100, 'seed': 1})
+    client.post('/sensitive-variables', json={'variables': ['Age']})
+    client.post('/algorithm', json={'algorithm': 'FACET'})
+    client.post('/target-variable', json={'target': 'Salary'})
+    for explain_rows in ['1', 'half', '-5']:
+        response = client.get(f'/results?explain_rows={explain_rows}')
+        assert response.status_code == 400
+        assert b'Invalid explain rows' in response.data
+
+
+"""Test that FACET rejects unknown redundancy pairs."""
+def test_get_results_invalid_pairs(client):
+    upload_sample_dataset(client)
+    client.post('/random', json={'percentage': 100, 'seed': 1})
+    client.post('/sensitive-variables', json={'variables': ['Age']})
+    client.post('/algorithm', json={'algorithm': 'FACET'})
+    client.post('/target-variable', json={'target': 'Salary'})
+    response = client.get('/results?pairs=some')
+    assert response.status_code == 400
+    assert b'Invalid redundancy pairs' in response.data
+
+
+"""Test that FACET rejects unknown redundancy modes."""
+def test_get_results_invalid_mode(client):
+    upload_sample_dataset(client)
+    client.post('/random', json={'percentage': 100, 'seed': 1})
+    client.post('/sensitive-variables', json={'variables': ['Age']})
+    client.post('/algorithm', json={'algorithm': 'FACET'})
+    client.post('/target-variable', json={'target': 'Salary'})
+    response = client.get('/results?mode=rough')
+    assert response.status_code == 400
+    assert b'Invalid mode' in response.data
+
+
+"""Test that /results runs within the resource budget, and is rejected when the budget stays full."""
+def test_get_results_resources(client):
+    from controllers import api
+    upload_sample_dataset(client)
+    client.post('/random', json={'percentage': 100, 'seed': 1})
+    client.post('/sensitive-variables', json={'variables': ['Age']})
+    client.post('/algorithm', json={'algorithm': 'Correlational Analysis'})
+    response = client.get('/resources')
+    assert response.status_code == 200
+    assert response.json == {'cpus': 2, 'free_cpus': 2, 'memory_bytes': 10 ** 9, 'free_memory_bytes': 10 ** 9, 'running': 0, 'queued': 0}
+
+    # Another job holds every CPU
+    cpus, memory = api.governor.acquire(2)
+    response = client.get('/results?timeout=0.05')
+    assert response.status_code == 503
+    assert b'Server busy' in response.data
+    api.governor.release(cpus, memory)
+
+    response = client.get('/results')
+    assert response.status_code == 200
+    assert client.get('/resources').json['free_cpus'] == 2
+
+    # Invalid timeouts are rejected before queueing
+    for timeout in ['abc', '-1', 'nan']:
+        response = client.get(f'/results?cache=false&timeout={timeout}')
+        assert response.status_code == 400
+        assert response.json == {'error': 'Invalid timeout'}
+
+
+"""Test that progressive FACET streams the results of nested growing samples, ending with the selected rows."""
+def test_get_results_progressive(client):
+    import json
+    import pandas as pd
+    from controllers import api
+    upload_sample_dataset(client)
+    client.post('/random', json={'percentage': 100, 'seed': 3})
+    client.post('/sensitive-variables', json={'variables': ['Age']})
+    client.post('/algorithm', json={'algorithm': 'FACET'})
+    client.post('/target-variable', json={'target': 'Graduated'})
+
+    # Record the rows of every sample instead of fitting FACET on a few rows
+    samples = []
+    def fake_facet(variables, data, target, seed, layout='nested', **options):
+        samples.append(set(data.index))
+        return {'Age': {'Speed': len(data), 'IQ': 'NaN'}}
+
+    with patch('controllers.api.compute_facet', side_effect=fake_facet), patch('controllers.api.PROGRESSIVE_MIN_ROWS', 4):
+        response = client.get('/results?progressive=true')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert lines[0] == {'status': 'FACET analysis started', 'percentages': [25, 50, 100]}
+    assert [line['percentage'] for line in lines[1:]] == [25, 50, 100]
+    assert [line['rows'] for line in lines[1:]] == [5, 10, 19]
+    assert [line['change'] for line in lines[1:]] == [None, 5, 9]
+    assert lines[-1]['status'] == 'FACET analysis completed'
+    assert samples[0] <= samples[1] <= samples[2]
+    assert client.get('/resources').json['running'] == 0
+
+    response = client.get('/results?progressive=true&learner=unknown')
+    assert response.status_code == 400
+
+
+"""Test that /results returns the requested FACET matrices, and rejects unknown ones."""
+def test_get_results_metrics(client):
+    upload_sample_dataset(client)
+    client.post('/random', json={'percentage': 100, 'seed': 1})
+    client.post('/sensitive-variables', json={'variables': ['Age']})
+    client.post('/algorithm', json={'algorithm': 'FACET'})
+    client.post('/target-variable', json={'target': 'Graduated'})
+    with patch('controllers.api.compute_facet', side_effect=lambda *args, metric='redundancy', **options: {'Age': {'IQ': metric}}):
+        response = client.get('/results?metrics=synergy&metrics=association')
+        assert response.status_code == 200
+        assert response.json['synergy'] == {'Age': {'IQ': 'synergy'}}
+        assert response.json['association'] == {'Age': {'IQ': 'association'}}
+        assert 'results' not in response.json
+        response = client.get('/results')
+        assert response.json['results'] == {'Age': {'IQ': 'redundancy'}}
+    assert client.get('/results?metrics=importance').status_code == 400
+    assert client.get('/results?metrics=synergy&mode=approximate').status_code == 400
+
+
+"""Test that /facet-sweep parses the file once and sweeps the requested columns, and validates its inputs."""
+def test_facet_sweep(client):
+    csv_file_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'docs', 'test_data.csv'))
+    calls = []
+    def fake_sweep(variables, rows, target, drop_columns, seed, layout='nested', **options):
+        calls.append((variables, list(rows.columns), target, drop_columns, seed, options['search']))
+        return {'Age': {'redundancy': {}, 'change': {}}}
+
+    with patch('controllers.api.compute_facet_sweep', side_effect=fake_sweep):
+        with open(csv_file_path, 'rb') as data:
+            response = client.post('/facet-sweep', content_type='multipart/form-data', data={
+                'file': (data, 'test_data.csv'), 'target': 'Graduated', 'variables': ['Age'], 'drop': ['IQ', 'Speed'], 'search': 'halving'})
+        assert response.status_code == 200
+        assert response.json['status'] == 'FACET sweep completed'
+        assert calls[0][1][0] == 'Age'
+        assert calls[0][2:] == ('Graduated', ['IQ', 'Speed'], 0, 'halving')
+
+        # Without a file the current rows are swept
+        response = client.post('/facet-sweep', data={'target': 'Graduated', 'variables': ['Age'], 'drop': ['IQ']})
+        assert response.status_code == 400
+        upload_sample_dataset(client)
+        response = client.post('/facet-sweep', data={'target': 'Graduated', 'variables': ['Age'], 'drop': ['IQ'], 'seed': 2})
+        assert response.status_code == 200
+        assert calls[1][4] == 2
+
+    assert client.post('/facet-sweep', data={'target': 'Graduated', 'variables': ['Age']}).status_code == 400
+    assert client.post('/facet-sweep', data={'target': 'Graduated', 'variables': ['Age'], 'drop': ['IQ'], 'learner': 'svm'}).status_code == 400
+    for invalid in [{'seed': 'abc'}, {'seed': '-2'}, {'timeout': 'soon'}]:
+        response = client.post('/facet-sweep', data=dict({'target': 'Graduated', 'variables': ['Age'], 'drop': ['IQ']}, **invalid))
+        assert response.status_code == 400
+        assert 'error' in response.json
+    response = client.post('/facet-sweep', data={'target': 'Graduated', 'variables': ['Age'], 'drop': ['Graduated']})
+    assert response.status_code == 500
+
+
+"""Test that /facet-batch parses the file once and fits every target, and validates its inputs."""
+def test_facet_batch(client):
+    csv_file_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'docs', 'test_data.csv'))
+    calls = []
+    def fake_batch(variables, rows, targets, seed, layout='nested', **options):
+        calls.append((variables, len(rows), targets, seed, options['learner']))
+        return {target: {'Age': {}} for target in targets}
+
+    with patch('controllers.api.compute_facet_batch', side_effect=fake_batch):
+        with open(csv_file_path, 'rb') as data:
+            response = client.post('/facet-batch', content_type='multipart/form-data', data={
+                'file': (data, 'test_data.csv'), 'targets': ['Graduated', 'Salary'], 'variables': ['Age'], 'learner': 'extra_trees'})
+        assert response.status_code == 200
+        assert response.json['status'] == 'FACET batch completed'
+        assert set(response.json['results']) == {'Graduated', 'Salary'}
+        assert calls[0] == (['Age'], 19, ['Graduated', 'Salary'], 0, 'extra_trees')
+
+        # Without a file the current rows are analyzed
+        response = client.post('/facet-batch', data={'targets': ['Graduated'], 'variables': ['Age']})
+        assert response.status_code == 400
+        upload_sample_dataset(client)
+        client.post('/random', json={'percentage': 50, 'seed': 1})
+        response = client.post('/facet-batch', data={'targets': ['Graduated'], 'variables': ['Age'], 'seed': 2})
+        assert response.status_code == 200
+        assert calls[1][1:4] == (10, ['Graduated'], 2)
+
+    assert client.post('/facet-batch', data={'variables': ['Age']}).status_code == 400
+    assert client.post('/facet-batch', data={'targets': ['Graduated'], 'variables': ['Age'], 'mode': 'rough'}).status_code == 400
+    for invalid in [{'seed': '1.5'}, {'seed': '-2'}, {'timeout': 'soon'}]:
+        response = client.post('/facet-batch', data=dict({'targets': ['Graduated'], 'variables': ['Age']}, **invalid))
+        assert response.status_code == 400
+        assert 'error' in response.json
+    response = client.post('/facet-batch', data={'targets': ['Age'], 'variables': ['Age']})
+    assert response.status_code == 500
+
+
+"""Test that /stability summarizes correlations over samples drawn like /random, and passes the FACET options on."""
+def test_stability(client):
+    assert client.post('/stability', data={'percentage': 50}).status_code == 400
+    upload_sample_dataset(client)
+    client.post('/sensitive-variables', json={'variables': ['Age']})
+    client.post('/algorithm', json={'algorithm': 'Correlational Analysis'})
+
+    response = client.post('/stability', data={'percentage': 50, 'samples': 3, 'seed': 4, 'methods': ['pearson'], 'format': 'columnar'})
+    assert response.status_code == 200
+    assert response.json['status'] == 'Stability analysis completed'
+    assert response.json['seeds'] == [4, 5, 6]
+    assert response.json['rows'] == 10
+    assert list(response.json['results']) == ['pearson']
+    summary = response.json['results']['pearson']
+    assert summary['mean']['rows'] == ['Age']
+    assert set(summary['quantiles']) == {'0.05', '0.5', '0.95'}
+    assert summary['mean']['values'][0][0] == 1.0
+
+    calls = []
+    def fake_stability(variables, rows, algorithm, samples, percentage, random_seed, layout='nested', target_var=None, **options):
+        calls.append((variables, len(rows), algorithm, samples, percentage, random_seed, target_var, options))
+        return {'samples': samples, 'rows': 0, 'seeds': [], 'results': {}}
+
+    with patch('controllers.api.compute_stability', side_effect=fake_stability):
+        response = client.post('/stability', data={'percentage': 25, 'algorithm': 'FACET', 'target': 'Graduated', 'variables': ['Height'], 'learner': 'extra_trees', 'quantiles': [.1, .9]})
+        assert response.status_code == 200
+        variables, rows, algorithm, samples, percentage, random_seed, target_var, options = calls[0]
+        assert (variables, rows, algorithm, samples, percentage, random_seed, target_var) == (['Height'], 19, 'FACET', 20, 25.0, 0, 'Graduated')
+        assert options['learner'] == 'extra_trees' and options['quantiles'] == [.1, .9]
+
+    assert client.post('/stability', data={'percentage': 0}).status_code == 400
+    assert client.post('/stability', data={'percentage': 50, 'samples': 0}).status_code == 400
+    assert client.post('/stability', data={'percentage': 'half'}).status_code == 400
+    assert client.post('/stability', data={'percentage': 50, 'seed': 'abc'}).status_code == 400
+    assert client.post('/stability', data={'percentage': 50, 'seed': -3}).status_code == 400
+    assert client.post('/stability', data={'percentage': 50, 'timeout': 'soon'}).status_code == 400
+    assert client.post('/stability', data={'percentage': 50, 'algorithm': 'Categorical Association'}).status_code == 400
+    from controllers import api
+    api.target_variable = None
+    assert client.post('/stability', data={'percentage': 50, 'algorithm': 'FACET'}).status_code == 400
+    assert client.post('/stability', data={'percentage': 50, 'methods': ['cosine']}).status_code == 500
+
+
+"""Test that /estimate predicts FACET runs and plans them for a budget, and that /results runs the plan."""
+def test_estimate(client):
+    assert client.get('/estimate').status_code == 400
+    upload_sample_dataset(client)
+    client.post('/random', json={'percentage': 100, 'seed': 1})
+    client.post('/sensitive-variables', json={'variables': ['Age']})
+    client.post('/algorithm', json={'algorithm': 'FACET'})
+    client.post('/target-variable', json={'target': 'Graduated'})
+
+    response = client.get('/estimate?search=halving')
+    assert response.status_code == 200
+    assert set(response.json) == {'seconds', 'selection_seconds', 'inspector_seconds', 'memory_bytes', 'observations'}
+    assert response.json['seconds'] > 0
+    response = client.get('/estimate?budget=0.001')
+    assert response.json['plan']['repeats'] == 1
+    assert response.json['plan']['within_budget'] is False
+    assert client.get('/estimate?budget=soon').status_code == 400
+    assert client.get('/estimate?budget=-1').status_code == 400
+
+    options = []
+    with patch('controllers.api.compute_facet', side_effect=lambda *args, **kwargs: options.append(kwargs) or {'Age': {}}):
+        response = client.get('/results?budget=0.001')
+        assert response.status_code == 200
+        assert response.json['plan']['candidates'] == 1
+        assert (options[0]['repeats'], options[0]['candidates']) == (1, 1)
+
+
+"""Test that FACET memoizes the hyperparameters of an uploaded dataset, and reuses them for its samples."""
+def test_get_results_memo(client):
+    upload_sample_dataset(client)
+    client.post('/random', json={'percentage': 100, 'seed': 1})
+    client.post('/sensitive-variables', json={'variables': ['Age']})
+    client.post('/algorithm', json={'algorithm': 'FACET'})
+    client.post('/target-variable', json={'target': 'Salary'})
+    assert client.get('/results?memo=always').status_code == 400
+
+    response = client.get('/results?memo=best&cache=false')
+    assert response.status_code == 200
+    assert set(response.json['hyperparameters']) == {'min_samples_leaf', 'max_depth'}
+    client.post('/random', json={'percentage': 80, 'seed': 2})
+    response = client.get('/results?memo=best&cache=false')
+    assert response.status_code == 200
+    assert response.json['memoized'] is True
+    assert 'Age' in response.json['results']
+
+    # Without the memo the response does not report it
+    assert 'memoized' not in client.get('/results?cache=false').json
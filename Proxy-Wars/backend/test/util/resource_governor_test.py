@@ -0,0 +1,63 @@
+'''
+resource_governor_test.py
+Unit tests for the CPU and memory governor in resource_governor.py.
+
+Key Features:
+    - Checks that jobs are downsized to the free CPUs and see their grant through job_cpus.
+    - Checks that jobs that do not fit in the free memory are queued, and rejected after their timeout.
+'''
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+import threading
+import unittest
+from util.resource_governor import ResourceGovernor, ResourceBusyError, job_cpus
+
+'''
+This class contains unit tests for the ResourceGovernor class.
+'''
+
+class TestResourceGovernor(unittest.TestCase):
+
+    '''
+    Tests that jobs get the free CPUs when fewer than requested are free, and that job_cpus reports the grant
+    '''
+    def test_downsize(self):
+        governor = ResourceGovernor(cpus=4, memory_bytes=1000)
+        self.assertIsNone(job_cpus())
+        self.assertEqual(job_cpus(-1), -1)
+        with governor.job(3, 100) as first:
+            self.assertEqual(first, 3)
+            self.assertEqual(job_cpus(), 3)
+            with governor.job(4, 100) as second:
+                self.assertEqual(second, 1)
+                self.assertEqual(job_cpus(), 1)
+            self.assertEqual(job_cpus(), 3)
+            self.assertEqual(governor.status()['free_memory_bytes'], 900)
+        self.assertIsNone(job_cpus())
+        self.assertEqual(governor.status(), {'cpus': 4, 'free_cpus': 4, 'memory_bytes': 1000,
+                                             'free_memory_bytes': 1000, 'running': 0, 'queued': 0})
+
+    '''
+    Tests that a job waits until enough memory is free, and is rejected after its timeout
+    '''
+    def test_queue(self):
+        governor = ResourceGovernor(cpus=4, memory_bytes=1000)
+        cpus, memory = governor.acquire(1, 800)
+        with self.assertRaises(ResourceBusyError):
+            governor.acquire(1, 400, timeout=.05)
+
+        # A job larger than the whole budget waits for every other job and then runs alone
+        granted = []
+        waiting = threading.Thread(target=lambda: granted.append(governor.acquire(1, 5000)))
+        waiting.start()
+        waiting.join(.1)
+        self.assertEqual(granted, [])
+        governor.release(cpus, memory)
+        waiting.join(5)
+        self.assertEqual(granted, [(1, 1000)])
+        self.assertEqual(governor.status()['free_memory_bytes'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+'''
+result_cache_test.py
+Unit tests for the two-tier result cache in result_cache.py.
+
+Key Features:
+    - Checks that dataset fingerprints follow the content of the rows.
+    - Checks the in-memory LRU tier and the size-limited on-disk tier.
+    - Checks that results that cannot be written to disk leave no partial files.
+'''
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from util.result_cache import ResultCache, cache_key, fingerprint_dataframe
+
+'''
+This class contains unit tests for the ResultCache class and the cache key helpers.
+'''
+
+class TestResultCache(unittest.TestCase):
+
+    '''
+    Set up for tests. Creates a temporary directory for the on-disk tier.
+    '''
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    '''
+    Tests that fingerprints depend on the values and their order, not on the index
+    '''
+    def test_fingerprint(self):
+        df = pd.DataFrame({'A': [1, 2, 3], 'B': [0.5, np.nan, 2.0]})
+        self.assertEqual(fingerprint_dataframe(df), fingerprint_dataframe(df.set_index(pd.Index([7, 8, 9]))))
+        self.assertNotEqual(fingerprint_dataframe(df), fingerprint_dataframe(df.iloc[::-1]))
+        self.assertNotEqual(fingerprint_dataframe(df), fingerprint_dataframe(df.assign(B=[0.5, 1.0, 2.0])))
+        self.assertNotEqual(fingerprint_dataframe(df), fingerprint_dataframe(df.rename(columns={'B': 'C'})))
+        self.assertEqual(cache_key(a=1, b=[1, 2]), cache_key(b=[1, 2], a=1))
+        self.assertNotEqual(cache_key(a=1), cache_key(a=2))
+
+    '''
+    Tests that the in-memory tier keeps the most recently used results
+    '''
+    def test_memory_tier(self):
+        cache = ResultCache(None, memory_entries=2)
+        cache.put('a', {'value': 1})
+        cache.put('b', {'value': 2})
+        cache.get('a')
+        cache.put('c', {'value': 3})
+        self.assertEqual(cache.get('a'), ({'value': 1}, 'memory'))
+        self.assertEqual(cache.get('b'), (None, None))
+
+    '''
+    Tests that the on-disk tier survives a new cache and evicts the least recently used files
+    '''
+    def test_disk_tier(self):
+        cache = ResultCache(self.directory.name, disk_bytes=1000)
+        cache.put('a', {'values': [0.5] * 100})
+        self.assertEqual(ResultCache(self.directory.name).get('a'), ({'values': [0.5] * 100}, 'disk'))
+
+        # Each result takes about 400 bytes, so only the two most recent fit
+        os.utime(cache.path('a'), (0, 0))
+        cache.put('b', {'values': [0.6] * 100})
+        cache.put('c', {'values': [0.7] * 100})
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ['b.json', 'c.json'])
+
+        cache.clear()
+        self.assertEqual(cache.get('b'), (None, None))
+
+    '''
+    Tests that a result that cannot be written to disk stays in memory and leaves no temporary file behind
+    '''
+    def test_unserializable(self):
+        cache = ResultCache(self.directory.name)
+        for result in [{'values': {1, 2}}, {'values': float('nan'), 'nested': [object()]}]:
+            cache.put('a', result)
+            self.assertEqual(cache.get('a'), (result, 'memory'))
+            self.assertEqual(os.listdir(self.directory.name), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -44,12 +44,11 @@ const getColorForValue = (value, maxValue) => {
 };
 
 
-const TableFacet = ({results}) =>{
+const TableFacet = ({results, maxValue = 100, unit = "%"}) =>{
     const sensitive = Object.keys(results);
     const columns = Object.keys(results[sensitive[0]]);
 
-    // Find the max value for scaling the heatmap colors
-    const maxValue = 100;
+    // maxValue is the max value for scaling the heatmap colors
 
     const getColorForValue = (value, maxValue) => {
         if (value === "NaN" || value === null) return "rgb(140,140,140)"; // White for NaN or null values
@@ -84,7 +83,7 @@ const TableFacet = ({results}) =>{
                                         textAlign: "center"
                                     }}
                                 >
-                                    {value !== "NaN" ? `${value}%` : "NaN"}
+                                    {value !== "NaN" ? `${value}${unit}` : "NaN"}
                                 </div>
                             );
                         })}
@@ -121,8 +120,8 @@ const TableFacet = ({results}) =>{
                     alignItems: 'center',
                     padding: '0 5px'
                 }}>
-                    <span>0%</span>
-                    <span>100%</span>
+                    <span>0{unit}</span>
+                    <span>{maxValue}{unit}</span>
                 </div>
             </div>
         </div>
@@ -193,7 +192,7 @@ const InfoBoxButton = ({ text }) => {
 function App() {
     const [columns, setColumns] = useState([]);
     const [currColumns, setCurrColumns] = useState([]);
-    let algorithms = ['Correlational Analysis','FACET','Association Rule Mining'];
+    let algorithms = ['Correlational Analysis','FACET','Association Rule Mining','Categorical Association'];
     const [selectedAlgorithm, setSelectedAlgorithm] = useState("");
     const [selectedVariables, setSelectedVariables] = useState([]);
     const [limitingRows, setLimitingRows] = useState("");
@@ -232,6 +231,7 @@ function App() {
         "Correlational Analysis": "Identifies the strength and direction of relationships between variables.",
         "FACET": "Finds relationships between variables using a feature selection approach.",
         "Association Rule Mining": "Calculates relationships between variables by generating association rules.",
+        "Categorical Association": "Measures relationships with text and numeric variables using Cramér's V and the correlation ratio.",
     };
 
     const filteredVariables = currColumns.filter(variable => variable.toLowerCase().includes(searchQuery.toLowerCase()));
@@ -422,7 +422,7 @@ function App() {
     }
     const handleAlgorithm = (event) => {
         setSelectedAlgorithm(event.target.value);
-        if(event.target.value === "Correlational Analysis"){
+        if(event.target.value === "Correlational Analysis" || event.target.value === "Categorical Association"){
             setTargetVar(null);
             setCurrColumns(columns);
         }
@@ -947,6 +947,7 @@ function App() {
                     {/* {JSON.stringify(results, null, 2)} */}
                     {displayResults && results && currAlgorithm === "Correlational Analysis" && <TableCorr results={results} />}
                     {displayResults && results && currAlgorithm === "FACET" && <TableFacet results={results} />}
+                    {displayResults && results && currAlgorithm === "Categorical Association" && <TableFacet results={results} maxValue={1} unit="" />}
                     {displayResults && results && currAlgorithm === "Association Rule Mining" && (
                         <>
                             <div className="tabs">